@@ -22,6 +22,10 @@ def create_app():
     )
     app.config.from_object(Config)
 
+    # jsonify() through orjson when it is installed (app/json_provider.py)
+    from app.json_provider import init_json_provider
+    init_json_provider(app)
+
     # init extensions
     db.init_app(app)
     migrate.init_app(app, db)
@@ -30,37 +34,62 @@ def create_app():
     CORS(app)
 
     # import models so db knows them
-    from app import models
-    from app.models import Institution
+    from app import models  # noqa: F401
+
+    # keep CGPA / semester summaries in step with mark changes (ORM session hooks)
+    from app import summaries  # noqa: F401
+
+    # cohort-changed events for /api/results/events, published on commit (ORM session hooks)
+    from app import events  # noqa: F401
+
+    # tombstones of deleted marks / students / subjects for /api/results/changes (ORM hooks)
+    from app import changes  # noqa: F401
+
+    # user loader for flask-login (served from an in-process TTL cache)
+    from app.auth.user_cache import configure_user_cache, load_cached_user
+    configure_user_cache(app)
 
-    # user loader for flask-login
     @login_manager.user_loader
     def load_user(user_id):
-        return models.User.query.get(int(user_id))
-
-    # Ensure at least one Institution row exists
-    from sqlalchemy import inspect
-
-    with app.app_context():
-        try:
-            inspector = inspect(db.engine)
-            if "institution" in inspector.get_table_names():
-                if Institution.query.count() == 0:
-                    inst = Institution(name="🏫 GOVT. POLYTECHNIC, SIDDIPET")
-                    db.session.add(inst)
-                    db.session.commit()
-        except Exception as e:
-            app.logger.warning(f"Skipping Institution seed (reason: {e})")
+        return load_cached_user(int(user_id))
+
+    # per-request query counts, Server-Timing and slow-request log
+    from app.instrumentation import init_instrumentation
+    init_instrumentation(app)
+
+    # request latency / in-flight / pool / cache / import metrics at /metrics
+    from app.metrics import init_metrics
+    init_metrics(app)
+
+    # admin-triggered / sampled cProfile of single requests
+    from app.profiling import init_profiling
+    init_profiling(app)
+
+    # gzip / brotli for large JSON and HTML responses; registered last so its
+    # after_request hook runs first and the time shows in Server-Timing
+    from app.compression import init_compression
+    init_compression(app)
+
+    # No database work here: every worker boot and CLI call runs create_app.
+    # The Institution row is created by `flask data seed-institution`.
 
     # Register blueprints
     from app.auth.routes import auth_bp
     from app.main.routes import main_bp
     from app.results.routes import results_bp
     from app.api.files import files_bp   # ✅ use the new API version only
+    from app.admin.routes import admin_bp
 
     app.register_blueprint(auth_bp)
     app.register_blueprint(main_bp)
     app.register_blueprint(results_bp)
     app.register_blueprint(files_bp)      # ✅ register once
+    app.register_blueprint(admin_bp)
+
+    # CLI commands
+    from app.cli import data_cli, files_cli, users_cli
+    app.cli.add_command(data_cli)
+    app.cli.add_command(files_cli)
+    app.cli.add_command(users_cli)
 
     return app
@@ -0,0 +1,119 @@
+# app/admin/routes.py
+"""Admin pages: stored request profiles (see app/profiling.py) and weight profiles (app/weights.py)."""
+import os
+
+from flask import Blueprint, Response, abort, jsonify, render_template, request, send_file
+from flask_login import current_user
+
+from app import db
+from app.auth.decorators import admin_required
+from app.models import ScoreRecompute, Subject, WeightProfile
+from app.profiling import list_profiles, profile_path, profile_summary
+from app.weights import (DEFAULT_PROFILE, governed_sub_codes, profile_json, queue_recompute, recompute_json,
+                         start_recompute, validate_profile)
+
+admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
+
+SORT_KEYS = ("cumulative", "tottime", "ncalls")
+
+
+@admin_bp.route("/profiles")
+@admin_required
+def profiles_page():
+    """Recent request profiles, newest first."""
+    return render_template("admin_profiles.html", profiles=list_profiles())
+
+
+@admin_bp.route("/profiles/<name>.pstats")
+@admin_required
+def download_profile(name):
+    """Raw pstats file (open with snakeviz, `python -m pstats`, ...)."""
+    path = profile_path(name)
+    if path is None or not os.path.exists(path):
+        abort(404)
+    return send_file(path, mimetype="application/octet-stream", as_attachment=True,
+                     download_name=f"{name}.pstats")
+
+
+@admin_bp.route("/profiles/<name>")
+@admin_required
+def profile_text(name):
+    """Top functions of a profile as plain text (?sort=cumulative|tottime|ncalls)."""
+    sort = request.args.get("sort", "cumulative")
+    report = profile_summary(name, sort if sort in SORT_KEYS else "cumulative")
+    if report is None:
+        abort(404)
+    return Response(report, mimetype="text/plain")
+
+
+# ---------------------------
+# Weight profiles
+# ---------------------------
+@admin_bp.route("/weights", methods=["GET"])
+@admin_required
+def list_weight_profiles():
+    """Default weights / full marks and every branch or subject profile."""
+    profiles = WeightProfile.query.order_by(WeightProfile.branch, WeightProfile.sub_code).all()
+    return jsonify({
+        "defaults": {"weights": DEFAULT_PROFILE[0], "max_values": DEFAULT_PROFILE[1]},
+        "profiles": [profile_json(p) for p in profiles],
+    })
+
+
+@admin_bp.route("/weights", methods=["PUT"])
+@admin_required
+def save_weight_profile():
+    """
+    Create or replace the profile of a branch or a subject:
+    {"branch": "CS"} or {"sub_code": "CS-405"}, plus "weights" / "max_values"
+    (components left out keep the defaults). Re-scores the marks it governs in
+    the background; returns the recompute to poll.
+    """
+    data = request.get_json(silent=True) or {}
+    branch = (data.get("branch") or "").strip() or None
+    sub_code = (data.get("sub_code") or "").strip() or None
+    if bool(branch) == bool(sub_code):
+        return jsonify({"error": "give exactly one of branch, sub_code"}), 400
+    if sub_code and db.session.get(Subject, sub_code) is None:
+        return jsonify({"error": "unknown sub_code"}), 404
+    try:
+        weights, max_values = validate_profile(data.get("weights"), data.get("max_values"))
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    profile = WeightProfile.query.filter_by(branch=branch, sub_code=sub_code).first()
+    if profile is None:
+        profile = WeightProfile(branch=branch, sub_code=sub_code)
+        db.session.add(profile)
+    profile.weights, profile.max_values = weights, max_values
+    profile.updated_by = current_user.id
+    db.session.flush()
+    job = queue_recompute(governed_sub_codes(branch, sub_code))
+    db.session.commit()
+    start_recompute(job)
+    return jsonify({"profile": profile_json(profile), "recompute": recompute_json(job) if job else None}), 202
+
+
+@admin_bp.route("/weights/<int:profile_id>", methods=["DELETE"])
+@admin_required
+def delete_weight_profile(profile_id):
+    """Drop a profile; its subjects fall back to the branch profile or the defaults."""
+    profile = db.session.get(WeightProfile, profile_id)
+    if profile is None:
+        return jsonify({"error": "not found"}), 404
+    branch, sub_code = profile.branch, profile.sub_code
+    db.session.delete(profile)
+    db.session.flush()
+    job = queue_recompute(governed_sub_codes(branch, sub_code))
+    db.session.commit()
+    start_recompute(job)
+    return jsonify({"deleted": profile_id, "recompute": recompute_json(job) if job else None}), 202
+
+
+@admin_bp.route("/weights/recomputes/<int:job_id>")
+@admin_required
+def weight_recompute_status(job_id):
+    job = db.session.get(ScoreRecompute, job_id)
+    if job is None:
+        return jsonify({"error": "not found"}), 404
+    return jsonify(recompute_json(job))
@@ -1,16 +1,25 @@
 # app/api/files.py
 import os
-import csv
+import hashlib
+import importlib.util
+import mimetypes
 import traceback
-from flask import Blueprint, request, jsonify, current_app, send_file
-from app.models import UploadedFile, db
-
-# optional Excel preview dependency
-try:
-    import openpyxl
-    HAVE_OPENPYXL = True
-except Exception:
-    HAVE_OPENPYXL = False
+import unicodedata
+import base64
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+from urllib.parse import quote
+from flask import Blueprint, request, jsonify, current_app, send_file, stream_with_context
+from flask_login import login_required, current_user
+from app.models import UploadedFile, User, db
+from app.cache import TTLCache
+from app.previews import get_preview, PreviewError
+from app.rowindex import open_row_store, discard_row_store
+from app.storage import get_blob_dir, blob_encoding, iter_blob, store_upload, upload_ext
+
+# optional Excel preview dependency; parsing lives in app.previews / app.rowindex and
+# imports openpyxl on first use, so only check that it is installed here
+HAVE_OPENPYXL = importlib.util.find_spec("openpyxl") is not None
 
 files_bp = Blueprint("files_api", __name__, url_prefix="/api/files")
 
@@ -27,13 +36,18 @@ def get_uploads_dir():
 
 def find_file_on_disk(uploaded: UploadedFile):
     """
-    Try multiple heuristics to find the physical file:
+    Return the stored blob of the upload, or for uploads that predate the blob
+    store, try multiple heuristics to find the physical file:
     - original_file_name
     - file_name
     - "<id>_original_file_name"
     - "<id>_file_name"
     - fallback: any file in uploads dir that endswith original_file_name or startswith id
     """
+    if uploaded.blob_path:
+        p = os.path.join(get_blob_dir(), uploaded.blob_path)
+        return p if os.path.exists(p) else None
+
     uploads_dir = get_uploads_dir()
     if not os.path.isdir(uploads_dir):
         return None
@@ -69,40 +83,249 @@ def find_file_on_disk(uploaded: UploadedFile):
     return None
 
 
+def ensure_content_hash(uploaded: UploadedFile, path: str) -> str:
+    """Return the stored sha256 of the upload, hashing the file once if it is missing."""
+    if uploaded.content_hash:
+        return uploaded.content_hash
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+            h.update(chunk)
+    uploaded.content_hash = h.hexdigest()
+    try:
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception("could not store content hash for file %s", uploaded.id)
+    return h.hexdigest()
+
+
+def _accel_location(path: str) -> Optional[str]:
+    """
+    Internal nginx URI of `path`: under SENDFILE_BLOB_ACCEL_PREFIX for the blob
+    store (when set), else under SENDFILE_ACCEL_PREFIX for anything inside
+    UPLOAD_FOLDER. None when no location maps onto the file.
+    """
+    roots = ((get_blob_dir(), current_app.config.get("SENDFILE_BLOB_ACCEL_PREFIX")),
+             (get_uploads_dir(), current_app.config.get("SENDFILE_ACCEL_PREFIX", "/protected-uploads")))
+    for root, prefix in roots:
+        if not prefix:
+            continue
+        try:
+            rel = os.path.relpath(os.path.abspath(path), root)
+        except ValueError:  # another drive (Windows)
+            continue
+        if rel == os.pardir or rel.startswith(os.pardir + os.sep) or os.path.isabs(rel):
+            continue
+        return f"{prefix.rstrip('/')}/{quote(rel.replace(os.sep, '/'))}"
+    return None
+
+
+def _accel_redirect_response(path: str, download_name: str, etag: str, last_modified: datetime):
+    """
+    Empty response that tells nginx to serve `path` itself (X-Accel-Redirect),
+    or None when `path` is outside every internal location.
+    """
+    location = _accel_location(path)
+    if location is None:
+        return None
+
+    rv = current_app.response_class(mimetype=mimetypes.guess_type(download_name)[0] or "application/octet-stream")
+    rv.headers["X-Accel-Redirect"] = location
+    _set_attachment(rv, download_name)
+    rv.set_etag(etag)
+    rv.last_modified = last_modified
+    rv.cache_control.no_cache = True
+    # nginx answers Range requests itself; only the 304 revalidation happens here
+    return rv.make_conditional(request)
+
+
+def _set_attachment(rv, download_name: str) -> None:
+    """Content-Disposition: attachment, with an RFC 5987 filename* for non-ASCII names."""
+    try:
+        download_name.encode("ascii")
+        rv.headers.set("Content-Disposition", "attachment", filename=download_name)
+    except UnicodeEncodeError:
+        rv.headers.set("Content-Disposition", "attachment",
+                       filename=unicodedata.normalize("NFKD", download_name).encode("ascii", "ignore").decode(),
+                       **{"filename*": f"UTF-8''{quote(download_name)}"})
+
+
+def _compressed_blob_response(path: str, download_name: str, etag: str, last_modified: datetime):
+    """
+    Serve a blob compressed at rest: as-is with Content-Encoding when the client
+    accepts that coding (ranges still work), otherwise decompressed as a stream.
+    """
+    encoding = blob_encoding(path)
+    mimetype = mimetypes.guess_type(download_name)[0] or "application/octet-stream"
+
+    if request.accept_encodings[encoding]:
+        rv = send_file(path, mimetype=mimetype, as_attachment=True, download_name=download_name,
+                       conditional=True, etag=f"{etag}-{encoding}", last_modified=last_modified)
+        rv.headers["Content-Encoding"] = encoding
+    else:
+        rv = current_app.response_class(stream_with_context(iter_blob(path)), mimetype=mimetype)
+        _set_attachment(rv, download_name)
+        rv.set_etag(etag)
+        rv.last_modified = last_modified
+        rv.cache_control.no_cache = True
+        rv = rv.make_conditional(request)
+    rv.vary.add("Accept-Encoding")
+    return rv
+
+
+# -------------------------
+# Listing (keyset pagination)
+# -------------------------
+LIST_DEFAULT_LIMIT = 50
+LIST_MAX_LIMIT = 200
+
+# total row count per (q, exam_type, change marker); the marker (max id, row count) moves
+# on every upload or delete in any process, so other workers' entries stop matching
+_count_cache = TTLCache("uploaded_files_count", maxsize=256, ttl=300)
+
+
+def encode_cursor(uploaded_on: datetime, file_id: int) -> str:
+    raw = f"{uploaded_on.isoformat()}|{file_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of encode_cursor; raises ValueError on garbage."""
+    padded = cursor + "=" * (-len(cursor) % 4)
+    ts, _, fid = base64.urlsafe_b64decode(padded.encode()).decode().partition("|")
+    return datetime.fromisoformat(ts), int(fid)
+
+
+def invalidate_file_counts() -> None:
+    _count_cache.clear()
+
+
+def _files_marker() -> Tuple[Optional[int], int]:
+    """(max id, row count) of uploaded_files, both answered from the primary key."""
+    return tuple(db.session.query(db.func.max(UploadedFile.id), db.func.count(UploadedFile.id)).one())
+
+
+def query_files_page(q: str = "", exam_type: str = "", cursor: Optional[str] = None,
+                     limit: int = LIST_DEFAULT_LIMIT) -> Dict:
+    """
+    One page of uploads, newest first, keyset-paginated on (uploaded_on, id).
+    Uploader names come from the same query; the total is served from a cache
+    keyed on _files_marker(), so it is recounted once the table changes.
+    Raises ValueError for an invalid cursor.
+    """
+    filters = []
+    if exam_type:
+        filters.append(UploadedFile.exam_type == exam_type)
+    if q:
+        like = f"%{q}%"
+        filters.append(db.or_(
+            UploadedFile.file_name.ilike(like),
+            UploadedFile.original_file_name.ilike(like)
+        ))
+
+    query = (
+        db.session.query(UploadedFile, User.username)
+        .outerjoin(User, User.id == UploadedFile.uploaded_by)
+        .filter(*filters)
+    )
+    if cursor:
+        ts, last_id = decode_cursor(cursor)
+        query = query.filter(db.or_(
+            UploadedFile.uploaded_on < ts,
+            db.and_(UploadedFile.uploaded_on == ts, UploadedFile.id < last_id)
+        ))
+    rows = (
+        query.order_by(UploadedFile.uploaded_on.desc(), UploadedFile.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    items = []
+    for f, username in rows:
+        items.append({
+            "id": f.id,
+            "file_name": f.file_name,
+            "original_file_name": f.original_file_name,
+            "exam_type": f.exam_type,
+            "uploaded_on": f.uploaded_on.isoformat() if f.uploaded_on else None,
+            "uploaded_by": f.uploaded_by,
+            "uploaded_by_name": username
+        })
+
+    total = _count_cache.get_or_set(
+        (q.lower(), exam_type, _files_marker()),
+        lambda: db.session.query(db.func.count(UploadedFile.id)).filter(*filters).scalar()
+    )
+    last = rows[-1][0] if rows else None
+    return {
+        "total": total,
+        "limit": limit,
+        "items": items,
+        "next_cursor": encode_cursor(last.uploaded_on, last.id) if has_more else None
+    }
+
+
 @files_bp.route("", methods=["GET"])
 def list_files():
-    """List uploaded files. query params: q (search), exam_type"""
+    """List uploaded files. query params: q (search), exam_type, cursor, limit"""
     try:
         q = (request.args.get("q") or "").strip()
         et = (request.args.get("exam_type") or "").strip()
-
-        query = UploadedFile.query
-        if et:
-            query = query.filter_by(exam_type=et)
-        if q:
-            like = f"%{q}%"
-            query = query.filter(
-                db.or_(
-                    UploadedFile.file_name.ilike(like),
-                    UploadedFile.original_file_name.ilike(like)
-                )
-            )
-        items = []
-        for f in query.order_by(UploadedFile.uploaded_on.desc()).all():
-            items.append({
-                "id": f.id,
-                "file_name": f.file_name,
-                "original_file_name": f.original_file_name,
-                "exam_type": f.exam_type,
-                "uploaded_on": f.uploaded_on.isoformat() if f.uploaded_on else None,
-                "uploaded_by": f.uploaded_by
-            })
-        return jsonify({"total": len(items), "items": items})
+        cursor = (request.args.get("cursor") or "").strip() or None
+        try:
+            limit = min(max(int(request.args.get("limit") or LIST_DEFAULT_LIMIT), 1), LIST_MAX_LIMIT)
+        except ValueError:
+            return jsonify({"error": "limit must be an integer"}), 400
+        try:
+            page = query_files_page(q, et, cursor, limit)
+        except ValueError:
+            return jsonify({"error": "invalid cursor"}), 400
+        return jsonify(page)
     except Exception as e:
         current_app.logger.exception("list_files error")
         return jsonify({"error": "internal error", "detail": str(e)}), 500
 
 
+@files_bp.route("", methods=["POST"])
+@login_required
+def upload_file():
+    """
+    Upload a marks file (multipart form): file, exam_type (mid1/mid2/semester),
+    optional file_name and note. The content goes to the blob store.
+    """
+    up = request.files.get("file")
+    exam_type = (request.form.get("exam_type") or "").strip()
+    if not up or not up.filename:
+        return jsonify({"error": "file required"}), 400
+    if exam_type not in ("mid1", "mid2", "semester"):
+        return jsonify({"error": "exam_type must be one of mid1, mid2, semester"}), 400
+
+    original = os.path.basename(up.filename)
+    try:
+        content_hash, blob_path, size = store_upload(up.stream, original)
+        f = UploadedFile(
+            file_name=(request.form.get("file_name") or original).strip(),
+            original_file_name=original,
+            exam_type=exam_type,
+            uploaded_by=current_user.id,
+            note=request.form.get("note"),
+            content_hash=content_hash,
+            blob_path=blob_path,
+            size=size
+        )
+        db.session.add(f)
+        db.session.commit()
+        invalidate_file_counts()
+        return jsonify({"success": True, "id": f.id, "content_hash": content_hash}), 201
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.exception("upload failed")
+        return jsonify({"error": "upload failed", "detail": str(e)}), 500
+
+
 @files_bp.route("/<int:file_id>/preview", methods=["GET"])
 def preview_file(file_id):
     """
@@ -117,57 +340,34 @@ def preview_file(file_id):
     if not path:
         return jsonify({"error": "file not found on disk", "checked_dir": get_uploads_dir()}), 404
 
-    ext = os.path.splitext(path)[1].lower()
+    ext = upload_ext(f, path)
     meta = {
         "file_name": f.file_name,
         "original_file_name": f.original_file_name,
         "exam_type": f.exam_type,
         "uploaded_on": f.uploaded_on.isoformat() if f.uploaded_on else None,
-        "size": os.path.getsize(path)
+        "size": f.size if f.size is not None else os.path.getsize(path)
     }
 
-    try:
-        if ext == ".csv":
-            with open(path, newline="", encoding="utf-8", errors="replace") as fh:
-                # sniff (best-effort)
-                sample = fh.read(4096)
-                fh.seek(0)
-                try:
-                    dialect = csv.Sniffer().sniff(sample) if sample else csv.excel
-                except Exception:
-                    dialect = csv.excel
-                reader = csv.reader(fh, dialect)
-                rows = []
-                for i, row in enumerate(reader):
-                    rows.append(row)
-                    if i >= 10:
-                        break
-                columns = rows[0] if rows else []
-                sample_rows = rows[1:6] if len(rows) > 1 else []
-            return jsonify({"meta": meta, "columns": columns, "sample_rows": sample_rows})
-
-        elif ext in (".xls", ".xlsx"):
-            if not HAVE_OPENPYXL:
-                return jsonify({"meta": meta, "error": "Excel preview requires 'openpyxl' package. Install with: pip install openpyxl"}), 200
-            wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
-            ws = wb.active
-            rows = []
-            for i, row in enumerate(ws.iter_rows(values_only=True)):
-                rows.append([("" if v is None else str(v)) for v in row])
-                if i >= 10:
-                    break
-            columns = rows[0] if rows else []
-            sample_rows = rows[1:6] if len(rows) > 1 else []
-            return jsonify({"meta": meta, "columns": columns, "sample_rows": sample_rows})
-
-        else:
-            # unsupported type — return meta only
-            return jsonify({"meta": meta, "error": f"Preview not supported for '{ext}'"}), 200
+    if ext in (".xls", ".xlsx") and not HAVE_OPENPYXL:
+        return jsonify({"meta": meta, "error": "Excel preview requires 'openpyxl' package. Install with: pip install openpyxl"}), 200
 
+    try:
+        preview = get_preview(f, path)
+    except PreviewError as e:
+        # unsupported type — return meta only
+        return jsonify({"meta": meta, "error": str(e)}), 200
     except Exception as e:
         current_app.logger.exception("preview failed")
         return jsonify({"meta": meta, "error": "preview failed", "detail": str(e)}), 500
 
+    meta.update({
+        "row_count": preview.row_count,
+        "encoding": preview.encoding,
+        "delimiter": preview.delimiter
+    })
+    return jsonify({"meta": meta, "columns": preview.columns, "sample_rows": (preview.rows or [])[:5]})
+
 
 @files_bp.route("/<int:file_id>/download", methods=["GET"])
 def download_file(file_id):
@@ -180,12 +380,82 @@ def download_file(file_id):
         return jsonify({"error": "file not found on disk"}), 404
 
     try:
-        return send_file(path, as_attachment=True, download_name=(f.original_file_name or f.file_name))
+        download_name = f.original_file_name or f.file_name
+        etag = ensure_content_hash(f, path)
+        last_modified = datetime.fromtimestamp(os.path.getmtime(path), tz=timezone.utc)
+
+        if blob_encoding(path) != "identity":
+            return _compressed_blob_response(path, download_name, etag, last_modified)
+
+        if current_app.config.get("SENDFILE_MODE") == "x-accel":
+            rv = _accel_redirect_response(path, download_name, etag, last_modified)
+            if rv is not None:
+                return rv
+            current_app.logger.warning("x-accel: no internal location maps onto %s; serving it directly "
+                                       "(set SENDFILE_BLOB_ACCEL_PREFIX for a BLOB_FOLDER outside UPLOAD_FOLDER)", path)
+
+        # conditional=True handles If-None-Match / If-Modified-Since / Range / If-Range;
+        # with USE_X_SENDFILE the body is handed to the proxy via X-Sendfile
+        return send_file(
+            path,
+            as_attachment=True,
+            download_name=download_name,
+            conditional=True,
+            etag=etag,
+            last_modified=last_modified
+        )
     except Exception as e:
         current_app.logger.exception("download failed")
         return jsonify({"error": "download failed", "detail": str(e)}), 500
 
 
+@files_bp.route("/<int:file_id>/rows", methods=["GET"])
+def file_rows(file_id):
+    """
+    Paginated rows of an uploaded file: query params offset (data row, 0-based), limit.
+    Returns { columns, offset, limit, total, rows, next_offset }.
+    """
+    f = UploadedFile.query.get(file_id)
+    if not f:
+        return jsonify({"error": "file not found"}), 404
+
+    path = find_file_on_disk(f)
+    if not path:
+        return jsonify({"error": "file not found on disk", "checked_dir": get_uploads_dir()}), 404
+
+    try:
+        offset = max(int(request.args.get("offset") or 0), 0)
+        limit = int(request.args.get("limit") or 100)
+    except ValueError:
+        return jsonify({"error": "offset and limit must be integers"}), 400
+    limit = min(max(limit, 1), current_app.config.get("ROWS_PAGE_MAX", 1000))
+
+    ext = upload_ext(f, path)
+    if ext in (".xls", ".xlsx") and not HAVE_OPENPYXL:
+        return jsonify({"error": "Excel preview requires 'openpyxl' package. Install with: pip install openpyxl"}), 200
+    if ext not in (".csv", ".xls", ".xlsx"):
+        return jsonify({"error": f"Preview not supported for '{ext}'"}), 200
+
+    try:
+        columns = get_preview(f, path).columns
+        store = open_row_store(f, path)
+        total = len(store)
+        rows = store.page(offset, limit)
+    except Exception as e:
+        current_app.logger.exception("file_rows failed")
+        return jsonify({"error": "reading rows failed", "detail": str(e)}), 500
+
+    next_offset = offset + len(rows)
+    return jsonify({
+        "columns": columns,
+        "offset": offset,
+        "limit": limit,
+        "total": total,
+        "rows": rows,
+        "next_offset": next_offset if next_offset < total else None
+    })
+
+
 @files_bp.route("/<int:file_id>", methods=["DELETE"])
 def delete_file(file_id):
     f = UploadedFile.query.get(file_id)
@@ -194,12 +464,21 @@ def delete_file(file_id):
 
     remove_file = str(request.args.get("remove_file", "false")).lower() in ("1", "true", "yes")
     try:
-        if remove_file:
-            path = find_file_on_disk(f)
-            if path and os.path.exists(path):
-                os.remove(path)
+        path = find_file_on_disk(f) if remove_file else None
+        blob_path = f.blob_path
         db.session.delete(f)
         db.session.commit()
+        invalidate_file_counts()
+        discard_row_store(file_id)
+        # only once the row is gone: a blob may be shared by byte-identical uploads, including
+        # one committed since this request started, so keep it while any row still uses it
+        if path and not (blob_path and UploadedFile.query.filter(UploadedFile.blob_path == blob_path).count()):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                current_app.logger.exception("could not remove %s of deleted file %s", path, file_id)
         return jsonify({"success": True, "deleted_id": file_id})
     except Exception as e:
         db.session.rollback()
@@ -220,40 +499,27 @@ def view_file(file_id):
     if not path:
         return f"File not found on disk ({get_uploads_dir()})", 404
 
-    ext = os.path.splitext(path)[1].lower()
-    rows = []
+    ext = upload_ext(f, path)
+    if ext in (".xls", ".xlsx") and not HAVE_OPENPYXL:
+        return "Excel preview requires openpyxl. Install with: pip install openpyxl", 500
     try:
-        if ext == ".csv":
-            with open(path, newline="", encoding="utf-8", errors="replace") as fh:
-                reader = csv.reader(fh)
-                for i, row in enumerate(reader):
-                    rows.append([("" if v is None else str(v)) for v in row])
-                    if i > 50:  # limit for preview
-                        break
-        elif ext in (".xls", ".xlsx"):
-            if not HAVE_OPENPYXL:
-                return "Excel preview requires openpyxl. Install with: pip install openpyxl", 500
-            wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
-            ws = wb.active
-            for i, row in enumerate(ws.iter_rows(values_only=True)):
-                rows.append([("" if v is None else str(v)) for v in row])
-                if i > 50:
-                    break
-        else:
-            return f"Preview not supported for {ext}", 400
+        preview = get_preview(f, path)
+    except PreviewError:
+        return f"Preview not supported for {ext}", 400
     except Exception as e:
         current_app.logger.exception("view_file failed")
         return f"Error parsing file: {e}", 500
 
-    if not rows:
+    if not preview.columns:
         return "No data in file", 200
 
-    columns = rows[0]
-    sample_rows = rows[1:]
+    columns = preview.columns
+    sample_rows = preview.rows or []
 
     return render_template(
         "file_view.html",
         file=f,
         columns=columns,
-        rows=sample_rows
+        rows=sample_rows,
+        total_rows=preview.row_count
     )
@@ -0,0 +1,23 @@
+# app/auth/decorators.py
+from functools import wraps
+
+from flask import jsonify
+from flask_login import current_user
+
+from app.auth.user_cache import current_role
+
+
+def admin_required(view):
+    """
+    Allow only logged-in users with role 'admin' (JSON 401/403 otherwise).
+    The role is read from the database, not the cached session user, so a
+    demotion made by another worker applies at once.
+    """
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        if not current_user.is_authenticated:
+            return jsonify({"error": "login required"}), 401
+        if getattr(current_user, "role", None) != "admin" or current_role(current_user.id) != "admin":
+            return jsonify({"error": "admin only"}), 403
+        return view(*args, **kwargs)
+    return wrapped
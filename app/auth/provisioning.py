@@ -0,0 +1,105 @@
+# app/auth/provisioning.py
+"""
+Bulk account provisioning from a CSV of users (username,password[,role]).
+
+Password hashing is Werkzeug's deliberately slow KDF, so it is spread over a
+process pool (spawned, like the report card renderers, so a web worker is
+never forked with its connections and threads; USER_IMPORT_WORKERS caps it
+for uploads through the admin endpoint); username clashes are found with a single IN query and all new
+rows are inserted in one transaction.
+"""
+import io
+import os
+import csv
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+
+from app import db
+from app.metrics import record_import
+from app.models import User
+
+VALID_ROLES = ("admin", "faculty")
+
+# below this many passwords a process pool costs more than it saves
+POOL_THRESHOLD = 8
+
+
+def read_users_csv(stream, default_role: str = "faculty") -> List[Dict[str, str]]:
+    """Parse a users CSV (header required: username, password, optional role)."""
+    if isinstance(stream, (bytes, bytearray)):
+        stream = io.StringIO(stream.decode("utf-8-sig"))
+    rows = []
+    for raw in csv.DictReader(stream):
+        row = {(k or "").strip().lower(): (v or "").strip() for k, v in raw.items()}
+        rows.append({
+            "username": row.get("username", ""),
+            "password": row.get("password", ""),
+            "role": (row.get("role") or default_role).lower()
+        })
+    return rows
+
+
+def hash_passwords(passwords: List[str], workers: Optional[int] = None) -> List[str]:
+    """generate_password_hash over `workers` processes (default: all cores), order preserved."""
+    if len(passwords) < POOL_THRESHOLD or workers == 1:
+        return [generate_password_hash(p) for p in passwords]
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(passwords) // (workers * 4))
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        return list(pool.map(generate_password_hash, passwords, chunksize=chunksize))
+
+
+def provision_users(rows: Iterable[Dict[str, str]], workers: Optional[int] = None) -> Dict:
+    """
+    Create every valid, non-clashing user in `rows` in one transaction.
+    Returns {"created": [...], "existing": [...], "invalid": [{"row", "username", "error"}]}.
+    """
+    started = time.perf_counter()
+    valid, invalid, seen = [], [], set()
+    for i, row in enumerate(rows, start=1):
+        username, password, role = row.get("username"), row.get("password"), row.get("role")
+        error = None
+        if not username or not password:
+            error = "username and password required"
+        elif role not in VALID_ROLES:
+            error = f"role must be one of {', '.join(VALID_ROLES)}"
+        elif username in seen:
+            error = "duplicate username in file"
+        if error:
+            invalid.append({"row": i, "username": username, "error": error})
+            continue
+        seen.add(username)
+        valid.append(row)
+
+    existing = set()
+    if valid:
+        existing = {
+            name for (name,) in
+            db.session.query(User.username).filter(User.username.in_([r["username"] for r in valid]))
+        }
+    new_rows = [r for r in valid if r["username"] not in existing]
+
+    hashes = hash_passwords([r["password"] for r in new_rows], workers)
+    try:
+        if new_rows:
+            db.session.execute(insert(User), [
+                {"username": r["username"], "password_hash": h, "role": r["role"]}
+                for r, h in zip(new_rows, hashes)
+            ])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    record_import("users", len(valid) + len(invalid), time.perf_counter() - started)
+
+    return {
+        "created": [r["username"] for r in new_rows],
+        "existing": sorted(existing),
+        "invalid": invalid
+    }
@@ -1,7 +1,9 @@
 # app/auth/routes.py
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app
 from app import db
 from app.models import User
+from app.auth.decorators import admin_required
+from app.auth.provisioning import read_users_csv, provision_users
 from flask_login import login_user, logout_user, login_required, current_user
 
 auth_bp = Blueprint(
@@ -55,3 +57,24 @@ def register():
         flash('Registration successful. Please login.', 'success')
         return redirect(url_for('auth.login'))
     return render_template('register.html')
+
+
+@auth_bp.route('/admin/users/import', methods=['POST'])
+@admin_required
+def import_users():
+    """Bulk-create accounts from an uploaded CSV (username,password[,role]); form field 'file'."""
+    up = request.files.get('file')
+    if not up:
+        return jsonify({"error": "file required"}), 400
+    default_role = (request.form.get('role') or 'faculty').lower()
+    try:
+        rows = read_users_csv(up.read(), default_role=default_role)
+        result = provision_users(rows, workers=current_app.config.get("USER_IMPORT_WORKERS", 1))
+    except Exception as e:
+        current_app.logger.exception("user import failed")
+        return jsonify({"error": "import failed", "detail": str(e)}), 500
+    return jsonify({
+        "created": len(result["created"]),
+        "existing": result["existing"],
+        "invalid": result["invalid"]
+    })
@@ -0,0 +1,87 @@
+# app/auth/user_cache.py
+"""
+Flask-Login user loader backed by a bounded TTL cache.
+
+The cache holds detached SessionUser snapshots (id, username, role), so an
+authenticated request no longer costs a SELECT on users. Entries are dropped
+when a User row is updated or deleted, and once more after the commit.
+
+That invalidation only reaches the process making the change: other workers
+keep serving the old snapshot until it expires, so USER_CACHE_TTL (default 5
+seconds) is how long a demoted or deleted user may still pass there.
+admin_required does not rely on the snapshot at all and reads the role with
+current_role().
+"""
+from typing import Optional
+
+from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+
+from app import db
+from app.cache import TTLCache
+from app.models import User
+
+user_cache = TTLCache("users", maxsize=2048, ttl=5)
+
+
+class SessionUser(UserMixin):
+    """Read-only snapshot of a User row, safe to share between requests and threads."""
+
+    __slots__ = ("id", "username", "role")
+
+    def __init__(self, id: int, username: str, role: str):
+        self.id = id
+        self.username = username
+        self.role = role
+
+    def __repr__(self):
+        return f"<SessionUser {self.id} {self.username} ({self.role})>"
+
+
+def configure_user_cache(app) -> None:
+    user_cache.maxsize = app.config.get("USER_CACHE_SIZE", user_cache.maxsize)
+    user_cache.ttl = app.config.get("USER_CACHE_TTL", user_cache.ttl)
+
+
+def load_cached_user(user_id: int) -> Optional[SessionUser]:
+    user = user_cache.get(user_id)
+    if user is None:
+        row = db.session.query(User.id, User.username, User.role).filter(User.id == user_id).first()
+        if row is None:
+            return None
+        user = SessionUser(row.id, row.username, row.role)
+        user_cache.set(user_id, user)
+    return user
+
+
+def current_role(user_id: int) -> Optional[str]:
+    """The role as committed now, bypassing the cache (None for a deleted user)."""
+    return db.session.query(User.role).filter(User.id == user_id).scalar()
+
+
+# ---------------------------
+# Invalidation
+# ---------------------------
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_changed(mapper, connection, target):
+    user_cache.pop(target.id)
+    # another request may re-cache the old row before our commit lands; drop it again afterwards
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("changed_user_ids", set()).add(target.id)
+
+
+@event.listens_for(db.session, "after_commit")
+def _drop_committed_users(session):
+    for user_id in session.info.pop("changed_user_ids", ()):
+        user_cache.pop(user_id)
+
+
+@event.listens_for(db.session, "after_bulk_update")
+@event.listens_for(db.session, "after_bulk_delete")
+def _bulk_user_change(context):
+    mapper = getattr(context, "mapper", None)
+    if mapper is None or mapper.class_ is User:
+        user_cache.clear()
@@ -0,0 +1,240 @@
+# app/changes.py
+"""
+Delta sync for mirrors of the marks / students / subjects tables.
+
+    GET /api/results/changes[?since=2026-10-01T00:00:00Z][&limit=1000]
+    GET /api/results/changes?cursor=<next_cursor>
+
+A sync covers rows changed in (since, until], where until is fixed when the
+sync starts (now minus CHANGES_SAFETY_LAG). It walks four keyset-paginated streams in
+turn, each on its own index:
+
+    tombstones  (deleted_on, id)    {"type": ..., "op": "delete", "key": ...}
+    subjects    (updated_on, sub_code)
+    students    (updated_on, id)    {"type": ..., "op": "upsert", "key": ..., "row": {...}}
+    marks       (updated_on, id)
+
+Deletions come first, so a row deleted and created again under the same key
+ends up present. Pages are followed with next_cursor until it is null; the
+next sync then starts from `until`. A `since` older than
+CHANGES_TOMBSTONE_DAYS is answered 410: deletions that old are pruned
+(`flask data prune-tombstones`), so the mirror must reload everything.
+
+Tombstones are written by ORM after_delete hooks in the deleting transaction;
+bulk DELETE statements bypass them (the app issues none for these tables).
+
+Commit-time stamps: a row's updated_on / deleted_on is set when it is written,
+which may be long before its transaction commits (an import, a weight
+recompute), and a sync whose until passed that stamp in the meantime would
+never see the row. So every transaction re-stamps the rows it wrote just
+before it commits: ORM flushes are tracked by a hook, bulk statements report
+their keys with touch(). A row is then skipped only if the re-stamp UPDATE
+plus COMMIT take longer than CHANGES_SAFETY_LAG, or if it is written outside
+db.session (raw SQL, another program), where it keeps its write-time stamp.
+"""
+import json
+import base64
+from datetime import datetime, timedelta, timezone
+from itertools import chain
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, event, insert, or_, select, update
+from sqlalchemy.orm import object_session
+
+from app import db
+from app.models import Mark, Student, Subject, Tombstone
+
+DEFAULT_LIMIT = 1000
+MAX_LIMIT = 10000
+
+# stream name -> (model, key column, time column); walked in this order
+STREAMS = {
+    "tombstone": (Tombstone, Tombstone.id, Tombstone.deleted_on),
+    "subject": (Subject, Subject.sub_code, Subject.updated_on),
+    "student": (Student, Student.id, Student.updated_on),
+    "mark": (Mark, Mark.id, Mark.updated_on),
+}
+ORDER = tuple(STREAMS)
+_STREAM_OF = {model: name for name, (model, _, _) in STREAMS.items()}
+ENTITIES = {Subject: "subject", Student: "student", Mark: "mark"}
+TOUCHED = "changes_touched"   # session.info key: {(model, key column name): {keys}}
+STAMP_CHUNK = 500
+
+
+class SyncExpired(Exception):
+    """`since` is older than the retained tombstones."""
+
+
+# ---------------------------
+# Tombstones
+# ---------------------------
+def _record_delete(mapper, connection, target):
+    key = mapper.primary_key_from_instance(target)[0]
+    result = connection.execute(insert(Tombstone).values(entity=ENTITIES[mapper.class_], key=str(key),
+                                                         deleted_on=datetime.utcnow()))
+    session = object_session(target)
+    if session is not None:
+        touch(session, Tombstone, result.inserted_primary_key)
+
+
+for _model in ENTITIES:
+    event.listen(_model, "after_delete", _record_delete)
+
+
+def prune_tombstones(days: float) -> int:
+    """Delete tombstones older than `days`; returns how many."""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    n = db.session.execute(delete(Tombstone).where(Tombstone.deleted_on < cutoff)).rowcount
+    db.session.commit()
+    return n
+
+
+# ---------------------------
+# Commit-time stamps
+# ---------------------------
+def touch(session, model, keys, column=None) -> None:
+    """
+    Re-stamp rows of `model` when `session` commits, by primary key or by the
+    unique `column` (e.g. Student.pin for freshly inserted students). For
+    bulk INSERT / UPDATE statements, which bypass the flush hook.
+    """
+    name = (column if column is not None else STREAMS[_STREAM_OF[model]][1]).key
+    session.info.setdefault(TOUCHED, {}).setdefault((model, name), set()).update(keys)
+
+
+@event.listens_for(db.session, "after_flush")
+def _track_flush(session, flush_context):
+    for obj in chain(session.new, session.dirty):
+        if type(obj) in ENTITIES and (obj in session.new or session.is_modified(obj, include_collections=False)):
+            key_col = STREAMS[ENTITIES[type(obj)]][1]
+            touch(session, type(obj), [getattr(obj, key_col.key)])
+
+
+@event.listens_for(db.session, "before_commit")
+def _restamp(session):
+    session.flush()   # pending ORM changes reach _track_flush first
+    touched = session.info.pop(TOUCHED, None)
+    if not touched:
+        return
+    now = datetime.utcnow()
+    for (model, name), keys in touched.items():
+        table = model.__table__
+        stamp = STREAMS[_STREAM_OF[model]][2].key
+        keys = sorted(keys)
+        for i in range(0, len(keys), STAMP_CHUNK):
+            session.execute(update(table).where(table.c[name].in_(keys[i:i + STAMP_CHUNK])).values({stamp: now}))
+
+
+@event.listens_for(db.session, "after_rollback")
+def _forget(session):
+    session.info.pop(TOUCHED, None)
+
+
+# ---------------------------
+# Cursors
+# ---------------------------
+def parse_since(value: str) -> datetime:
+    """ISO 8601 timestamp as naive UTC (the columns' convention); raises ValueError."""
+    ts = datetime.fromisoformat(value.strip())
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+def _iso(ts: Optional[datetime]) -> Optional[str]:
+    return ts.isoformat() + "Z" if ts else None
+
+
+def encode_cursor(state: Dict) -> str:
+    raw = json.dumps(state, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict:
+    """Inverse of encode_cursor; raises ValueError on garbage."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        if state["stream"] not in STREAMS:
+            raise ValueError("unknown stream")
+        for k in ("since", "until", "after"):
+            if state.get(k):
+                datetime.fromisoformat(state[k])
+    except (KeyError, TypeError, AttributeError, json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise ValueError(str(e))
+    return state
+
+
+# ---------------------------
+# Pages
+# ---------------------------
+def _change(stream: str, row) -> dict:
+    model, key_col, time_col = STREAMS[stream]
+    if stream == "tombstone":
+        key = int(row.key) if row.entity != "subject" else row.key
+        return {"type": row.entity, "op": "delete", "key": key, "at": _iso(row.deleted_on)}
+    data = {c.name: getattr(row, c.name) for c in model.__table__.columns}
+    data["updated_on"] = _iso(row.updated_on)
+    return {"type": stream, "op": "upsert", "key": getattr(row, key_col.key), "at": data["updated_on"],
+            "row": data}
+
+
+def _read(stream: str, since: Optional[datetime], until: datetime, after: Optional[Tuple[datetime, object]],
+          limit: int) -> List:
+    """Up to `limit` rows of one stream in (since, until], after the (time, key) position `after`."""
+    model, key_col, time_col = STREAMS[stream]
+    query = select(model).where(time_col <= until)
+    if since is not None:
+        query = query.where(time_col > since)
+    if after is not None:
+        ts, key = after
+        query = query.where(or_(time_col > ts, and_(time_col == ts, key_col > key)))
+    return db.session.execute(query.order_by(time_col, key_col).limit(limit)).scalars().all()
+
+
+def changes_page(since: Optional[datetime] = None, cursor: Optional[str] = None, limit: int = DEFAULT_LIMIT,
+                 safety_lag: float = 5.0, retention_days: Optional[float] = None) -> Dict:
+    """
+    One page of a sync: a new one from `since`, or the continuation `cursor`.
+    Raises ValueError for an invalid cursor, SyncExpired when `since` predates
+    the tombstones kept.
+    """
+    if cursor:
+        state = decode_cursor(cursor)
+        since = datetime.fromisoformat(state["since"]) if state.get("since") else None
+        until = datetime.fromisoformat(state["until"])
+        stream = state["stream"]
+        after = (datetime.fromisoformat(state["after"]), state["key"]) if state.get("after") else None
+    else:
+        if since is not None and retention_days is not None \
+                and since < datetime.utcnow() - timedelta(days=retention_days):
+            raise SyncExpired()
+        until = datetime.utcnow() - timedelta(seconds=safety_lag)
+        stream, after = ORDER[0], None
+
+    changes, next_state = [], None
+    for name in ORDER[ORDER.index(stream):]:
+        if len(changes) >= limit:
+            next_state = {"stream": name}
+            break
+        rows = _read(name, since, until, after if name == stream else None, limit - len(changes) + 1)
+        more = len(rows) > limit - len(changes)
+        rows = rows[:limit - len(changes)]
+        changes.extend(_change(name, r) for r in rows)
+        if more:
+            _, key_col, time_col = STREAMS[name]
+            last = rows[-1]
+            next_state = {"stream": name, "after": getattr(last, time_col.key).isoformat(),
+                          "key": getattr(last, key_col.key)}
+            break
+
+    next_cursor = None
+    if next_state is not None:
+        next_state.update(since=since.isoformat() if since else None, until=until.isoformat())
+        next_cursor = encode_cursor(next_state)
+    return {
+        "since": _iso(since),
+        "until": _iso(until),
+        "changes": changes,
+        "next_cursor": next_cursor,
+    }
@@ -0,0 +1,237 @@
+# app/cli.py
+"""`flask ...` maintenance commands (registered in create_app)."""
+import os
+import json
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from app import db
+from app.models import Institution, UploadedFile
+
+data_cli = AppGroup("data", help="Catalog and data maintenance.")
+files_cli = AppGroup("files", help="Uploaded file storage maintenance.")
+users_cli = AppGroup("users", help="User account management.")
+
+
+@data_cli.command("seed-institution")
+@click.option("--name", default=None, help="Institution name (default: INSTITUTION_NAME config).")
+def seed_institution(name):
+    """Create the Institution row if there is none yet."""
+    if Institution.query.first() is not None:
+        click.echo("Institution already exists.")
+        return
+    inst = Institution(name=name or current_app.config["INSTITUTION_NAME"])
+    db.session.add(inst)
+    db.session.commit()
+    click.echo(f"Created institution: {inst.name}")
+
+
+@files_cli.command("migrate-storage")
+@click.option("--keep", is_flag=True, help="Leave the original flat files in place.")
+def migrate_storage(keep):
+    """Move legacy flat uploads into the content-addressable blob store."""
+    from app.api.files import find_file_on_disk
+    from app.storage import store_path
+
+    moved, missing, originals = 0, 0, set()
+    for f in UploadedFile.query.filter(UploadedFile.blob_path.is_(None)).order_by(UploadedFile.id).all():
+        path = find_file_on_disk(f)
+        if not path:
+            missing += 1
+            click.echo(f"  missing on disk: #{f.id} {f.original_file_name}")
+            continue
+        content_hash, blob_path, size = store_path(path, f.original_file_name or f.file_name)
+        f.content_hash, f.blob_path, f.size = content_hash, blob_path, size
+        originals.add(path)
+        moved += 1
+    db.session.commit()
+
+    if not keep:
+        for path in originals:
+            os.remove(path)
+    click.echo(f"Moved {moved} uploads into the blob store ({missing} missing on disk).")
+
+
+@users_cli.command("import")
+@click.argument("csv_file", type=click.File("r", encoding="utf-8-sig"))
+@click.option("--role", default="faculty", show_default=True, help="Role for rows without a role column.")
+@click.option("--workers", type=int, default=None, help="Hashing processes (default: all cores).")
+def import_users(csv_file, role, workers):
+    """Create accounts in bulk from a CSV of username,password[,role]."""
+    from app.auth.provisioning import read_users_csv, provision_users
+
+    result = provision_users(read_users_csv(csv_file, default_role=role), workers=workers)
+    for bad in result["invalid"]:
+        click.echo(f"  row {bad['row']} ({bad['username'] or '-'}): {bad['error']}")
+    if result["existing"]:
+        click.echo(f"  skipped {len(result['existing'])} existing usernames")
+    click.echo(f"Created {len(result['created'])} users.")
+
+
+# ---------------------------
+# Catalog / roster
+# ---------------------------
+def _echo_upsert(what, result):
+    for bad in result["invalid"]:
+        click.echo(f"  row {bad['row']}: {bad['error']}")
+    click.echo(f"{what}: {result['inserted']} inserted, {result['updated']} updated, "
+               f"{result['unchanged']} unchanged, {len(result['invalid'])} invalid.")
+
+
+@data_cli.command("import-subjects")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+def import_subjects(path):
+    """Upsert subjects from a CSV/JSON of sub_code,sub_name,branch,year,semester."""
+    from app.data_import import read_records, upsert_subjects
+
+    _echo_upsert("Subjects", upsert_subjects(read_records(path, key="subjects")))
+
+
+@data_cli.command("import-students")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+def import_students(path):
+    """Upsert students from a CSV/JSON of pin,name,branch,exam_year."""
+    from app.data_import import read_records, upsert_students
+
+    _echo_upsert("Students", upsert_students(read_records(path, key="students")))
+
+
+@data_cli.command("subjects-from-preview")
+@click.argument("preview_file", type=click.File("r", encoding="utf-8"), default="preview.json")
+@click.option("--branch", default="CS", show_default=True)
+@click.option("--semester", type=int, default=4, show_default=True, help="Semester of the uploaded sheet.")
+@click.option("--year", type=int, default=None, help="Academic year (default: derived from --semester).")
+def subjects_from_preview_cmd(preview_file, branch, semester, year):
+    """Create placeholder subjects for the unknown subject columns of an import preview."""
+    from app.data_import import subjects_from_preview
+
+    result = subjects_from_preview(json.load(preview_file), branch, semester, year)
+    for code in result["created"]:
+        click.echo(f"  created {code}")
+    click.echo(f"Created {len(result['created'])} subjects ({len(result['existing'])} already existed).")
+
+
+@data_cli.command("check")
+def check_data():
+    """Report counts and integrity problems in the marks data; exits 1 if any are found."""
+    from app.data_import import integrity_report
+
+    report = integrity_report()
+    click.echo("  ".join(f"{k}={v}" for k, v in report["counts"].items()))
+    # marks referencing missing rows, bad component values, etc. are errors;
+    # unused subjects / students are only worth a mention
+    errors = {k: v for k, v in report["problems"].items() if v and not k.endswith("_without_marks")}
+    for k, v in report["problems"].items():
+        if v:
+            click.echo(f"  {k}: {v}")
+    if errors:
+        raise SystemExit(1)
+    click.echo("OK")
+
+
+@data_cli.command("seed-demo")
+def seed_demo():
+    """Create one demo subject, student and scored mark row."""
+    from app.models import Mark, Student
+    from app.data_import import upsert_students, upsert_subjects
+    from app.utils import compute_subject_score, map_risk
+
+    upsert_subjects([{"sub_code": "CS-401", "sub_name": "Maths IV", "branch": "CS", "year": 2, "semester": 4}])
+    upsert_students([{"pin": "23189-CS-001", "name": "Student-1", "branch": "CS", "exam_year": 2023}])
+    st = Student.query.filter_by(pin="23189-CS-001").one()
+
+    mark = Mark.query.filter_by(student_id=st.id, sub_code="CS-401", semester=4).first()
+    if mark is None:
+        mark = Mark(student_id=st.id, sub_code="CS-401", semester=4, year=2024)
+        db.session.add(mark)
+    mark.mid1, mark.mid2, mark.internal, mark.end_sem, mark.attendance = 15, 18, 16, 38, 85.0
+    mark.total = mark.mid1 + mark.mid2 + mark.internal + mark.end_sem
+    mark.subject_score = compute_subject_score({
+        "attendance": mark.attendance, "mid1": mark.mid1, "mid2": mark.mid2,
+        "internal": mark.internal, "end_sem": mark.end_sem,
+    })
+    mark.risk = map_risk(mark.subject_score)
+    db.session.commit()
+    click.echo(f"{st.pin} CS-401: score {mark.subject_score} ({mark.risk} risk)")
+
+
+@data_cli.command("rebuild-summaries")
+def rebuild_summaries_cmd():
+    """Backfill mark scores and recompute semester / cumulative (CGPA) summaries."""
+    from app.summaries import rebuild_summaries
+
+    result = rebuild_summaries()
+    click.echo(f"Scored {result['scored']} marks; {result['semester_rows']} semester rows "
+               f"for {result['students']} students.")
+
+
+@data_cli.command("recompute-scores")
+@click.option("--job", "job_id", type=int, help="re-run this recompute (e.g. one left running by a dead worker)")
+@click.option("--sub-code", "sub_codes", multiple=True, help="queue and run a recompute of these subjects")
+def recompute_scores(job_id, sub_codes):
+    """Run score recomputes inline: pending ones, or --job / --sub-code."""
+    from app.models import ScoreRecompute
+    from app.weights import queue_recompute, run_recompute
+
+    if sub_codes:
+        job = queue_recompute(sub_codes)
+        db.session.commit()
+        ids = [job.id]
+    elif job_id:
+        if db.session.get(ScoreRecompute, job_id) is None:
+            raise click.ClickException(f"no recompute {job_id}")
+        ids = [job_id]
+    else:
+        ids = [j.id for j in ScoreRecompute.query.filter_by(status="pending").order_by(ScoreRecompute.id)]
+    if not ids:
+        click.echo("No pending recomputes.")
+    for i in ids:
+        job = run_recompute(i)
+        click.echo(f"Recompute {job.id}: {job.status}, {job.changed} of {job.processed} marks changed"
+                   + (f" ({job.error})" if job.error else ""))
+
+
+@data_cli.command("report-cards")
+@click.option("--branch", required=True)
+@click.option("--year", type=int, required=True, help="exam year of the batch")
+@click.option("--semester", type=int, help="only this semester (default: all)")
+@click.option("--format", "fmt", type=click.Choice(["html", "pdf"]), default="html")
+@click.option("--workers", type=int, help="render processes (default: REPORT_CARD_WORKERS)")
+@click.option("--out", required=True, type=click.Path(dir_okay=False, writable=True), help="ZIP file to write")
+def report_cards(branch, year, semester, fmt, workers, out):
+    """Write the report cards of a batch into a ZIP file."""
+    from app.report_cards import pdf_available, stream_report_cards
+
+    if fmt == "pdf" and not pdf_available():
+        raise click.ClickException("PDF report cards need WeasyPrint installed; use --format html")
+    cfg = current_app.config
+    counts = {}
+    with open(out, "wb") as fh:
+        for chunk in stream_report_cards(branch, year, semester, fmt,
+                                         workers or cfg["REPORT_CARD_WORKERS"], cfg["REPORT_CARD_BATCH"], counts):
+            fh.write(chunk)
+    click.echo(f"{counts.get('cards', 0)} report cards -> {out}")
+
+
+@data_cli.command("prune-tombstones")
+@click.option("--days", type=float, help="keep this many days (default: CHANGES_TOMBSTONE_DAYS)")
+def prune_tombstones_cmd(days):
+    """Forget deletions older than the delta-sync retention (run nightly)."""
+    from app.changes import prune_tombstones
+
+    days = days if days is not None else current_app.config["CHANGES_TOMBSTONE_DAYS"]
+    click.echo(f"Pruned {prune_tombstones(days)} tombstones older than {days:g} days.")
+
+
+@data_cli.command("snapshot-risk")
+@click.option("--date", "day", type=click.DateTime(formats=["%Y-%m-%d"]), default=None,
+              help="Snapshot date (default: today). Re-running a date replaces it.")
+def snapshot_risk(day):
+    """Record today's early-warning risk of every active cohort (run nightly)."""
+    from app.risk_snapshots import take_snapshot
+
+    result = take_snapshot(day.date() if day else None, current_app.config["RISK_ACTIVE_YEARS"])
+    click.echo(f"Snapshot {result['date']}: {result['students']} students, {result['worse']} moved to a "
+               f"worse risk band since {result['previous'] or 'no previous snapshot'}.")
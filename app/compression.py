@@ -0,0 +1,77 @@
+# app/compression.py
+"""
+Response compression, negotiated from Accept-Encoding.
+
+A response is compressed when all of these hold:
+  * the client accepts br (with the `brotli` package installed) or gzip,
+  * it is a 2xx (not 204 / 206) whose mimetype is in COMPRESS_MIMETYPES,
+  * its body is in memory and at least COMPRESS_MIN_SIZE bytes long,
+  * it is not already encoded (blobs served with Content-Encoding, see
+    app/api/files.py), not an attachment (downloads) and not streamed or
+    passed straight through (send_file, exports, report cards, SSE).
+
+Brotli is preferred when the client accepts it as readily as gzip. Responses
+that could have been compressed carry `Vary: Accept-Encoding` whichever way
+the negotiation went, and an ETag is suffixed with the encoding so caches do
+not mix the representations.
+"""
+import gzip
+import importlib.util
+
+from flask import request
+
+HAVE_BROTLI = importlib.util.find_spec("brotli") is not None
+
+DEFAULT_MIMETYPES = ("application/json", "text/html", "text/plain", "text/csv", "text/css",
+                     "application/javascript", "text/javascript", "image/svg+xml")
+
+
+def available_encodings():
+    """Encodings this process can produce, in order of preference."""
+    return ("br", "gzip") if HAVE_BROTLI else ("gzip",)
+
+
+def compress(data: bytes, encoding: str, level: int) -> bytes:
+    if encoding == "br":
+        import brotli
+        return brotli.compress(data, quality=level)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def _compressible(response, mimetypes, min_size: int) -> bool:
+    if not 200 <= response.status_code < 300 or response.status_code in (204, 206):
+        return False
+    if response.direct_passthrough or response.is_streamed:
+        return False
+    if response.mimetype not in mimetypes or "Content-Encoding" in response.headers:
+        return False
+    if response.headers.get("Content-Disposition", "").lower().startswith("attachment"):
+        return False
+    length = response.calculate_content_length()
+    return length is not None and length >= min_size
+
+
+def init_compression(app) -> None:
+    if not app.config.get("COMPRESS_ENABLED", True):
+        return
+    min_size = int(app.config.get("COMPRESS_MIN_SIZE", 1024))
+    mimetypes = frozenset(app.config.get("COMPRESS_MIMETYPES") or DEFAULT_MIMETYPES)
+    gzip_level = int(app.config.get("COMPRESS_LEVEL", 6))
+    br_level = int(app.config.get("COMPRESS_BR_LEVEL", 4))
+    offered = available_encodings()
+
+    @app.after_request
+    def _compress_response(response):
+        if request.method == "HEAD" or not _compressible(response, mimetypes, min_size):
+            return response
+        response.vary.add("Accept-Encoding")
+        encoding = request.accept_encodings.best_match(offered)
+        if not encoding:
+            return response
+
+        response.set_data(compress(response.get_data(), encoding, br_level if encoding == "br" else gzip_level))
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(f"{etag}-{encoding}", weak=weak)
+        return response
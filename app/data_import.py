@@ -0,0 +1,223 @@
+# app/data_import.py
+"""
+Bulk catalog / roster maintenance used by the `flask data` commands.
+
+Every upsert prefetches the existing keys in one query, inserts the new rows
+with one executemany INSERT, updates only rows whose values changed with one
+bulk UPDATE by primary key, and commits once, together with cohort-changed
+events for the batches it touched (app/events.py).
+"""
+import os
+import re
+import csv
+import json
+import time
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import insert, update
+
+from app import db
+from app.changes import touch
+from app.events import publish
+from app.metrics import record_import
+from app.models import Mark, Student, Subject
+
+SUBJECT_FIELDS = ("sub_code", "sub_name", "branch", "year", "semester")
+STUDENT_FIELDS = ("pin", "name", "branch", "exam_year")
+
+# preview columns that are totals / metadata, not subjects
+IGNORED_PREVIEW_PATTERNS = [r'^\s*rubrics', r'^\s*total\s*$', r'^\s*credits', r'^\s*total grade', r'^\s*sgpa',
+                            r'^\s*cgpa', r'^\s*result', r'^\s*grade', r'^\s*remark']
+
+
+# ---------------------------
+# Reading
+# ---------------------------
+def read_records(path: str, key: Optional[str] = None) -> List[Dict]:
+    """
+    Read a list of dicts from a CSV (header row) or JSON file. JSON may be a list
+    or an object holding the list under `key` (e.g. {"subjects": [...]}).
+    Keys are lower-cased and stripped.
+    """
+    if os.path.splitext(path)[1].lower() == ".json":
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+        if isinstance(data, dict):
+            data = data.get(key, []) if key else next((v for v in data.values() if isinstance(v, list)), [])
+    else:
+        with open(path, newline="", encoding="utf-8-sig") as fh:
+            data = list(csv.DictReader(fh))
+    return [{str(k).strip().lower(): (v.strip() if isinstance(v, str) else v) for k, v in row.items()}
+            for row in data]
+
+
+def _clean(rows: Iterable[Dict], fields, int_fields, key: str):
+    """Split rows into (valid dicts keyed by `key`, invalid [{row, error}]); last duplicate wins."""
+    valid, invalid = {}, []
+    for i, row in enumerate(rows, start=1):
+        try:
+            rec = {f: row.get(f) for f in fields}
+            for f in int_fields:
+                rec[f] = int(rec[f])
+            missing = [f for f in fields if rec[f] in (None, "")]
+            if missing:
+                raise ValueError(f"missing {', '.join(missing)}")
+        except (TypeError, ValueError) as e:
+            invalid.append({"row": i, "error": str(e)})
+            continue
+        valid[rec[key]] = rec
+    return valid, invalid
+
+
+def _upsert(model, pk, key_col, fields, records: Dict[str, Dict], cohort_of) -> Dict:
+    """
+    Insert new / update changed rows of `model` keyed by `key_col`; one commit.
+    `cohort_of(row)` gives the (branch, exam_year, semester) event of a row.
+    """
+    existing = {}
+    if records:
+        cols = [getattr(model, f) for f in fields]
+        if pk != key_col:
+            cols.append(getattr(model, pk))
+        for row in db.session.query(*cols).filter(getattr(model, key_col).in_(list(records))):
+            existing[getattr(row, key_col)] = row._mapping
+
+    new_rows, changed, cohorts = [], [], set()
+    for k, rec in records.items():
+        old = existing.get(k)
+        if old is None:
+            new_rows.append(rec)
+        elif any(old[f] != rec[f] for f in fields):
+            changed.append(dict(rec, **{pk: old[pk]}))
+            cohorts.add(cohort_of(old))
+        else:
+            continue
+        cohorts.add(cohort_of(rec))
+
+    try:
+        if new_rows:
+            db.session.execute(insert(model), new_rows)
+            touch(db.session, model, [r[key_col] for r in new_rows], getattr(model, key_col))
+        if changed:
+            db.session.execute(update(model), changed)
+            touch(db.session, model, [r[pk] for r in changed])
+        publish(db.session, cohorts, "import")
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return {"inserted": len(new_rows), "updated": len(changed), "unchanged": len(records) - len(new_rows) - len(changed)}
+
+
+# ---------------------------
+# Upserts
+# ---------------------------
+def upsert_subjects(rows: Iterable[Dict]) -> Dict:
+    started = time.perf_counter()
+    records, invalid = _clean(rows, SUBJECT_FIELDS, ("year", "semester"), key="sub_code")
+    for rec in records.values():
+        rec["sub_code"] = normalize_code(rec["sub_code"])
+    records = {r["sub_code"]: r for r in records.values()}
+    result = _upsert(Subject, "sub_code", "sub_code", SUBJECT_FIELDS, records,
+                     lambda r: (r["branch"], None, r["semester"]))
+    result["invalid"] = invalid
+    record_import("subjects", len(records) + len(invalid), time.perf_counter() - started)
+    return result
+
+
+def upsert_students(rows: Iterable[Dict]) -> Dict:
+    started = time.perf_counter()
+    records, invalid = _clean(rows, STUDENT_FIELDS, ("exam_year",), key="pin")
+    result = _upsert(Student, "id", "pin", STUDENT_FIELDS, records,
+                     lambda r: (r["branch"], r["exam_year"], None))
+    result["invalid"] = invalid
+    record_import("students", len(records) + len(invalid), time.perf_counter() - started)
+    return result
+
+
+def normalize_code(code) -> str:
+    """Upper-case subject code with inner whitespace collapsed to '-'."""
+    return re.sub(r'\s+', '-', str(code).strip().upper())
+
+
+def is_ignored_preview_column(col) -> bool:
+    lc = str(col).lower()
+    return any(re.search(p, lc) for p in IGNORED_PREVIEW_PATTERNS)
+
+
+def subjects_from_preview(preview: Dict, branch: str, semester: int, year: Optional[int] = None) -> Dict:
+    """
+    Create placeholder subjects (name = code) for the unknown subject columns
+    reported by an import preview (preview.json: summary.unknown_subjects).
+    """
+    unknown = preview.get("summary", {}).get("unknown_subjects", [])
+    codes = {normalize_code(c) for c in unknown if not is_ignored_preview_column(c)}
+    year = year if year is not None else (semester + 1) // 2  # semester -> year (1..3)
+
+    existing = {c for (c,) in db.session.query(Subject.sub_code).filter(Subject.sub_code.in_(codes))} if codes else set()
+    new_codes = sorted(codes - existing)
+    try:
+        if new_codes:
+            db.session.execute(insert(Subject), [
+                {"sub_code": c, "sub_name": c, "branch": branch, "year": year, "semester": semester}
+                for c in new_codes
+            ])
+            touch(db.session, Subject, new_codes)
+            publish(db.session, [(branch, None, semester)], "import")
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return {"created": new_codes, "existing": sorted(existing)}
+
+
+# ---------------------------
+# Integrity checks
+# ---------------------------
+# (component, max) pairs from the scoring model in app.utils.compute_subject_score
+COMPONENT_LIMITS = (("mid1", 20), ("mid2", 20), ("internal", 20), ("end_sem", 40), ("attendance", 100))
+
+
+def integrity_report() -> Dict:
+    """A handful of aggregate queries describing the state of the marks data."""
+    counts = {
+        "subjects": db.session.query(db.func.count(Subject.sub_code)).scalar(),
+        "students": db.session.query(db.func.count(Student.id)).scalar(),
+        "marks": db.session.query(db.func.count(Mark.id)).scalar(),
+    }
+
+    # one pass over marks for all per-row checks
+    checks = [
+        db.func.sum(db.case((Student.id.is_(None), 1), else_=0)).label("orphan_student"),
+        db.func.sum(db.case((Subject.sub_code.is_(None), 1), else_=0)).label("orphan_subject"),
+        db.func.sum(db.case((db.and_(Subject.sub_code.isnot(None), Subject.semester != Mark.semester), 1),
+                            else_=0)).label("semester_mismatch"),
+        db.func.sum(db.case((db.and_(Mark.subject_score.is_(None), db.or_(
+            Mark.mid1.isnot(None), Mark.mid2.isnot(None), Mark.internal.isnot(None), Mark.end_sem.isnot(None)
+        )), 1), else_=0)).label("unscored"),
+    ]
+    for comp, maxv in COMPONENT_LIMITS:
+        col = getattr(Mark, comp)
+        checks.append(db.func.sum(db.case((db.or_(col < 0, col > maxv), 1), else_=0)).label(f"{comp}_out_of_range"))
+    row = (
+        db.session.query(*checks)
+        .select_from(Mark)
+        .outerjoin(Student, Student.id == Mark.student_id)
+        .outerjoin(Subject, Subject.sub_code == Mark.sub_code)
+        .one()
+    )
+    problems = {k: int(v or 0) for k, v in row._mapping.items()}
+
+    problems["subjects_without_marks"] = (
+        db.session.query(db.func.count(Subject.sub_code))
+        .outerjoin(Mark, Mark.sub_code == Subject.sub_code)
+        .filter(Mark.id.is_(None))
+        .scalar()
+    )
+    problems["students_without_marks"] = (
+        db.session.query(db.func.count(Student.id))
+        .outerjoin(Mark, Mark.student_id == Student.id)
+        .filter(Mark.id.is_(None))
+        .scalar()
+    )
+    return {"counts": counts, "problems": problems}
@@ -0,0 +1,287 @@
+# app/events.py
+"""
+Cohort-changed notifications for dashboards, over Server-Sent Events.
+
+    GET /api/results/events[?branch=CS&year=2023]      (text/event-stream)
+
+Events are rows of result_events written in the same transaction as the data
+they describe, so a client never hears about a change before it can read it:
+  * a commit that adds, changes or deletes marks through the ORM ("marks"),
+  * subject / student imports ("import"), score recomputes ("recompute") and
+    summary rebuilds ("rebuild") publish explicitly.
+Each row names a cohort (branch, exam_year, semester); NULL means "all", so a
+(CS, NULL, 4) event concerns every CS batch's semester 4.
+
+Every process has one EventHub. While it has listeners, a thread reads new rows
+every EVENTS_POLL_INTERVAL seconds (one indexed query per process, however
+many dashboards are open) and wakes the streams; commits made by the process
+itself wake it at once. Streams send `event: cohort-changed` with the row as
+JSON data, a comment every EVENTS_KEEPALIVE seconds, and end after
+EVENTS_STREAM_MAX_AGE so long-lived connections do not pin a worker forever;
+EventSource reconnects with Last-Event-ID and is sent what it missed. No
+database connection is held while a stream is open.
+
+Ids are handed out when a row is inserted, not when it commits, so with
+concurrent writers (PostgreSQL) event 41 can become visible after event 42.
+The poller therefore remembers the ids it skipped over and looks for them
+again on every poll for GAP_TIMEOUT seconds (events are inserted right before
+their commit, so a late one shows up within a poll or two; ids of rolled-back
+transactions simply expire). Streams follow the hub's arrival order rather
+than ids, and a reconnect resumes after the Last-Event-ID's position in the
+buffer; only when that event is no longer buffered by the process it lands
+on is the replay read from the database by id, which can miss an event that
+committed late.
+"""
+import json
+import time
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from itertools import chain
+from typing import Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, event, func, insert, or_, select
+from sqlalchemy.orm import attributes
+
+from app import db
+from app.models import Mark, ResultEvent, Student
+
+Cohort = Tuple[Optional[str], Optional[int], Optional[int]]   # (branch, exam_year, semester)
+
+REPLAY_LIMIT = 500       # missed events sent to a reconnecting client
+BUFFER_SIZE = 1000       # recent events kept in memory per process
+GAP_TIMEOUT = 60.0       # seconds a skipped id is looked for again
+GAP_LIMIT = 1000         # skipped ids remembered at most
+
+
+# ---------------------------
+# Publishing
+# ---------------------------
+def publish(session, cohorts: Iterable[Cohort], source: str) -> None:
+    """Queue cohort-changed events in the session's transaction (sent when it commits)."""
+    now = datetime.utcnow()
+    rows = [{"branch": b, "exam_year": y, "semester": s, "source": source, "created_on": now}
+            for b, y, s in set(cohorts)]
+    if rows:
+        session.execute(insert(ResultEvent), rows)
+        session.info["events_published"] = True
+
+
+def publish_students(session, student_ids: Iterable[int], source: str) -> None:
+    """Events for the batches of `student_ids`, all semesters."""
+    ids = sorted(set(student_ids))
+    cohorts = set()
+    for i in range(0, len(ids), 500):
+        cohorts.update((b, y, None) for b, y in session.execute(
+            select(Student.branch, Student.exam_year).where(Student.id.in_(ids[i:i + 500])).distinct()))
+    publish(session, cohorts, source)
+
+
+def _old_value(obj, attr):
+    hist = attributes.get_history(obj, attr)
+    return hist.deleted[0] if hist.deleted else getattr(obj, attr)
+
+
+@event.listens_for(db.session, "after_flush")
+def _collect_changed_marks(session, flush_context):
+    pairs: Set[Tuple[int, int]] = session.info.setdefault("event_pairs", set())
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Mark) and (obj not in session.dirty or session.is_modified(obj)):
+            pairs.add((obj.student_id, obj.semester))
+            pairs.add((_old_value(obj, "student_id"), _old_value(obj, "semester")))
+
+
+@event.listens_for(db.session, "before_commit")
+def _publish_changed_marks(session):
+    session.flush()
+    pairs = session.info.pop("event_pairs", None)
+    if not pairs:
+        return
+    ids = {sid for sid, _ in pairs if sid is not None}
+    batch = dict((sid, (b, y)) for sid, b, y in session.execute(
+        select(Student.id, Student.branch, Student.exam_year).where(Student.id.in_(ids))))
+    publish(session, {batch[sid] + (sem,) for sid, sem in pairs if sid in batch}, "marks")
+
+
+@event.listens_for(db.session, "after_commit")
+def _wake_local_streams(session):
+    if session.info.pop("events_published", False):
+        EventHub.wake()
+
+
+@event.listens_for(db.session, "after_rollback")
+def _forget_events(session):
+    session.info.pop("event_pairs", None)
+    session.info.pop("events_published", None)
+
+
+# ---------------------------
+# Per-process hub
+# ---------------------------
+def _event_json(row) -> dict:
+    return {"id": row.id, "branch": row.branch, "year": row.exam_year, "semester": row.semester,
+            "source": row.source, "at": row.created_on.isoformat(timespec="seconds") + "Z"}
+
+
+def _read_events(after_id: int, limit: int, ids: Iterable[int] = ()) -> List[dict]:
+    """Events after `after_id`, plus those of `ids` (ids skipped earlier), in id order."""
+    E = ResultEvent
+    cond = E.id > after_id
+    ids = sorted(ids)
+    if ids:
+        cond = or_(cond, E.id.in_(ids))
+    rows = db.session.execute(select(E).where(cond).order_by(E.id).limit(limit + len(ids))).scalars().all()
+    return [_event_json(r) for r in rows]
+
+
+class EventHub:
+    """Recent events of this process, fed by one poller thread while anyone listens."""
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, app):
+        self.app = app
+        self.interval = float(app.config.get("EVENTS_POLL_INTERVAL", 1.0))
+        self.retention = timedelta(hours=float(app.config.get("EVENTS_RETENTION_HOURS", 24)))
+        self.cond = threading.Condition()
+        self.buffer = deque(maxlen=BUFFER_SIZE)   # (seq, event) in arrival order
+        self.seq = 0                              # arrival counter of this process
+        self.last_id = None                       # highest event id read
+        self.gaps = {}                            # id skipped over -> when (monotonic)
+        self.listeners = 0
+        self.thread = None
+        self.kick = threading.Event()
+        self.pruned_at = 0.0
+
+    @classmethod
+    def get(cls, app) -> "EventHub":
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(app)
+            return cls._instance
+
+    @classmethod
+    def wake(cls) -> None:
+        if cls._instance is not None:
+            cls._instance.kick.set()
+
+    # -- listeners (request threads) --
+    def subscribe(self, last_event_id: Optional[int]) -> Tuple[int, int, List[dict]]:
+        """
+        Register a stream; returns (cursor, id of the newest event, missed events)
+        with the caller's app context.
+        """
+        with self.cond:
+            self.listeners += 1
+            if self.thread is None or not self.thread.is_alive():
+                # nobody was listening: start from the current head, not from stale history
+                self.last_id = db.session.query(func.coalesce(func.max(ResultEvent.id), 0)).scalar()
+                self.buffer.clear()
+                self.gaps.clear()
+                self.thread = threading.Thread(target=self._poll_loop, name="result-events", daemon=True)
+                self.thread.start()
+            cursor = self.seq
+            head = self.buffer[-1][1]["id"] if self.buffer else self.last_id
+            if last_event_id is None or last_event_id == head:
+                return cursor, head, []
+            # reconnect: what arrived after Last-Event-ID, if this process still buffers it
+            pos = next((seq for seq, e in self.buffer if e["id"] == last_event_id), None)
+            if pos is not None:
+                return cursor, head, [e for seq, e in self.buffer if seq > pos]
+            known, gaps = self.last_id, set(self.gaps)
+        # otherwise replay from the database (at most REPLAY_LIMIT); later ids come through the buffer
+        missed = [e for e in _read_events(last_event_id, REPLAY_LIMIT) if e["id"] <= known and e["id"] not in gaps]
+        return cursor, head, missed
+
+    def unsubscribe(self) -> None:
+        with self.cond:
+            self.listeners -= 1
+
+    def wait(self, cursor: int, timeout: float) -> List[Tuple[int, dict]]:
+        """(seq, event) pairs that arrived after `cursor`, waiting up to `timeout` seconds for some."""
+        with self.cond:
+            events = [item for item in self.buffer if item[0] > cursor]
+            if not events:
+                self.cond.wait(timeout)
+                events = [item for item in self.buffer if item[0] > cursor]
+        return events
+
+    # -- poller thread --
+    def _poll_loop(self) -> None:
+        with self.app.app_context():
+            while True:
+                with self.cond:
+                    if self.listeners <= 0:
+                        self.thread = None
+                        return
+                self.kick.wait(self.interval)
+                self.kick.clear()
+                try:
+                    self._poll_once()
+                except Exception:
+                    self.app.logger.exception("result event poll failed")
+                finally:
+                    db.session.remove()  # no connection held between polls
+
+    def _poll_once(self) -> None:
+        now = time.monotonic()
+        with self.cond:
+            for gap in [g for g, seen in self.gaps.items() if now - seen > GAP_TIMEOUT]:
+                del self.gaps[gap]   # rolled back, or pruned
+            after, gaps = self.last_id, list(self.gaps)
+        events = _read_events(after, BUFFER_SIZE, gaps)
+        if events:
+            with self.cond:
+                for ev in events:
+                    if self.gaps.pop(ev["id"], None) is None:
+                        # a new id: the ones skipped since the last may still commit
+                        self.gaps.update((i, now) for i in range(max(self.last_id + 1, ev["id"] - GAP_LIMIT), ev["id"]))
+                        self.last_id = ev["id"]
+                    self.seq += 1
+                    self.buffer.append((self.seq, ev))
+                while len(self.gaps) > GAP_LIMIT:
+                    del self.gaps[min(self.gaps)]
+                self.cond.notify_all()
+        if time.monotonic() - self.pruned_at > 3600:
+            self.pruned_at = time.monotonic()
+            db.session.execute(delete(ResultEvent).where(ResultEvent.created_on < datetime.utcnow() - self.retention))
+            db.session.commit()
+
+
+# ---------------------------
+# SSE stream
+# ---------------------------
+def _matches(ev: dict, branch: Optional[str], year: Optional[int]) -> bool:
+    return (not branch or ev["branch"] in (None, branch)) and (year is None or ev["year"] in (None, year))
+
+
+def _frame(ev: dict) -> str:
+    return f"id: {ev['id']}\nevent: cohort-changed\ndata: {json.dumps(ev)}\n\n"
+
+
+def event_stream(app, last_event_id: Optional[int], branch: Optional[str], year: Optional[int]):
+    """SSE body: missed events (after Last-Event-ID), then new ones as they are committed."""
+    hub = EventHub.get(app)
+    keepalive = float(app.config.get("EVENTS_KEEPALIVE", 15))
+    max_age = float(app.config.get("EVENTS_STREAM_MAX_AGE", 600))
+
+    with app.app_context():
+        cursor, head, missed = hub.subscribe(last_event_id)
+    try:
+        yield "retry: 3000\n\n"   # reconnect delay (ms)
+        for ev in missed:
+            if _matches(ev, branch, year):
+                yield _frame(ev)
+        yield f"id: {head}\n\n"   # where a resumed stream continues, even if nothing matched
+        deadline = time.monotonic() + max_age
+        while time.monotonic() < deadline:
+            events = hub.wait(cursor, min(keepalive, max(deadline - time.monotonic(), 0.0)))
+            if not events:
+                yield ": keep-alive\n\n"
+                continue
+            for cursor, ev in events:
+                if _matches(ev, branch, year):
+                    yield _frame(ev)
+    finally:
+        hub.unsubscribe()
@@ -1,36 +1,26 @@
 from flask import Blueprint, jsonify, request, send_file
 from app import db
 from app.models import UploadedFile
+from app.api.files import query_files_page, LIST_DEFAULT_LIMIT, LIST_MAX_LIMIT
 import os
 
 files_bp = Blueprint("files", __name__, url_prefix="/api/files")
 
-# List all uploaded files
+# List all uploaded files (same keyset-paginated listing as the API blueprint)
 @files_bp.route("", methods=["GET"])
 def list_files():
     q = (request.args.get("q") or "").strip()
     exam_type = (request.args.get("exam_type") or "").strip()
-    query = UploadedFile.query
-
-    if q:
-        like = f"%{q}%"
-        query = query.filter(UploadedFile.file_name.ilike(like))
-
-    if exam_type:
-        query = query.filter_by(exam_type=exam_type)
-
-    files = query.order_by(UploadedFile.id.desc()).all()
-    items = []
-    for f in files:
-        items.append({
-            "id": f.id,
-            "file_name": f.file_name,
-            "original_file_name": f.original_file_name,
-            "exam_type": f.exam_type,
-            "uploaded_on": f.uploaded_on.isoformat() if f.uploaded_on else None
-        })
-
-    return jsonify({"total": len(items), "items": items})
+    cursor = (request.args.get("cursor") or "").strip() or None
+    try:
+        limit = min(max(int(request.args.get("limit") or LIST_DEFAULT_LIMIT), 1), LIST_MAX_LIMIT)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+
+    try:
+        return jsonify(query_files_page(q, exam_type, cursor, limit))
+    except ValueError:
+        return jsonify({"error": "invalid cursor"}), 400
 
 
 # Download file by ID
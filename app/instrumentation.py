@@ -0,0 +1,153 @@
+# app/instrumentation.py
+"""
+Per-request SQL instrumentation.
+
+SQLAlchemy cursor events count the statements each request runs, their total
+time and the slowest few. Every response gets
+
+    X-Query-Count: 12
+    Server-Timing: db;dur=8.4;desc="12 queries", app;dur=31.0
+
+Requests slower than SLOW_REQUEST_MS are logged as one JSON line
+(event "slow_request"). With NPLUSONE_DETECT on, a request that runs the same
+statement shape more than NPLUSONE_THRESHOLD times logs an "n_plus_one" line.
+"""
+import re
+import json
+import time
+import heapq
+from collections import Counter
+from typing import Optional
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# placeholders of any paramstyle become ?, and IN (?, ?, ?) lists of any length one shape
+_PARAM_RE = re.compile(r"%\(\w+\)s|\$\d+|%s")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WS_RE = re.compile(r"\s+")
+
+_listening = False
+
+
+def statement_shape(statement: str) -> str:
+    """Statement text with parameter placeholders and IN-list lengths normalized."""
+    s = _PARAM_RE.sub("?", statement)
+    s = _IN_LIST_RE.sub("(?...)", s)
+    return _WS_RE.sub(" ", s).strip()
+
+
+class RequestStats:
+    """SQL statistics of one request."""
+
+    __slots__ = ("started", "count", "db_time", "slowest", "shapes", "top_n")
+
+    def __init__(self, top_n: int = 5, track_shapes: bool = False):
+        self.started = time.perf_counter()
+        self.count = 0
+        self.db_time = 0.0
+        self.slowest = []  # min-heap of (seconds, statement)
+        self.shapes: Optional[Counter] = Counter() if track_shapes else None
+        self.top_n = top_n
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.db_time += elapsed
+        if self.top_n:
+            item = (elapsed, statement)
+            if len(self.slowest) < self.top_n:
+                heapq.heappush(self.slowest, item)
+            elif elapsed > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, item)
+        if self.shapes is not None:
+            self.shapes[statement_shape(statement)] += 1
+
+
+def current_stats() -> Optional[RequestStats]:
+    return g.get("sql_stats") if has_request_context() else None
+
+
+# ---------------------------
+# Cursor events (process-wide, every engine)
+# ---------------------------
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._sql_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_sql_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    stats = current_stats()
+    if stats is not None:
+        stats.record(statement, elapsed)
+
+
+def _listen() -> None:
+    global _listening
+    if not _listening:
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        _listening = True
+
+
+# ---------------------------
+# Request hooks
+# ---------------------------
+def init_instrumentation(app) -> None:
+    if not app.config.get("SQL_INSTRUMENTATION", True):
+        return
+    _listen()
+
+    slow_ms = app.config.get("SLOW_REQUEST_MS", 500)
+    top_n = app.config.get("SLOW_QUERY_TOP", 5)
+    detect = app.config.get("NPLUSONE_DETECT", False)
+    threshold = app.config.get("NPLUSONE_THRESHOLD", 10)
+
+    @app.before_request
+    def _start_sql_stats():
+        g.sql_stats = RequestStats(top_n=top_n, track_shapes=detect)
+
+    @app.after_request
+    def _report_sql_stats(response):
+        stats = g.pop("sql_stats", None)
+        if stats is None:
+            return response
+        total_ms = (time.perf_counter() - stats.started) * 1000
+        db_ms = stats.db_time * 1000
+
+        response.headers["X-Query-Count"] = str(stats.count)
+        response.headers["Server-Timing"] = (
+            f'db;dur={db_ms:.1f};desc="{stats.count} queries", app;dur={total_ms:.1f}'
+        )
+
+        if slow_ms is not None and total_ms >= slow_ms:
+            app.logger.warning(json.dumps({
+                "event": "slow_request",
+                "method": request.method,
+                "path": request.path,
+                "endpoint": request.endpoint,
+                "status": response.status_code,
+                "duration_ms": round(total_ms, 1),
+                "queries": stats.count,
+                "db_ms": round(db_ms, 1),
+                "slowest": [{"ms": round(t * 1000, 2), "sql": _WS_RE.sub(" ", s)[:500]}
+                            for t, s in sorted(stats.slowest, reverse=True)],
+            }))
+
+        if stats.shapes:
+            for shape, n in stats.shapes.most_common():
+                if n <= threshold:
+                    break
+                app.logger.warning(json.dumps({
+                    "event": "n_plus_one",
+                    "method": request.method,
+                    "path": request.path,
+                    "endpoint": request.endpoint,
+                    "count": n,
+                    "statement": shape[:500],
+                }))
+        return response
@@ -0,0 +1,87 @@
+# app/json_provider.py
+"""
+JSON provider for jsonify() / app.json, chosen by JSON_PROVIDER:
+
+    "auto" (default)  orjson when it is installed, else Flask's provider
+    "orjson"          orjson (fails at startup if it is missing)
+    "default"         Flask's provider (stdlib json)
+
+OrjsonProvider produces the same documents as Flask's provider: keys sorted
+(sort_keys), datetimes as RFC 822 strings, dates / UUIDs / dataclasses /
+Decimals through Flask's default hook. Differences: non-ASCII text is sent as
+UTF-8 instead of \\u escapes, NaN/Infinity become null (stdlib json emits
+invalid JSON for them), and pretty printing always uses two spaces. Anything
+orjson cannot encode (integers beyond 64 bits, dumps() options it has no
+equivalent for) falls back to the stdlib.
+"""
+import importlib.util
+from typing import Any, Optional
+
+from flask.json.provider import DefaultJSONProvider
+
+HAVE_ORJSON = importlib.util.find_spec("orjson") is not None
+
+PROVIDERS = ("auto", "orjson", "default")
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """DefaultJSONProvider with orjson doing the encoding and decoding."""
+
+    def __init__(self, app):
+        super().__init__(app)
+        import orjson
+        self._orjson = orjson
+
+    def _options(self, sort_keys: bool, indent) -> int:
+        o = self._orjson
+        option = o.OPT_NON_STR_KEYS | o.OPT_PASSTHROUGH_DATETIME  # datetimes: Flask's http_date format
+        if sort_keys:
+            option |= o.OPT_SORT_KEYS
+        if indent:
+            option |= o.OPT_INDENT_2
+        return option
+
+    def _encode(self, obj: Any, kwargs: dict) -> Optional[bytes]:
+        """orjson bytes for `obj`, or None when only the stdlib can honour `kwargs`."""
+        kwargs = dict(kwargs)
+        sort_keys = kwargs.pop("sort_keys", self.sort_keys)
+        indent = kwargs.pop("indent", None)
+        default = kwargs.pop("default", self.default)
+        kwargs.pop("separators", None)   # orjson output is always compact
+        kwargs.pop("ensure_ascii", None)
+        if kwargs:
+            return None
+        try:
+            return self._orjson.dumps(obj, default=default, option=self._options(sort_keys, indent))
+        except TypeError:   # orjson.JSONEncodeError, e.g. an int over 64 bits
+            return None
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        data = self._encode(obj, kwargs)
+        if data is None:
+            return super().dumps(obj, **kwargs)
+        return data.decode("utf-8")
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return self._orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        dump_args = {}
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            dump_args["indent"] = 2
+        data = self._encode(obj, dump_args)
+        if data is None:
+            return super().response(obj)
+        return self._app.response_class(data + b"\n", mimetype=self.mimetype)
+
+
+def init_json_provider(app) -> None:
+    """Install the JSON provider selected by JSON_PROVIDER as app.json."""
+    choice = (app.config.get("JSON_PROVIDER") or "auto").lower()
+    if choice not in PROVIDERS:
+        raise ValueError(f"JSON_PROVIDER must be one of {', '.join(PROVIDERS)}, not {choice!r}")
+    if choice == "orjson" or (choice == "auto" and HAVE_ORJSON):
+        app.json = OrjsonProvider(app)
@@ -0,0 +1,331 @@
+# app/metrics.py
+"""
+Prometheus metrics at GET /metrics (text exposition format 0.0.4).
+
+Counters live in process memory, so recording one is a dict update under a lock.
+With several gunicorn workers, set METRICS_DIR: every process (CLI imports
+included) then writes a snapshot to METRICS_DIR/metrics-<pid>.json (at most
+once per METRICS_FLUSH_INTERVAL, with a timer writing the tail of a burst, when
+it serves /metrics, and at exit once it has served requests), and /metrics sums
+the snapshots of all processes. Counters of exited processes keep counting;
+gauges only come from live ones. Empty METRICS_DIR when deploying.
+
+Exposed:
+  http_requests_total / http_request_duration_seconds   per blueprint, endpoint, method
+  http_requests_in_flight                               per blueprint
+  db_pool_size / db_pool_checked_out / db_pool_overflow
+  cache_hits_total / cache_misses_total / cache_entries / cache_hit_ratio
+  import_jobs_total / import_rows_total / import_duration_seconds_total / import_rows_per_second
+"""
+import os
+import json
+import time
+import atexit
+import threading
+from collections import defaultdict
+from typing import Dict, Tuple
+
+from flask import Response, current_app, g, has_request_context, request
+
+from app.cache import cache_stats
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    "http_requests_total": ("counter", "Finished requests by blueprint, endpoint, method and status."),
+    "http_request_duration_seconds": ("histogram", "Request latency by blueprint, endpoint and method."),
+    "http_requests_in_flight": ("gauge", "Requests currently being handled, by blueprint."),
+    "db_pool_size": ("gauge", "Configured size of the SQLAlchemy connection pool."),
+    "db_pool_checked_out": ("gauge", "Pooled connections currently in use."),
+    "db_pool_overflow": ("gauge", "Connections opened beyond the pool size."),
+    "cache_hits_total": ("counter", "In-process cache hits."),
+    "cache_misses_total": ("counter", "In-process cache misses."),
+    "cache_entries": ("gauge", "Entries held by in-process caches."),
+    "cache_hit_ratio": ("gauge", "hits / (hits + misses) of in-process caches."),
+    "import_jobs_total": ("counter", "Finished bulk import jobs."),
+    "import_rows_total": ("counter", "Rows processed by bulk imports."),
+    "import_duration_seconds_total": ("counter", "Time spent in bulk imports."),
+    "import_rows_per_second": ("gauge", "Average bulk import throughput (rows_total / duration_total)."),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Registry:
+    """In-process metric values. Keys are (metric name, sorted label pairs)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters: Dict[Tuple[str, Labels], float] = defaultdict(float)
+        self.gauges: Dict[Tuple[str, Labels], float] = defaultdict(float)
+        # per-bucket (non-cumulative) counts + [sum, count]
+        self.histograms: Dict[Tuple[str, Labels], list] = {}
+
+    def inc(self, name: str, labels: Labels = (), value: float = 1.0) -> None:
+        with self.lock:
+            self.counters[(name, labels)] += value
+
+    def add_gauge(self, name: str, labels: Labels = (), value: float = 1.0) -> None:
+        with self.lock:
+            self.gauges[(name, labels)] += value
+
+    def observe(self, name: str, labels: Labels, value: float) -> None:
+        i = next((k for k, b in enumerate(LATENCY_BUCKETS) if value <= b), len(LATENCY_BUCKETS))
+        with self.lock:
+            h = self.histograms.get((name, labels))
+            if h is None:
+                h = self.histograms[(name, labels)] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0, 0]
+            h[i] += 1
+            h[-2] += value
+            h[-1] += 1
+
+    def snapshot(self) -> dict:
+        """This process' values, plus the per-process state sampled now (pool, caches)."""
+        with self.lock:
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+            histograms = {k: list(v) for k, v in self.histograms.items()}
+
+        for name, st in cache_stats().items():
+            lbl = (("cache", name),)
+            counters[("cache_hits_total", lbl)] = st["hits"]
+            counters[("cache_misses_total", lbl)] = st["misses"]
+            gauges[("cache_entries", lbl)] = st["size"]
+        gauges.update(_pool_gauges())
+
+        def dump(d):
+            return [[name, [list(p) for p in labels], v] for (name, labels), v in d.items()]
+        return {"pid": os.getpid(), "counters": dump(counters), "gauges": dump(gauges), "histograms": dump(histograms)}
+
+
+registry = Registry()
+
+
+def _labels(**kw) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in kw.items()))
+
+
+def _pool_gauges() -> dict:
+    try:
+        from app import db
+        pool = db.engine.pool
+    except Exception:  # no app context / engine yet
+        return {}
+    out = {}
+    for name, attr in (("db_pool_size", "size"), ("db_pool_checked_out", "checkedout"), ("db_pool_overflow", "overflow")):
+        fn = getattr(pool, attr, None)
+        if callable(fn):
+            out[(name, ())] = max(fn(), 0)
+    return out
+
+
+# ---------------------------
+# Recording API
+# ---------------------------
+def record_import(kind: str, rows: int, seconds: float) -> None:
+    """Account one finished bulk import of `rows` rows (subjects, students, users, ...)."""
+    lbl = _labels(kind=kind)
+    registry.inc("import_jobs_total", lbl)
+    registry.inc("import_rows_total", lbl, rows)
+    registry.inc("import_duration_seconds_total", lbl, seconds)
+    # CLI imports are short-lived processes: write their snapshot right away
+    _flush(force=not has_request_context())
+
+
+# ---------------------------
+# Multiprocess store
+# ---------------------------
+_flush_state = {"last": 0.0, "timer": None}
+_flush_lock = threading.Lock()
+
+
+def _metrics_dir():
+    try:
+        return current_app.config.get("METRICS_DIR")
+    except RuntimeError:  # outside an app context (atexit)
+        return _flush_state.get("dir")
+
+
+def _flush(force: bool = False) -> None:
+    """Write this process' snapshot to METRICS_DIR (throttled unless `force`)."""
+    d = _metrics_dir()
+    if not d:
+        return
+    now = time.monotonic()
+    with _flush_lock:
+        wait = _flush_state.get("interval", 1.0) - (now - _flush_state["last"])
+        if not force and wait > 0:
+            # throttled: make sure what was recorded since gets written once the interval is up
+            if _flush_state["timer"] is None:
+                # the timer thread has no app context of its own; without one db_pool_* would be left out
+                timer = threading.Timer(wait, _trailing_flush, args=(current_app._get_current_object(),))
+                timer.daemon = True
+                _flush_state["timer"] = timer
+                timer.start()
+            return
+        _flush_state["last"] = now
+    os.makedirs(d, exist_ok=True)
+    path = os.path.join(d, f"metrics-{os.getpid()}.json")
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(registry.snapshot(), fh)
+    os.replace(tmp, path)
+
+
+def _trailing_flush(app) -> None:
+    with _flush_lock:
+        _flush_state["timer"] = None
+    with app.app_context():
+        _flush()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def collect() -> dict:
+    """Merged {counters, gauges, histograms} of this process and, with METRICS_DIR, all others."""
+    snaps = {os.getpid(): registry.snapshot()}
+    d = _metrics_dir()
+    if d and os.path.isdir(d):
+        for fname in os.listdir(d):
+            if not (fname.startswith("metrics-") and fname.endswith(".json")):
+                continue
+            try:
+                pid = int(fname[len("metrics-"):-len(".json")])
+                if pid in snaps:
+                    continue
+                with open(os.path.join(d, fname), encoding="utf-8") as fh:
+                    snap = json.load(fh)
+            except (ValueError, OSError):
+                continue
+            if not _pid_alive(pid):
+                snap["gauges"] = []
+            snaps[pid] = snap
+
+    merged = {"counters": defaultdict(float), "gauges": defaultdict(float), "histograms": {}}
+    for snap in snaps.values():
+        for kind in ("counters", "gauges"):
+            for name, labels, v in snap[kind]:
+                merged[kind][(name, tuple(tuple(p) for p in labels))] += v
+        for name, labels, v in snap["histograms"]:
+            key = (name, tuple(tuple(p) for p in labels))
+            cur = merged["histograms"].get(key)
+            merged["histograms"][key] = list(v) if cur is None else [a + b for a, b in zip(cur, v)]
+    return merged
+
+
+# ---------------------------
+# Exposition
+# ---------------------------
+def _fmt_labels(labels, extra=()) -> str:
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    esc = lambda v: str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')  # noqa: E731
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in pairs) + "}"
+
+
+def _fmt_value(v) -> str:
+    return repr(float(v)) if isinstance(v, float) and not float(v).is_integer() else str(int(v))
+
+
+def render(merged: dict) -> str:
+    counters, gauges = merged["counters"], dict(merged["gauges"])
+
+    # derived gauges
+    for (name, labels), hits in list(counters.items()):
+        if name == "cache_hits_total":
+            total = hits + counters.get(("cache_misses_total", labels), 0)
+            if total:
+                gauges[("cache_hit_ratio", labels)] = round(hits / total, 4)
+        elif name == "import_rows_total":
+            secs = counters.get(("import_duration_seconds_total", labels), 0)
+            if secs:
+                gauges[("import_rows_per_second", labels)] = round(hits / secs, 1)
+
+    by_name = defaultdict(list)
+    for src in (counters, gauges):
+        for (name, labels), v in src.items():
+            by_name[name].append((labels, v))
+    for (name, labels), v in merged["histograms"].items():
+        by_name[name].append((labels, v))
+
+    lines = []
+    for name in sorted(by_name):
+        mtype, help_text = HELP.get(name, ("untyped", name))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {mtype}")
+        for labels, v in sorted(by_name[name]):
+            if mtype != "histogram":
+                lines.append(f"{name}{_fmt_labels(labels)} {_fmt_value(v)}")
+                continue
+            cumulative = 0
+            for bound, n in zip(LATENCY_BUCKETS, v):
+                cumulative += n
+                lines.append(f"{name}_bucket{_fmt_labels(labels, [('le', repr(bound))])} {cumulative}")
+            lines.append(f"{name}_bucket{_fmt_labels(labels, [('le', '+Inf')])} {v[-1]}")
+            lines.append(f"{name}_sum{_fmt_labels(labels)} {_fmt_value(round(v[-2], 6))}")
+            lines.append(f"{name}_count{_fmt_labels(labels)} {v[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+# ---------------------------
+# Flask wiring
+# ---------------------------
+def init_metrics(app) -> None:
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+    _flush_state["dir"] = app.config.get("METRICS_DIR")
+    _flush_state["interval"] = app.config.get("METRICS_FLUSH_INTERVAL", 1.0)
+
+    def _blueprint():
+        return request.blueprint or "app"
+
+    @app.before_request
+    def _metrics_start():
+        if request.endpoint == "metrics":
+            return
+        if _flush_state["dir"] and not _flush_state.get("atexit"):
+            # serving processes only: CLI commands would leave empty snapshots behind
+            # (CLI imports write theirs in record_import)
+            with _flush_lock:
+                if not _flush_state.get("atexit"):
+                    _flush_state["atexit"] = True
+                    atexit.register(lambda: _flush(force=True))
+        g.metrics_start = time.perf_counter()
+        g.metrics_blueprint = _blueprint()
+        registry.add_gauge("http_requests_in_flight", _labels(blueprint=g.metrics_blueprint), 1)
+
+    @app.after_request
+    def _metrics_observe(response):
+        start = g.get("metrics_start")
+        if start is not None:
+            elapsed = time.perf_counter() - start
+            bp, endpoint = g.metrics_blueprint, request.endpoint or "unmatched"
+            registry.inc("http_requests_total",
+                         _labels(blueprint=bp, endpoint=endpoint, method=request.method, status=response.status_code))
+            registry.observe("http_request_duration_seconds",
+                             _labels(blueprint=bp, endpoint=endpoint, method=request.method), elapsed)
+        return response
+
+    @app.teardown_request
+    def _metrics_done(exc):
+        if g.pop("metrics_start", None) is None:
+            return
+        registry.add_gauge("http_requests_in_flight", _labels(blueprint=g.pop("metrics_blueprint")), -1)
+        _flush()
+
+    @app.route("/metrics", endpoint="metrics")
+    def metrics():
+        token = app.config.get("METRICS_TOKEN")
+        if token and request.headers.get("Authorization") != f"Bearer {token}":
+            return Response("unauthorized\n", status=401, mimetype="text/plain")
+        _flush(force=True)
+        return Response(render(collect()), content_type="text/plain; version=0.0.4; charset=utf-8")
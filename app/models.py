@@ -25,8 +25,14 @@ class Subject(db.Model):
     branch = db.Column(db.String(50), nullable=False)
     year = db.Column(db.Integer, nullable=False)
     semester = db.Column(db.Integer, nullable=False)
+    updated_on = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     marks = db.relationship('Mark', backref='subject', lazy=True)
 
+    __table_args__ = (
+        # delta sync (/api/results/changes): ORDER BY updated_on, sub_code
+        db.Index('ix_subjects_updated_on_code', 'updated_on', 'sub_code'),
+    )
+
 class Student(db.Model):
     __tablename__ = 'students'
     id = db.Column(db.Integer, primary_key=True)
@@ -34,9 +40,15 @@ class Student(db.Model):
     name = db.Column(db.String(255), nullable=False)
     branch = db.Column(db.String(50), nullable=False)
     exam_year = db.Column(db.Integer, nullable=False)
+    updated_on = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     # relationships
     marks = db.relationship('Mark', backref='student', lazy=True)
 
+    __table_args__ = (
+        db.Index('ix_students_branch_exam_year', 'branch', 'exam_year'),
+        db.Index('ix_students_updated_on_id', 'updated_on', 'id'),
+    )
+
 class Mark(db.Model):
     __tablename__ = 'marks'
     id = db.Column(db.Integer, primary_key=True)
@@ -65,6 +77,135 @@ class Mark(db.Model):
 
     __table_args__ = (
         db.UniqueConstraint('student_id', 'sub_code', 'semester', name='uix_student_subject_sem'),
+        # covers cohort score scans (join from students, filter by semester)
+        db.Index('ix_marks_student_semester_score', 'student_id', 'semester', 'sub_code', 'subject_score'),
+        db.Index('ix_marks_updated_on_id', 'updated_on', 'id'),
+    )
+
+class StudentSemesterSummary(db.Model):
+    """Sums over one student's marks in one semester (maintained by app/summaries.py)."""
+    __tablename__ = 'student_semester_summaries'
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id', ondelete='CASCADE'), primary_key=True)
+    semester = db.Column(db.Integer, primary_key=True)
+    # copied from students so cohort queries need no join
+    branch = db.Column(db.String(50), nullable=False)
+    exam_year = db.Column(db.Integer, nullable=False)
+
+    mark_count = db.Column(db.Integer, nullable=False)        # mark rows
+    scored_count = db.Column(db.Integer, nullable=False)      # mark rows with a subject_score
+    score_sum = db.Column(db.Float, nullable=False)           # sum of subject_score
+    pass_count = db.Column(db.Integer, nullable=False)        # subject_score >= 40
+    attendance_sum = db.Column(db.Float, nullable=False)
+    attendance_count = db.Column(db.Integer, nullable=False)
+    overall_score = db.Column(db.Float, nullable=True)        # score_sum / scored_count (the semester "SGPA")
+    risk = db.Column(db.String(10), nullable=True)            # map_risk(overall_score)
+
+    __table_args__ = (
+        db.Index('ix_semester_summaries_cohort', 'branch', 'exam_year', 'semester', 'overall_score'),
+    )
+
+class StudentCumulative(db.Model):
+    """Totals over all semesters of one student (maintained by app/summaries.py)."""
+    __tablename__ = 'student_cumulative'
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id', ondelete='CASCADE'), primary_key=True)
+    branch = db.Column(db.String(50), nullable=False)
+    exam_year = db.Column(db.Integer, nullable=False)
+
+    semester_count = db.Column(db.Integer, nullable=False)    # semesters with marks
+    scored_count = db.Column(db.Integer, nullable=False)
+    score_sum = db.Column(db.Float, nullable=False)
+    cgpa = db.Column(db.Float, nullable=True)                 # score_sum / scored_count, 0-100 like overall_score
+    best_semester = db.Column(db.Integer, nullable=True)
+    best_score = db.Column(db.Float, nullable=True)
+    worst_semester = db.Column(db.Integer, nullable=True)
+    worst_score = db.Column(db.Float, nullable=True)
+    trend_slope = db.Column(db.Float, nullable=True)          # least-squares overall_score points per semester
+
+    __table_args__ = (
+        db.Index('ix_student_cumulative_cohort', 'branch', 'exam_year', 'cgpa'),
+    )
+
+class RiskSnapshot(db.Model):
+    """Dated early-warning risk of a student (written by `flask data snapshot-risk`)."""
+    __tablename__ = 'risk_snapshots'
+    id = db.Column(db.Integer, primary_key=True)
+    snapshot_date = db.Column(db.Date, nullable=False)
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id', ondelete='CASCADE'), nullable=False)
+    branch = db.Column(db.String(50), nullable=False)
+    exam_year = db.Column(db.Integer, nullable=False)
+    semester = db.Column(db.Integer, nullable=False)          # latest semester with scores
+    scored_count = db.Column(db.Integer, nullable=False)      # subjects the score is based on
+    overall_score = db.Column(db.Float, nullable=False)
+    risk = db.Column(db.String(10), nullable=False)
+
+    # change since the student's row in the previous snapshot (NULL: not in it)
+    prev_score = db.Column(db.Float, nullable=True)
+    prev_risk = db.Column(db.String(10), nullable=True)
+    score_change = db.Column(db.Float, nullable=True)
+    risk_change = db.Column(db.Integer, nullable=True)        # +1 / +2 = worse band, negative = better
+
+    __table_args__ = (
+        db.UniqueConstraint('snapshot_date', 'student_id', name='uix_risk_snapshot_student'),
+        db.Index('ix_risk_snapshots_cohort', 'snapshot_date', 'branch', 'exam_year', 'risk_change'),
+    )
+
+class WeightProfile(db.Model):
+    """Component weights / full marks for one branch or one subject (see app/weights.py)."""
+    __tablename__ = 'weight_profiles'
+    id = db.Column(db.Integer, primary_key=True)
+    # exactly one of branch / sub_code; a subject profile beats its branch profile
+    branch = db.Column(db.String(50), nullable=True, unique=True)
+    sub_code = db.Column(db.String(50), db.ForeignKey('subjects.sub_code', ondelete='CASCADE'),
+                         nullable=True, unique=True)
+    weights = db.Column(db.JSON, nullable=False)      # component -> weight
+    max_values = db.Column(db.JSON, nullable=False)   # component -> full marks
+    updated_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    updated_on = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ScoreRecompute(db.Model):
+    """Background re-scoring of the marks of some subjects after a weight profile change."""
+    __tablename__ = 'score_recomputes'
+    id = db.Column(db.Integer, primary_key=True)
+    sub_codes = db.Column(db.JSON, nullable=False)
+    status = db.Column(db.String(10), nullable=False, default='pending')  # pending / running / done / failed
+    total = db.Column(db.Integer, nullable=True)        # marks of sub_codes
+    processed = db.Column(db.Integer, nullable=False, default=0)
+    changed = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text, nullable=True)
+    created_on = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_on = db.Column(db.DateTime, nullable=True)
+
+class StagedScore(db.Model):
+    """New score of a mark, held until its recompute swaps them all in at once."""
+    __tablename__ = 'staged_scores'
+    recompute_id = db.Column(db.Integer, db.ForeignKey('score_recomputes.id', ondelete='CASCADE'), primary_key=True)
+    mark_id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, nullable=False)
+    seen_updated_on = db.Column(db.DateTime, nullable=True)   # mark.updated_on when it was scored
+    subject_score = db.Column(db.Float, nullable=True)
+    risk = db.Column(db.String(10), nullable=True)
+
+class ResultEvent(db.Model):
+    """A committed change to a cohort's results, streamed to dashboards (see app/events.py)."""
+    __tablename__ = 'result_events'
+    id = db.Column(db.Integer, primary_key=True)
+    # the cohort; NULL = all (e.g. a subject import has no exam year)
+    branch = db.Column(db.String(50), nullable=True)
+    exam_year = db.Column(db.Integer, nullable=True)
+    semester = db.Column(db.Integer, nullable=True)
+    source = db.Column(db.String(20), nullable=False)   # marks / import / recompute / rebuild
+    created_on = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+class Tombstone(db.Model):
+    """A deleted mark / student / subject, kept for delta-sync mirrors (see app/changes.py)."""
+    __tablename__ = 'tombstones'
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(20), nullable=False)    # mark / student / subject
+    key = db.Column(db.String(64), nullable=False)       # primary key of the deleted row
+    deleted_on = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_tombstones_deleted_on_id', 'deleted_on', 'id'),
     )
 
 class UploadedFile(db.Model):
@@ -74,11 +215,38 @@ class UploadedFile(db.Model):
     original_file_name = db.Column(db.String(255), nullable=False)
     exam_type = db.Column(db.String(20), nullable=False)         # 'mid1','mid2','semester'
     uploaded_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    uploaded_on = db.Column(db.DateTime, default=datetime.utcnow)
+    uploaded_on = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     note = db.Column(db.String(255), nullable=True)
+    content_hash = db.Column(db.String(64), nullable=True, index=True)  # sha256 hex of the original bytes
+    blob_path = db.Column(db.String(255), nullable=True, index=True)    # relative to BLOB_FOLDER; NULL = legacy flat file
+    size = db.Column(db.BigInteger, nullable=True)                     # original (uncompressed) size in bytes
+    preview = db.relationship('FilePreview', backref='uploaded_file', uselist=False,
+                              cascade='all, delete-orphan', lazy=True)
     
+    __table_args__ = (
+        # keyset pagination of the listing: ORDER BY uploaded_on DESC, id DESC
+        db.Index('ix_uploaded_files_uploaded_on_id', 'uploaded_on', 'id'),
+        db.Index('ix_uploaded_files_exam_type_uploaded_on', 'exam_type', 'uploaded_on', 'id'),
+    )
+
     def __repr__(self):
         return f"<UploadedFile {self.id} {self.file_name}>"
+
+class FilePreview(db.Model):
+    """Cached header / first rows / row count of an uploaded file, keyed by (file, size, mtime)."""
+    __tablename__ = 'file_previews'
+    file_id = db.Column(db.Integer, db.ForeignKey('uploaded_files.id'), primary_key=True)
+    size = db.Column(db.BigInteger, nullable=False)
+    mtime_ns = db.Column(db.BigInteger, nullable=False)
+
+    encoding = db.Column(db.String(20), nullable=True)   # CSV only
+    delimiter = db.Column(db.String(1), nullable=True)   # CSV only
+    quotechar = db.Column(db.String(1), nullable=True)   # CSV only
+
+    columns = db.Column(db.JSON, nullable=False)         # header row
+    rows = db.Column(db.JSON, nullable=False)            # first PREVIEW_CACHE_ROWS data rows
+    row_count = db.Column(db.Integer, nullable=False)    # data rows (header excluded)
+    cached_on = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
 class Institution(db.Model):
     __tablename__ = "institution"
@@ -0,0 +1,140 @@
+# app/previews.py
+import io
+import os
+import csv
+import codecs
+from typing import Dict, Optional
+
+from flask import current_app
+
+from app import db
+from app.models import FilePreview, UploadedFile
+from app.storage import open_blob, upload_ext
+
+# how many bytes to look at when sniffing the encoding / dialect of a CSV
+SNIFF_BYTES = 4096
+SNIFF_DELIMITERS = ",;\t|"
+
+
+class PreviewError(Exception):
+    """Raised when a file type cannot be previewed."""
+
+
+# ---------------------------
+# Parsing (cache misses only)
+# ---------------------------
+def detect_encoding(sample: bytes) -> str:
+    """Best-effort encoding guess: UTF-8 (with/without BOM), else latin-1 (never fails)."""
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    try:
+        sample.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError as e:
+        # a multi-byte character cut off at the end of the sample is still utf-8
+        if e.start >= len(sample) - 3:
+            return "utf-8"
+        return "latin-1"
+
+
+def sniff_csv(path: str) -> Dict[str, str]:
+    """Return {encoding, delimiter, quotechar} for a CSV file (plain or compressed blob)."""
+    with open_blob(path) as fh:
+        raw = fh.read(SNIFF_BYTES)
+    encoding = detect_encoding(raw)
+    sample = raw.decode(encoding, errors="replace")
+    if len(raw) == SNIFF_BYTES and "\n" in sample:
+        # don't let a half-read last line confuse the sniffer
+        sample = sample[:sample.rindex("\n")]
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=SNIFF_DELIMITERS) if sample else csv.excel
+        delimiter, quotechar = dialect.delimiter, dialect.quotechar or '"'
+    except Exception:
+        # the sniffer gives up on quoted multi-line cells; the header line is still a good hint
+        header = sample.splitlines()[0] if sample else ""
+        delimiter = max(SNIFF_DELIMITERS, key=header.count) if header else ","
+        if not header.count(delimiter):
+            delimiter = ","
+        quotechar = '"'
+    return {"encoding": encoding, "delimiter": delimiter, "quotechar": quotechar}
+
+
+def _csv_preview(path: str, max_rows: int) -> Dict:
+    info = sniff_csv(path)
+    columns, rows, row_count = [], [], 0
+    with io.TextIOWrapper(open_blob(path), encoding=info["encoding"], errors="replace", newline="") as fh:
+        reader = csv.reader(fh, delimiter=info["delimiter"], quotechar=info["quotechar"])
+        for i, row in enumerate(reader):
+            if i == 0:
+                columns = row
+                continue
+            if len(rows) < max_rows:
+                rows.append(row)
+            row_count += 1
+    return dict(info, columns=columns, rows=rows, row_count=row_count)
+
+
+def _xlsx_preview(path: str, max_rows: int) -> Dict:
+    import openpyxl
+
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        columns, rows, row_count = [], [], 0
+        for i, row in enumerate(wb.active.iter_rows(values_only=True)):
+            values = [("" if v is None else str(v)) for v in row]
+            if i == 0:
+                columns = values
+                continue
+            if len(rows) < max_rows:
+                rows.append(values)
+            row_count += 1
+    finally:
+        # read-only workbooks keep the zip handle open until closed explicitly
+        wb.close()
+    return {"encoding": None, "delimiter": None, "quotechar": None,
+            "columns": columns, "rows": rows, "row_count": row_count}
+
+
+def build_preview(path: str, max_rows: int, ext: Optional[str] = None) -> Dict:
+    """Parse header, first `max_rows` data rows and the data row count of a file."""
+    ext = ext or os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return _csv_preview(path, max_rows)
+    if ext in (".xls", ".xlsx"):
+        return _xlsx_preview(path, max_rows)
+    raise PreviewError(f"Preview not supported for '{ext}'")
+
+
+# ---------------------------
+# Cache
+# ---------------------------
+def get_preview(uploaded: UploadedFile, path: str) -> FilePreview:
+    """
+    Return the cached preview for `uploaded`, keyed by (file id, size, mtime).
+    A stale or missing entry is rebuilt from `path` and stored.
+    """
+    st = os.stat(path)
+    cached: Optional[FilePreview] = db.session.get(FilePreview, uploaded.id)
+    if cached is not None and cached.size == st.st_size and cached.mtime_ns == st.st_mtime_ns:
+        return cached
+
+    max_rows = current_app.config.get("PREVIEW_CACHE_ROWS", 50)
+    data = build_preview(path, max_rows, upload_ext(uploaded, path))
+
+    if cached is None:
+        cached = FilePreview(file_id=uploaded.id)
+        db.session.add(cached)
+    cached.size = st.st_size
+    cached.mtime_ns = st.st_mtime_ns
+    for key in ("encoding", "delimiter", "quotechar", "columns", "rows", "row_count"):
+        setattr(cached, key, data[key])
+
+    try:
+        db.session.commit()
+    except Exception:
+        # caching is best-effort; the freshly parsed preview is still valid
+        db.session.rollback()
+        current_app.logger.exception("could not store preview cache for file %s", uploaded.id)
+        cached = FilePreview(file_id=uploaded.id, size=st.st_size, mtime_ns=st.st_mtime_ns, **data)
+    return cached
+
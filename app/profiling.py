@@ -0,0 +1,176 @@
+# app/profiling.py
+"""
+On-demand cProfile of single requests.
+
+A request is profiled when
+  * an admin sends the `X-Profile: 1` header or the `?_profile=1` parameter, or
+  * it is picked by random sampling (PROFILE_SAMPLE_RATE, 0..1; 0 = off).
+
+The profile is written to PROFILE_DIR as <name>.pstats with a <name>.json
+sidecar (path, status, duration, trigger); only the newest PROFILE_KEEP are
+kept. Explicitly profiled responses carry `X-Profile-Id: <name>`. Browse them at
+/admin/profiles. Time spent streaming a response body after the view returns
+is not included.
+"""
+import os
+import re
+import json
+import time
+import uuid
+import random
+import pstats
+import cProfile
+import threading
+from datetime import datetime
+from io import StringIO
+from typing import List, Optional
+
+from flask import current_app, g, request
+from flask_login import current_user
+
+PROFILE_NAME_RE = re.compile(r"^[\w.-]+$")
+SKIP_ENDPOINTS = {"static", "metrics"}
+
+# one profiled request at a time per process: cProfile cannot run in two threads at once
+# (Python 3.12+ raises ValueError), so a concurrent request just goes unprofiled
+_profiling = threading.Lock()
+
+
+def get_profile_dir() -> str:
+    cfg = current_app.config.get("PROFILE_DIR")
+    if cfg:
+        return os.path.abspath(cfg)
+    project_root = os.path.abspath(os.path.join(current_app.root_path, ".."))
+    return os.path.join(project_root, "cache", "profiles")
+
+
+def _requested() -> bool:
+    flag = request.headers.get("X-Profile") or request.args.get("_profile")
+    if flag not in ("1", "true", "yes"):
+        return False
+    return current_user.is_authenticated and getattr(current_user, "role", None) == "admin"
+
+
+# ---------------------------
+# Stored profiles
+# ---------------------------
+def profile_path(name: str, ext: str = ".pstats") -> Optional[str]:
+    """Path of a stored profile, or None for names that are not ours."""
+    if not PROFILE_NAME_RE.match(name or ""):
+        return None
+    return os.path.join(get_profile_dir(), name + ext)
+
+
+def list_profiles(limit: int = 200) -> List[dict]:
+    """Metadata of stored profiles, newest first."""
+    d = get_profile_dir()
+    if not os.path.isdir(d):
+        return []
+    metas = []
+    for fname in sorted(os.listdir(d), reverse=True):
+        if not fname.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(d, fname), encoding="utf-8") as fh:
+                metas.append(json.load(fh))
+        except (OSError, ValueError):
+            continue
+        if len(metas) >= limit:
+            break
+    return metas
+
+
+def profile_summary(name: str, sort: str = "cumulative", limit: int = 60) -> Optional[str]:
+    """pstats text report of a stored profile."""
+    path = profile_path(name)
+    if path is None or not os.path.exists(path):
+        return None
+    out = StringIO()
+    stats = pstats.Stats(path, stream=out)
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    return out.getvalue()
+
+
+def _prune(d: str, keep: int) -> None:
+    names = sorted(f[:-len(".pstats")] for f in os.listdir(d) if f.endswith(".pstats"))
+    for name in names[:-keep] if keep else names:
+        for ext in (".pstats", ".json"):
+            try:
+                os.remove(os.path.join(d, name + ext))
+            except OSError:
+                pass
+
+
+def _save(profiler: cProfile.Profile, meta: dict) -> str:
+    d = get_profile_dir()
+    os.makedirs(d, exist_ok=True)
+    endpoint = re.sub(r"[^\w.-]", "_", meta["endpoint"] or "unmatched")
+    name = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{endpoint}-{uuid.uuid4().hex[:8]}"
+    profiler.dump_stats(os.path.join(d, name + ".pstats"))
+    meta["name"] = name
+    with open(os.path.join(d, name + ".json"), "w", encoding="utf-8") as fh:
+        json.dump(meta, fh)
+    _prune(d, current_app.config.get("PROFILE_KEEP", 200))
+    return name
+
+
+# ---------------------------
+# Flask wiring
+# ---------------------------
+def init_profiling(app) -> None:
+    rate = float(app.config.get("PROFILE_SAMPLE_RATE") or 0.0)
+
+    @app.before_request
+    def _start_profile():
+        if request.endpoint in SKIP_ENDPOINTS or (request.blueprint == "admin"):
+            return
+        if rate and random.random() < rate:
+            trigger = "sample"
+        elif _requested():
+            trigger = "request"
+        else:
+            return
+        if not _profiling.acquire(blocking=False):
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # profiled by something else (a debugger, sys.setprofile users)
+            _profiling.release()
+            return
+        g.profile = (profiler, trigger, time.perf_counter())
+
+    @app.after_request
+    def _stop_profile(response):
+        state = g.pop("profile", None)
+        if state is None:
+            return response
+        profiler, trigger, started = state
+        profiler.disable()
+        _profiling.release()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        try:
+            name = _save(profiler, {
+                "method": request.method,
+                "path": request.full_path.rstrip("?"),
+                "endpoint": request.endpoint,
+                "status": response.status_code,
+                "duration_ms": round(elapsed_ms, 1),
+                "trigger": trigger,
+                "user": getattr(current_user, "username", None) if trigger == "request" else None,
+                "created": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            })
+        except OSError:
+            current_app.logger.exception("could not store request profile")
+            return response
+        if trigger == "request":
+            response.headers["X-Profile-Id"] = name
+        return response
+
+    @app.teardown_request
+    def _drop_profile(exc):
+        # the view raised before after_request ran: don't leave the profiler on
+        state = g.pop("profile", None)
+        if state is not None:
+            state[0].disable()
+            _profiling.release()
@@ -0,0 +1,171 @@
+# app/projection.py
+"""
+End-semester marks a student needs, projected from the marks entered so far.
+
+    GET /api/results/projection?branch=CS[&year=2023][&semester=4][&sub_code=CS-401]
+
+For every mark of the branch (optionally one batch / semester / subject) that
+has no end_sem yet, the subject
+score is linear in end_sem once the other components are fixed:
+
+    score(x) = (A + w_e * 100 * x / max_e) / D
+
+A is the weighted percentage of the components already entered, w_e the
+end_sem weight (after attendance's weight is spread, when attendance is
+missing) and D the weight considered (1 when it is within 1e-6 of 1, as in
+compute_subject_score). Solving score(x) >= target for every mark and every
+target at once is a few numpy operations over the cohort's (n, 5) mark matrix,
+with each subject's weight profile (app/weights.py).
+
+Required marks are rounded up to 0.01 and are the least marks whose score, as
+compute_subject_score rounds and persists it, reaches the target. 0 means the
+target is already secured and None means it is out of reach even with full
+end_sem marks.
+"""
+from typing import Dict, List, Optional
+
+from app import db
+from app.models import Mark, Student, Subject
+from app.weights import COMPONENTS, resolve_profiles
+
+# pass line and grade bands of compute_grade_and_result (app/results/routes.py)
+TARGETS = (("pass", 40.0), ("D", 50.0), ("C", 60.0), ("B", 70.0), ("A", 80.0), ("A+", 90.0))
+
+ROUNDING_SLACK = 1e-9   # score units either side of target - 0.005 (see required_end_sem)
+
+END_SEM = COMPONENTS.index("end_sem")
+ATTENDANCE = COMPONENTS.index("attendance")
+
+
+def required_end_sem(values: "np.ndarray", weights: "np.ndarray", max_values: "np.ndarray",
+                     targets: "np.ndarray") -> "np.ndarray":
+    """
+    (n, t) end_sem marks needed for each row to score each of `targets`.
+    values / weights / max_values are (n, 5) in COMPONENTS order, NaN for a
+    missing component (end_sem's own value is ignored). NaN = unreachable.
+    """
+    import numpy as np
+
+    present = ~np.isnan(values)
+    present[:, END_SEM] = False
+    perc = np.where(present, values / max_values * 100.0, 0.0)
+
+    # attendance missing: its weight is spread over the others pro rata
+    used = weights.copy()
+    others = np.arange(len(COMPONENTS)) != ATTENDANCE
+    total_other = weights[:, others].sum(axis=1)
+    spread = ~present[:, ATTENDANCE] & (total_other > 0)
+    share = weights[:, others] / np.where(total_other > 0, total_other, 1.0)[:, None]
+    used[:, others] += np.where(spread[:, None], share * weights[:, [ATTENDANCE]], 0.0)
+
+    w_e = used[:, END_SEM]
+    entered = (used * perc).sum(axis=1)                    # A
+    considered = (used * present).sum(axis=1) + w_e
+    divisor = np.where((considered > 0) & (np.abs(considered - 1.0) > 1e-6), considered, 1.0)
+    zero_w = w_e <= 0
+
+    def solve(floor):
+        goal = floor * divisor[:, None]                    # A + w_e * p must reach this
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pct = (goal - entered[:, None]) / w_e[:, None]
+            need = np.ceil(pct * max_values[:, END_SEM, None]) / 100.0
+            need = np.maximum(need, 0.0)
+            # no end_sem weight: the target is met already or never
+            need[zero_w] = np.where(entered[zero_w, None] >= goal[zero_w], 0.0, np.nan)
+            need[need > max_values[:, END_SEM, None]] = np.nan
+        return need
+
+    # scores are kept rounded to 0.01, so a target is met from target - 0.005 on; whether
+    # that exact tie rounds up depends on the float, so the marks whose answer changes
+    # across it are settled with compute_subject_score's own arithmetic
+    need = solve(targets[None, :] - 0.005 + ROUNDING_SLACK)
+    lower = solve(targets[None, :] - 0.005 - ROUNDING_SLACK)
+    rows, cols = np.nonzero(~np.isnan(lower) & ~(lower == need))
+    if len(rows):
+        tied = values[rows].copy()
+        tied[:, END_SEM] = lower[rows, cols]
+        scores = persisted_scores(tied, weights[rows], max_values[rows]).tolist()
+        met = np.array([round(x, 2) >= t for x, t in zip(scores, targets[cols].tolist())], dtype=bool)
+        need[rows[met], cols[met]] = lower[rows[met], cols[met]]
+    return need
+
+
+def persisted_scores(values: "np.ndarray", weights: "np.ndarray", max_values: "np.ndarray") -> "np.ndarray":
+    """
+    Unrounded compute_subject_score() of each row, shaped like required_end_sem's
+    inputs; the sums run component by component in the same order, so every
+    float matches the one that gets rounded and stored.
+    """
+    import numpy as np
+
+    present = ~np.isnan(values)
+    perc = np.where(present, values / max_values * 100.0, 0.0)
+    att_missing = ~present[:, ATTENDANCE]
+    total_other = np.zeros(len(values))
+    for k in range(len(COMPONENTS)):
+        if k != ATTENDANCE:
+            total_other = total_other + weights[:, k]
+    spread = att_missing & (total_other > 0)
+    safe_total = np.where(spread, total_other, 1.0)
+
+    score = np.zeros(len(values))
+    considered = np.zeros(len(values))
+    for k in range(len(COMPONENTS)):
+        w = weights[:, k]
+        if k != ATTENDANCE:
+            w = np.where(spread, w + (w / safe_total) * weights[:, ATTENDANCE], w)
+        score = np.where(present[:, k], score + w * perc[:, k], score)
+        considered = np.where(present[:, k], considered + w, considered)
+    rescale = (considered > 0) & (np.abs(considered - 1.0) > 1e-6)
+    return np.where(rescale, score / np.where(rescale, considered, 1.0), score)
+
+
+def project_cohort(branch: str, year: Optional[int] = None, semester: Optional[int] = None,
+                   sub_code: Optional[str] = None) -> Dict:
+    """
+    {"subjects": {code: {sub_name, end_sem_max}}, "students": [{pin, name,
+    subjects: [{semester, sub_code, required: {target: mark}}]}]} in PIN order.
+    """
+    import numpy as np
+
+    filters = [Student.branch == branch, Mark.end_sem.is_(None)]
+    if year is not None:
+        filters.append(Student.exam_year == year)
+    if semester is not None:
+        filters.append(Mark.semester == semester)
+    if sub_code:
+        filters.append(Mark.sub_code == sub_code)
+    rows = db.session.execute(
+        db.select(Student.pin, Student.name, Mark.semester, Mark.sub_code, *[getattr(Mark, k) for k in COMPONENTS])
+        .join(Student, Student.id == Mark.student_id)
+        .where(*filters)
+        .order_by(Student.pin, Mark.semester, Mark.sub_code)
+    ).all()
+    if not rows:
+        return {"subjects": {}, "students": []}
+
+    codes = sorted({r.sub_code for r in rows})
+    profiles = resolve_profiles(db.session, codes)
+    names = dict(db.session.execute(db.select(Subject.sub_code, Subject.sub_name).where(Subject.sub_code.in_(codes))).all())
+    index = {c: i for i, c in enumerate(codes)}
+    weights = np.array([[profiles[c][0][k] for k in COMPONENTS] for c in codes], dtype=float)
+    max_values = np.array([[profiles[c][1][k] for k in COMPONENTS] for c in codes], dtype=float)
+
+    idx = np.fromiter((index[r.sub_code] for r in rows), dtype=np.intp, count=len(rows))
+    values = np.array([[getattr(r, k) for k in COMPONENTS] for r in rows], dtype=float)
+    need = required_end_sem(values, weights[idx], max_values[idx], np.array([t for _, t in TARGETS]))
+
+    students: List[Dict] = []
+    targets = [n for n, _ in TARGETS]
+    for r, req in zip(rows, need.tolist()):
+        if not students or students[-1]["pin"] != r.pin:
+            students.append({"pin": r.pin, "name": r.name, "subjects": []})
+        students[-1]["subjects"].append({
+            "semester": r.semester,
+            "sub_code": r.sub_code,
+            "required": {n: (None if v != v else v) for n, v in zip(targets, req)},
+        })
+    return {
+        "subjects": {c: {"sub_name": names.get(c) or c, "end_sem_max": float(profiles[c][1]["end_sem"])} for c in codes},
+        "students": students,
+    }
@@ -0,0 +1,224 @@
+# app/report_cards.py
+"""
+Printable report cards for a whole cohort, streamed as one ZIP.
+
+    GET /api/results/report-cards?branch=CS&year=2023[&semester=4][&format=html|pdf]
+    flask data report-cards --branch CS --year 2023 --out cs-2023.zip
+
+Inputs are loaded REPORT_CARD_BATCH students at a time (students, their marks
+with subject names, semester summaries and CGPA: four queries per batch) and
+turned into plain dicts. Rendering (templates/report_card.html, then PDF when
+WeasyPrint is installed) runs in a pool of REPORT_CARD_WORKERS processes with
+at most two groups of GROUP_SIZE cards per worker in flight; each card is added to the ZIP as soon
+as it is done and the compressed bytes are handed to the client right away.
+Memory therefore holds one batch of inputs and a few rendered cards, whatever
+the cohort size. Workers are spawned, not forked, so they never share the
+parent's database connections. Each web process runs at most
+REPORT_CARD_MAX_JOBS exports at once (claim_job / release_job); the endpoint
+answers 503 beyond that.
+"""
+import io
+import os
+import re
+import zipfile
+import threading
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from importlib.util import find_spec
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app import db
+from app.models import Institution, Mark, Student, StudentCumulative, StudentSemesterSummary, Subject
+from app.utils import generate_feedback
+
+TEMPLATE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "templates"))
+FORMATS = ("html", "pdf")
+COMPONENTS = ("mid1", "mid2", "internal", "end_sem", "attendance")
+GROUP_SIZE = 20  # cards per pool task: HTML renders in about a millisecond, IPC would dominate
+
+_env = None  # per-process jinja environment (workers have no Flask app)
+
+_jobs = {"running": 0}
+_jobs_lock = threading.Lock()
+
+
+def claim_job(limit: int) -> bool:
+    """Count one more export running in this process, unless `limit` already are."""
+    with _jobs_lock:
+        if _jobs["running"] >= limit:
+            return False
+        _jobs["running"] += 1
+        return True
+
+
+def release_job() -> None:
+    with _jobs_lock:
+        _jobs["running"] -= 1
+
+
+def pdf_available() -> bool:
+    return find_spec("weasyprint") is not None
+
+
+# ---------------------------
+# Loading (parent process)
+# ---------------------------
+def iter_cards(branch: str, year: int, semester: Optional[int] = None, batch_size: int = 200) -> Iterator[dict]:
+    """Report card inputs of a cohort in PIN order, loaded batch_size students at a time."""
+    from app.results.routes import _is_pin_valid, compute_grade_and_result
+
+    institution = db.session.query(Institution.name).order_by(Institution.id).limit(1).scalar()
+    generated_on = datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC")
+    last_pin = ""
+    while True:
+        students = (
+            db.session.query(Student.id, Student.pin, Student.name, Student.branch, Student.exam_year)
+            .filter(Student.branch == branch, Student.exam_year == year, Student.pin > last_pin)
+            .order_by(Student.pin).limit(batch_size).all()
+        )
+        if not students:
+            return
+        last_pin = students[-1].pin
+        ids = [s.id for s in students]
+
+        marks = (
+            db.session.query(Mark.student_id, Mark.semester, Mark.sub_code, Subject.sub_name, Mark.subject_score,
+                             *[getattr(Mark, k) for k in COMPONENTS])
+            .outerjoin(Subject, Subject.sub_code == Mark.sub_code)
+            .filter(Mark.student_id.in_(ids))
+        )
+        S = StudentSemesterSummary
+        sems = (db.session.query(S.student_id, S.semester, S.overall_score, S.risk, S.attendance_sum,
+                                 S.attendance_count)
+                .filter(S.student_id.in_(ids)))
+        if semester is not None:
+            marks = marks.filter(Mark.semester == semester)
+            sems = sems.filter(S.semester == semester)
+
+        subjects = {}  # student_id -> semester -> rows (in semester order)
+        for m in marks.order_by(Mark.student_id, Mark.semester, Mark.sub_code):
+            grade, result = compute_grade_and_result(m.subject_score)
+            row = {k: getattr(m, k) for k in COMPONENTS}
+            row.update(sub_code=m.sub_code, sub_name=m.sub_name or m.sub_code, subject_score=m.subject_score,
+                       grade=grade, result=result)
+            subjects.setdefault(m.student_id, {}).setdefault(m.semester, []).append(row)
+        summaries = {(s.student_id, s.semester): s for s in sems}
+        cgpa = dict(db.session.query(StudentCumulative.student_id, StudentCumulative.cgpa)
+                    .filter(StudentCumulative.student_id.in_(ids)))
+
+        for st in students:
+            if not _is_pin_valid(st.pin):
+                continue
+            semesters = []
+            for sem_no, rows in subjects.get(st.id, {}).items():
+                summary = summaries.get((st.id, sem_no))
+                overall = summary.overall_score if summary else None
+                attendance = (round(summary.attendance_sum / summary.attendance_count, 2)
+                              if summary and summary.attendance_count else None)
+                weak = [r["sub_name"] for r in rows if r["subject_score"] is not None and r["subject_score"] < 40]
+                semesters.append({
+                    "semester": sem_no, "subjects": rows, "overall_score": overall,
+                    "risk": summary.risk if summary else None, "attendance": attendance,
+                    "feedback": generate_feedback(st.name, overall, weak, attendance),
+                })
+            yield {"pin": st.pin, "name": st.name, "branch": st.branch, "exam_year": st.exam_year,
+                   "cgpa": cgpa.get(st.id), "semesters": semesters,
+                   "institution": institution, "generated_on": generated_on}
+
+
+# ---------------------------
+# Rendering (worker processes)
+# ---------------------------
+def _fmt(value) -> str:
+    if value is None:
+        return "-"
+    return f"{value:.2f}".rstrip("0").rstrip(".") if isinstance(value, float) else str(value)
+
+
+def render_card(card: dict, fmt: str = "html") -> Tuple[str, bytes]:
+    """(file name, bytes) of one report card."""
+    global _env
+    if _env is None:
+        from jinja2 import Environment, FileSystemLoader, select_autoescape
+        _env = Environment(loader=FileSystemLoader(TEMPLATE_DIR), autoescape=select_autoescape(["html"]))
+        _env.globals["fmt"] = _fmt
+    html = _env.get_template("report_card.html").render(card=card)
+    name = re.sub(r"[^\w.-]", "_", card["pin"])
+    if fmt == "pdf":
+        from weasyprint import HTML
+        return f"{name}.pdf", HTML(string=html).write_pdf()
+    return f"{name}.html", html.encode("utf-8")
+
+
+def render_group(cards: List[dict], fmt: str) -> List[Tuple[str, bytes]]:
+    return [render_card(card, fmt) for card in cards]
+
+
+def render_cards(cards: Iterator[dict], fmt: str, workers: int) -> Iterator[Tuple[str, bytes]]:
+    """
+    Render `cards` in a process pool, GROUP_SIZE per task, yielding them as
+    tasks finish (inline when workers <= 1).
+    """
+    if workers <= 1:
+        for card in cards:
+            yield render_card(card, fmt)
+        return
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        pending = set()
+        group = []
+        for card in cards:
+            group.append(card)
+            if len(group) < GROUP_SIZE:
+                continue
+            pending.add(pool.submit(render_group, group, fmt))
+            group = []
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for f in done:
+                    yield from f.result()
+        if group:
+            pending.add(pool.submit(render_group, group, fmt))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for f in done:
+                yield from f.result()
+
+
+# ---------------------------
+# ZIP streaming
+# ---------------------------
+class _ZipSink(io.RawIOBase):
+    """Write-only, unseekable target for ZipFile; drain() hands back what was written so far."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_report_cards(branch: str, year: int, semester: Optional[int], fmt: str,
+                        workers: int, batch_size: int, counts: Optional[Dict[str, int]] = None) -> Iterator[bytes]:
+    """ZIP archive of a cohort's report cards, as a stream of byte chunks."""
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, data in render_cards(iter_cards(branch, year, semester, batch_size), fmt, workers):
+            zf.writestr(name, data)
+            if counts is not None:
+                counts["cards"] = counts.get("cards", 0) + 1
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    yield sink.drain()
@@ -1,13 +1,15 @@
 # app/results/routes.py
 import re
-from flask import Blueprint, request, jsonify, send_file
-from io import StringIO
+from flask import Blueprint, Response, current_app, request, jsonify, send_file, stream_with_context
+from io import BytesIO, StringIO
 import csv
-from collections import defaultdict
+import heapq
+from collections import defaultdict, namedtuple
 from typing import Optional, Tuple
+from flask_login import login_required
 
 from app import db
-from app.models import Student, Mark, Subject
+from app.models import Student, Mark, Subject, StudentCumulative, StudentSemesterSummary
 from app.utils import compute_subject_score, compute_overall_score, map_risk, generate_feedback
 
 results_bp = Blueprint("results", __name__, url_prefix="/api/results")
@@ -17,6 +19,13 @@ results_bp = Blueprint("results", __name__, url_prefix="/api/results")
 # -------------------------
 PIN_REGEX = re.compile(r'^\s*\d{2,}-[A-Za-z0-9]+-\d+\s*$', re.IGNORECASE)
 
+# ?fields= names accepted by /search (subject rows of a student; student rows of a batch)
+MARK_FIELDS = ("sub_code", "mid1", "mid2", "internal", "end_sem", "total", "attendance", "subject_score", "risk")
+SUBJECT_FIELDS = MARK_FIELDS + ("sub_name", "grade", "result")
+SEMESTER_FIELDS = ("overall_score", "subject_count", "feedback")  # with a semester; "attendance" is both
+ITEM_FIELDS = ("pin", "name", "branch", "exam_year", "attendance", "overall_score", "subject_count", "risk")
+SCORE_FIELDS = {"subject_score", "grade", "result", "overall_score", "feedback"}
+
 
 def _is_pin_valid(pin: str) -> bool:
     if not pin:
@@ -29,6 +38,12 @@ def _is_pin_valid(pin: str) -> bool:
     return False
 
 
+def _maybe_invalid_pin(col):
+    """SQL condition true for every PIN _is_pin_valid rejects (and for a few it accepts)."""
+    return db.or_(col.is_(None), ~col.contains("-"), db.func.length(db.func.trim(col)) < 7,
+                  db.and_(*[~col.contains(d) for d in "0123456789"]))
+
+
 def compute_grade_and_result(score: Optional[float]) -> Tuple[str, str]:
     """
     Compute grade (A+/A/B/C/D/F or N/A) and Pass/Fail string based on score (0-100).
@@ -55,21 +70,47 @@ def compute_grade_and_result(score: Optional[float]) -> Tuple[str, str]:
     return grade, result
 
 
-def _compute_student_score_for_sem(student, semester):
+def _requested_fields(allowed, always=()):
+    """
+    Sparse fieldset from ?fields=a,b,c: None when the parameter is absent (send
+    everything), else the requested names plus `always`. Raises ValueError on
+    names not in `allowed`.
+    """
+    raw = request.args.get("fields")
+    if raw is None:
+        return None
+    fields = {f.strip() for f in raw.split(",") if f.strip()}
+    unknown = fields - set(allowed)
+    if unknown:
+        raise ValueError(f"unknown field(s): {', '.join(sorted(unknown))}; allowed: {', '.join(allowed)}")
+    return fields | set(always)
+
+
+def _pick(row: dict, fields) -> dict:
+    return row if fields is None else {k: v for k, v in row.items() if k in fields}
+
+
+def _compute_student_score_for_sem(student, semester, fields=None):
     """
     Returns: (overall_score: Optional[float], subject_count: int, details: List[dict])
     Each detail contains per-subject raw components, computed subject_score, risk, attendance,
     and now also 'grade' and 'result'.
+    With a `fields` set, details only carry those keys; subject names are only looked up,
+    and scores only computed, when a requested field needs them (else overall is None).
     """
     marks = Mark.query.filter_by(student_id=student.id, semester=semester).all()
     details, scores = [], []
+    want_name = fields is None or "sub_name" in fields
+    want_score = fields is None or bool(SCORE_FIELDS & fields)
 
     for m in marks:
-        subj = Subject.query.filter_by(sub_code=m.sub_code).first()
-        sub_name = subj.sub_name if subj else ""
+        sub_name = ""
+        if want_name:
+            subj = Subject.query.filter_by(sub_code=m.sub_code).first()
+            sub_name = subj.sub_name if subj else ""
 
         ss = m.subject_score
-        if ss is None:
+        if ss is None and want_score:
             try:
                 comps = {
                     "attendance": m.attendance,
@@ -82,13 +123,13 @@ def _compute_student_score_for_sem(student, semester):
             except Exception:
                 ss = None
 
-        if ss is not None:
+        if ss is not None and want_score:
             scores.append(ss)
 
         # compute grade and pass/fail based on computed subject_score (0-100)
-        grade, result = compute_grade_and_result(ss)
+        grade, result = compute_grade_and_result(ss) if want_score else (None, None)
 
-        details.append({
+        details.append(_pick({
             "sub_code": m.sub_code,
             "sub_name": sub_name,
             "mid1": m.mid1,
@@ -101,7 +142,7 @@ def _compute_student_score_for_sem(student, semester):
             "risk": m.risk,
             "grade": grade,
             "result": result
-        })
+        }, fields))
 
     overall = compute_overall_score(scores) if scores else None
     return overall, len(details), details
@@ -120,26 +161,25 @@ def search_student():
 
     # single student
     if pin:
+        sem = int(semester) if semester and semester.isdigit() else None
+        try:
+            if sem is None:
+                fields = _requested_fields(MARK_FIELDS, always=("sub_code",))
+            else:
+                fields = _requested_fields(SUBJECT_FIELDS + SEMESTER_FIELDS)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
         student = Student.query.filter_by(pin=pin).first()
         if not student:
             return jsonify({"error": "Student not found"}), 404
 
-        sem = int(semester) if semester and semester.isdigit() else None
         if sem is None:
+            cols = [k for k in MARK_FIELDS if fields is None or k in fields]
             marks_by_sem = {}
-            for m in Mark.query.filter_by(student_id=student.id).order_by(Mark.semester).all():
-                key = str(m.semester)
-                marks_by_sem.setdefault(key, []).append({
-                    "sub_code": m.sub_code,
-                    "mid1": m.mid1,
-                    "mid2": m.mid2,
-                    "internal": m.internal,
-                    "end_sem": m.end_sem,
-                    "total": m.total,
-                    "attendance": m.attendance,
-                    "subject_score": m.subject_score,
-                    "risk": m.risk
-                })
+            for m in (db.session.query(Mark.semester, *[getattr(Mark, k) for k in cols])
+                      .filter(Mark.student_id == student.id).order_by(Mark.semester)):
+                marks_by_sem.setdefault(str(m.semester), []).append({k: getattr(m, k) for k in cols})
             return jsonify({
                 "student": {
                     "pin": student.pin,
@@ -150,15 +190,25 @@ def search_student():
                 "marks_by_semester": marks_by_sem
             })
 
-        overall, count, details = _compute_student_score_for_sem(student, sem)
+        # what the requested fields are derived from: feedback needs names, scores and attendance
+        needed = fields
+        if fields is not None:
+            needed = fields | {"sub_code"}
+            if "feedback" in fields:
+                needed |= {"sub_name", "subject_score", "attendance"}
+            if "overall_score" in fields:
+                needed.add("subject_score")
+        overall, count, details = _compute_student_score_for_sem(student, sem, needed)
 
-        risk_subjects = [d["sub_name"] for d in details if d.get("subject_score") and d["subject_score"] < 40]
         atts = [d.get("attendance") for d in details if d.get("attendance") is not None]
         avg_attendance = (sum(atts) / len(atts)) if atts else None
 
-        feedback = generate_feedback(student.name, overall, risk_subjects, avg_attendance)
+        feedback = None
+        if fields is None or "feedback" in fields:
+            risk_subjects = [d["sub_name"] for d in details if d.get("subject_score") and d["subject_score"] < 40]
+            feedback = generate_feedback(student.name, overall, risk_subjects, avg_attendance)
 
-        return jsonify({
+        result = {
             "student": {
                 "pin": student.pin,
                 "name": student.name,
@@ -171,13 +221,23 @@ def search_student():
             "subjects": details,
             "attendance": avg_attendance,
             "feedback": feedback
-        })
+        }
+        if fields is not None:
+            row_fields = fields & set(SUBJECT_FIELDS)
+            result = _pick(result, {"student", "semester"} | (fields & {"attendance", *SEMESTER_FIELDS}))
+            if row_fields:
+                result["subjects"] = [_pick(d, row_fields | {"sub_code"}) for d in details]
+        return jsonify(result)
 
     # batch listing
     page = int(request.args.get("page") or 1)
     per_page = int(request.args.get("per_page") or 50)
     sort = (request.args.get("sort") or "pin").lower()
     order = (request.args.get("order") or "asc").lower()
+    try:
+        fields = _requested_fields(ITEM_FIELDS, always=("pin",))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     query = Student.query
     if branch:
@@ -192,6 +252,17 @@ def search_student():
     temp_rows, batch_scores = [], []
     sem = int(semester) if semester and semester.isdigit() else None
 
+    # per-student scoring only when a requested field (or the sort) needs it;
+    # attendance / subject_count alone come from one grouped query for the page
+    wanted = set(ITEM_FIELDS) if fields is None else fields | {sort if sort != "class_avg" else "overall"}
+    score = bool(sem) and bool(wanted & {"overall_score", "overall", "risk"})
+    mark_stats = {}
+    if sem and not score and wanted & {"attendance", "subject_count"}:
+        ids = [s.id for s in pagination.items]
+        mark_stats = {sid: (n, att) for sid, n, att in db.session.query(
+            Mark.student_id, db.func.count(Mark.id), db.func.avg(Mark.attendance)
+        ).filter(Mark.student_id.in_(ids), Mark.semester == sem).group_by(Mark.student_id)}
+
     for s in pagination.items:
         if not _is_pin_valid(s.pin):  # skip invalid
             continue
@@ -200,11 +271,13 @@ def search_student():
 
         overall, subj_count, details = None, 0, []
         attendance_val = None
-        if sem:
-            overall, subj_count, details = _compute_student_score_for_sem(s, sem)
+        if score:
+            overall, subj_count, details = _compute_student_score_for_sem(s, sem, {"subject_score", "attendance"})
             atts = [d.get("attendance") for d in details if d.get("attendance") is not None]
             if atts:
                 attendance_val = sum(atts) / len(atts)
+        elif s.id in mark_stats:
+            subj_count, attendance_val = mark_stats[s.id]
 
         temp_rows.append({
             "pin": s.pin,
@@ -235,13 +308,18 @@ def search_student():
 
     class_avg = (sum(batch_scores) / len(batch_scores)) if batch_scores else None
 
-    return jsonify({
+    result = {
         "total": len(temp_rows),
         "page": page,
         "per_page": per_page,
         "class_average": class_avg,
         "items": temp_rows
-    })
+    }
+    if fields is not None:
+        result["items"] = [_pick(r, fields) for r in temp_rows]
+        if not score:
+            del result["class_average"]  # not computed
+    return jsonify(result)
 
 
 # -------------------------
@@ -322,13 +400,111 @@ def export_csv():
 
     out.seek(0)
     return send_file(
-        StringIO(out.getvalue()),
+        BytesIO(out.getvalue().encode("utf-8")),
         mimetype="text/csv",
         as_attachment=True,
         download_name=f"students_export_{branch}_{exam_year}_{semester}.csv"
     )
 
 
+# -------------------------
+# Report cards (ZIP)
+# -------------------------
+@results_bp.route("/report-cards")
+@login_required
+def report_cards_zip():
+    """
+    Report cards of a whole batch as a streamed ZIP, one file per student.
+    Required: branch, year. Optional: semester (default: every semester),
+    format=html|pdf (pdf needs WeasyPrint on the server). Logged-in users only;
+    503 while REPORT_CARD_MAX_JOBS exports are already running in this process.
+    """
+    from app.report_cards import FORMATS, claim_job, pdf_available, release_job, stream_report_cards
+
+    branch = (request.args.get("branch") or "").strip()
+    exam_year = request.args.get("year") or ""
+    semester = request.args.get("semester") or ""
+    fmt = (request.args.get("format") or "html").lower()
+
+    if not branch or not exam_year.isdigit():
+        return jsonify({"error": "branch and year required"}), 400
+    if semester and not semester.isdigit():
+        return jsonify({"error": "semester must be a number"}), 400
+    if fmt not in FORMATS:
+        return jsonify({"error": f"format must be one of: {', '.join(FORMATS)}"}), 400
+    if fmt == "pdf" and not pdf_available():
+        return jsonify({"error": "PDF report cards need WeasyPrint installed; use format=html"}), 400
+    year_i = int(exam_year)
+    if not db.session.query(Student.query.filter_by(branch=branch, exam_year=year_i).exists()).scalar():
+        return jsonify({"error": "No students found"}), 404
+
+    cfg = current_app.config
+    if not claim_job(cfg.get("REPORT_CARD_MAX_JOBS", 1)):
+        rv = jsonify({"error": "report card exports are busy; try again shortly"})
+        rv.headers["Retry-After"] = "30"
+        return rv, 503
+    chunks = stream_report_cards(branch, year_i, int(semester) if semester else None, fmt,
+                                 cfg["REPORT_CARD_WORKERS"], cfg["REPORT_CARD_BATCH"])
+    name = f"report_cards_{branch}_{year_i}" + (f"_sem{semester}" if semester else "") + ".zip"
+    rv = Response(stream_with_context(chunks), mimetype="application/zip",
+                  headers={"Content-Disposition": f'attachment; filename="{name}"'})
+    rv.call_on_close(release_job)   # the pool lives as long as the body is being sent
+    return rv
+
+
+# -------------------------
+# Change events (SSE)
+# -------------------------
+@results_bp.route("/events")
+def result_events():
+    """
+    Server-Sent Events: `cohort-changed` whenever marks, imports or recomputes
+    commit. Optional branch / year narrow the stream to one batch (events with
+    a NULL branch / year concern every batch and are always sent).
+    """
+    from app.events import event_stream
+
+    last = request.headers.get("Last-Event-ID") or request.args.get("last_event_id") or ""
+    year = request.args.get("year") or ""
+    if (last and not last.isdigit()) or (year and not year.isdigit()):
+        return jsonify({"error": "year and Last-Event-ID must be numbers"}), 400
+    stream = event_stream(current_app._get_current_object(), int(last) if last else None,
+                          (request.args.get("branch") or "").strip() or None, int(year) if year else None)
+    return Response(stream, mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+# -------------------------
+# Delta sync
+# -------------------------
+@results_bp.route("/changes")
+def result_changes():
+    """
+    Marks, students and subjects inserted, updated or deleted since `since`
+    (ISO 8601; omit for everything), one keyset page at a time: repeat with
+    `cursor=next_cursor` until it is null, then sync from `until` next time.
+    """
+    from app.changes import DEFAULT_LIMIT, MAX_LIMIT, SyncExpired, changes_page, parse_since
+
+    cursor = (request.args.get("cursor") or "").strip() or None
+    since = (request.args.get("since") or "").strip()
+    try:
+        limit = min(max(int(request.args.get("limit") or DEFAULT_LIMIT), 1), MAX_LIMIT)
+        since_ts = parse_since(since) if since and not cursor else None
+    except ValueError:
+        return jsonify({"error": "limit must be an integer and since an ISO 8601 timestamp"}), 400
+    cfg = current_app.config
+    try:
+        page = changes_page(since_ts, cursor, limit, safety_lag=cfg["CHANGES_SAFETY_LAG"],
+                            retention_days=cfg["CHANGES_TOMBSTONE_DAYS"])
+    except ValueError:
+        return jsonify({"error": "invalid cursor"}), 400
+    except SyncExpired:
+        return jsonify({"error": f"since is older than {cfg['CHANGES_TOMBSTONE_DAYS']:g} days of "
+                                 "kept deletions; resync without since"}), 410
+    return jsonify(page)
+
+
 # -------------------------
 # Institution
 # -------------------------
@@ -435,6 +611,105 @@ def subject_averages_graph():
     })
 
 
+BUCKET_LABELS = [f"{lo}-{lo + 10}" for lo in range(0, 100, 10)]
+QUARTILES = (("p25", 1), ("median", 2), ("p75", 3))
+
+
+def _score_distribution(scores):
+    """
+    Histogram (10-point buckets) and quartiles of `scores`, a subquery with
+    columns g (group key) and s (score), computed in the database: one GROUP BY
+    for the buckets and one window query that returns only the rows at the
+    ranks needed for min / quartiles / max, so Python work does not grow with
+    the cohort. Returns {group: {count, mean, min, p25, median, p75, max, histogram}}.
+    """
+    bucket = db.case((scores.c.s >= 100, 9), else_=db.cast(scores.c.s / 10, db.Integer)).label("bucket")
+    out = {}
+    for g, b, n, total in (
+        db.session.query(scores.c.g, bucket, db.func.count(), db.func.sum(scores.c.s))
+        .group_by(scores.c.g, bucket)
+    ):
+        d = out.setdefault(g, {"count": 0, "sum": 0.0, "histogram": [0] * len(BUCKET_LABELS)})
+        d["histogram"][min(max(int(b), 0), 9)] += n
+        d["count"] += n
+        d["sum"] += total
+
+    ranked = db.session.query(
+        scores.c.g, scores.c.s,
+        db.func.row_number().over(partition_by=scores.c.g, order_by=scores.c.s).label("rn"),
+        db.func.count().over(partition_by=scores.c.g).label("cnt"),
+    ).subquery()
+    # interpolation needs 1-based ranks lo+1 and lo+2 with lo = (cnt - 1) * k / 4 (integer division)
+    wanted = [ranked.c.rn == 1, ranked.c.rn == ranked.c.cnt]
+    for _, k in QUARTILES:
+        lo = (ranked.c.cnt - 1) * k // 4
+        wanted += [ranked.c.rn == lo + 1, ranked.c.rn == lo + 2]
+    at_rank = defaultdict(dict)
+    for g, score, rn, cnt in db.session.query(ranked).filter(db.or_(*wanted)):
+        at_rank[g][rn] = score
+
+    for g, d in out.items():
+        vals, n = at_rank[g], d["count"]
+        d["mean"] = round(d.pop("sum") / n, 2)
+        d["min"], d["max"] = vals.get(1), vals.get(n)
+        for name, k in QUARTILES:
+            lo, frac = divmod((n - 1) * k, 4)
+            a, b = vals.get(lo + 1), vals.get(lo + 2, vals.get(lo + 1))
+            d[name] = round(a + (b - a) * frac / 4, 2) if a is not None else None
+    return out
+
+
+@results_bp.route("/graphs/distribution")
+def score_distribution_graph():
+    """
+    Score histograms (10-point buckets) and min / quartiles / max for a batch.
+    Required: branch, year, semester. Optional: sub_code (one subject),
+    scope=overall (distribution of students' semester overall scores instead
+    of one per subject).
+    """
+    branch = (request.args.get("branch") or "").strip()
+    year = request.args.get("year")
+    semester = request.args.get("semester")
+    sub_code = (request.args.get("sub_code") or "").strip()
+    scope = (request.args.get("scope") or "subject").lower()
+
+    if not branch or not year or not semester or not year.isdigit() or not semester.isdigit():
+        return jsonify({"error": "branch, year, semester required"}), 400
+    year_i, sem_i = int(year), int(semester)
+
+    if scope == "overall":
+        S = StudentSemesterSummary
+        scores = (
+            db.session.query(db.literal("overall").label("g"), S.overall_score.label("s"))
+            .filter(S.branch == branch, S.exam_year == year_i, S.semester == sem_i, S.overall_score.isnot(None))
+            .subquery()
+        )
+        stats = _score_distribution(scores).get("overall")
+        return jsonify({
+            "branch": branch, "year": year_i, "semester": sem_i, "scope": "overall",
+            "bucket_labels": BUCKET_LABELS,
+            "students": stats
+        })
+
+    query = (
+        db.session.query(Mark.sub_code.label("g"), Mark.subject_score.label("s"))
+        .join(Student, Student.id == Mark.student_id)
+        .filter(Student.branch == branch, Student.exam_year == year_i, Mark.semester == sem_i,
+                Mark.subject_score.isnot(None))
+    )
+    if sub_code:
+        query = query.filter(Mark.sub_code == sub_code)
+    stats = _score_distribution(query.subquery())
+
+    names = dict(db.session.query(Subject.sub_code, Subject.sub_name).filter(Subject.sub_code.in_(list(stats))))
+    subjects = [dict(v, sub_code=k, sub_name=names.get(k, k)) for k, v in sorted(stats.items())]
+    return jsonify({
+        "branch": branch, "year": year_i, "semester": sem_i, "scope": "subject",
+        "bucket_labels": BUCKET_LABELS,
+        "subjects": subjects
+    })
+
+
 @results_bp.route("/graphs/risk_distribution")
 def risk_distribution_graph():
     """
@@ -500,13 +775,448 @@ def sgpa_trend_graph():
     if not student:
         return jsonify({"error": "Student not found"}), 404
 
-    trend = []
-    semesters = sorted({m.semester for m in Mark.query.filter_by(student_id=student.id).all()})
-    for sem in semesters:
-        overall, _, _ = _compute_student_score_for_sem(student, sem)
-        trend.append({"semester": sem, "overall_score": overall})
+    rows = (
+        StudentSemesterSummary.query
+        .filter_by(student_id=student.id)
+        .order_by(StudentSemesterSummary.semester)
+        .all()
+    )
+    trend = [{"semester": r.semester, "overall_score": r.overall_score} for r in rows]
 
     return jsonify({
         "student": {"pin": student.pin, "name": student.name, "branch": student.branch},
         "trend": trend
     })
+
+
+# -------------------------
+# Cohort comparison (grouped queries over persisted scores / summaries)
+# -------------------------
+COMPARE_MAX_COHORTS = 50
+
+
+def _parse_cohorts(values):
+    """['CS:2021:4', ...] -> [('CS', 2021, 4), ...] (order kept, duplicates dropped)."""
+    cohorts = []
+    for v in values:
+        parts = [p.strip() for p in (v or "").split(":")]
+        if len(parts) != 3 or not parts[0] or not parts[1].isdigit() or not parts[2].isdigit():
+            raise ValueError(f"bad cohort {v!r}, expected branch:year:semester")
+        key = (parts[0], int(parts[1]), int(parts[2]))
+        if key not in cohorts:
+            cohorts.append(key)
+    return cohorts
+
+
+@results_bp.route("/compare")
+def compare_cohorts():
+    """
+    Side-by-side statistics of several cohorts, e.g.
+    /api/results/compare?cohort=CS:2023:4&cohort=EC:2023:4
+    Three grouped queries however many cohorts are asked for.
+    """
+    try:
+        cohorts = _parse_cohorts(request.args.getlist("cohort"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not cohorts:
+        return jsonify({"error": "at least one cohort=branch:year:semester required"}), 400
+    if len(cohorts) > COMPARE_MAX_COHORTS:
+        return jsonify({"error": f"at most {COMPARE_MAX_COHORTS} cohorts"}), 400
+
+    S = StudentSemesterSummary
+    key = (S.branch, S.exam_year, S.semester)
+
+    def risk_count(level):
+        return db.func.sum(db.case((S.risk == level, 1), else_=0))
+
+    per_cohort = {
+        (r.branch, r.exam_year, r.semester): r for r in
+        db.session.query(
+            *key,
+            db.func.count(S.overall_score).label("scored_students"),
+            db.func.avg(S.overall_score).label("avg_score"),
+            db.func.avg(db.case((S.attendance_count > 0, S.attendance_sum / S.attendance_count))).label("avg_att"),
+            db.func.sum(S.pass_count).label("passes"),
+            db.func.sum(S.scored_count).label("scored_marks"),
+            db.func.sum(db.case((S.overall_score >= 40, 1), else_=0)).label("passed_students"),
+            risk_count("low").label("low"), risk_count("medium").label("medium"), risk_count("high").label("high"),
+        )
+        .filter(db.tuple_(*key).in_(cohorts))
+        .group_by(*key)
+    }
+
+    batches = sorted({(b, y) for b, y, _ in cohorts})
+    batch_sizes = dict(
+        ((r.branch, r.exam_year), r.n) for r in
+        db.session.query(Student.branch, Student.exam_year, db.func.count(Student.id).label("n"))
+        .filter(db.tuple_(Student.branch, Student.exam_year).in_(batches))
+        .group_by(Student.branch, Student.exam_year)
+    )
+
+    subjects = defaultdict(list)
+    score = Mark.subject_score
+    for r in (
+        db.session.query(
+            Student.branch, Student.exam_year, Mark.semester, Mark.sub_code, Subject.sub_name,
+            db.func.avg(score).label("average"),
+            db.func.count(score).label("count"),
+            db.func.sum(db.case((score >= 40, 1), else_=0)).label("passes"),
+        )
+        .join(Student, Student.id == Mark.student_id)
+        .outerjoin(Subject, Subject.sub_code == Mark.sub_code)
+        .filter(db.tuple_(Student.branch, Student.exam_year, Mark.semester).in_(cohorts))
+        .filter(score.isnot(None))
+        .group_by(Student.branch, Student.exam_year, Mark.semester, Mark.sub_code, Subject.sub_name)
+    ):
+        subjects[(r.branch, r.exam_year, r.semester)].append({
+            "sub_code": r.sub_code,
+            "sub_name": r.sub_name or r.sub_code,
+            "average": round(r.average, 2),
+            "pass_rate": round(r.passes / r.count * 100.0, 2),
+            "count": r.count
+        })
+
+    def pct(a, b):
+        return round(a / b * 100.0, 2) if b else None
+
+    out = []
+    for c in cohorts:
+        r = per_cohort.get(c)
+        total = batch_sizes.get(c[:2], 0)
+        scored = r.scored_students if r else 0
+        cards = sorted(subjects.get(c, []), key=lambda x: x["average"], reverse=True)
+        out.append({
+            "branch": c[0],
+            "year": c[1],
+            "semester": c[2],
+            "total_students": total,
+            "scored_students": scored,
+            "avg_class_performance": round(r.avg_score, 2) if r and r.avg_score is not None else None,
+            "avg_attendance": round(r.avg_att, 2) if r and r.avg_att is not None else None,
+            "pass_rate": pct(r.passes, r.scored_marks) if r else None,            # subject results >= 40
+            "student_pass_rate": pct(r.passed_students, scored) if r else None,   # overall score >= 40
+            "risk_counts": {
+                "low": int(r.low or 0) if r else 0,
+                "medium": int(r.medium or 0) if r else 0,
+                "high": int(r.high or 0) if r else 0,
+                "unknown": max(total - scored, 0)
+            },
+            "subjects": cards
+        })
+
+    return jsonify({"cohorts": out})
+
+
+# -------------------------
+# Early warning (reads only the nightly risk_snapshots)
+# -------------------------
+@results_bp.route("/risk/newly-at-risk")
+def newly_at_risk():
+    """
+    Students whose risk band got worse into an at-risk band since the previous
+    snapshot; students without a previous snapshot row (first snapshot, new
+    admissions) count as not at risk before. Optional: branch, year, date (YYYY-MM-DD, default latest snapshot),
+    level ("high" (default) or "medium" = medium and high count as at risk).
+    """
+    from datetime import date as date_cls
+    from app.models import RiskSnapshot
+    from app.risk_snapshots import latest_snapshot_date
+
+    branch = (request.args.get("branch") or "").strip()
+    year = request.args.get("year")
+    level = (request.args.get("level") or "high").lower()
+    if level not in ("high", "medium"):
+        return jsonify({"error": "level must be high or medium"}), 400
+    at_risk = ("high",) if level == "high" else ("medium", "high")
+
+    try:
+        day = date_cls.fromisoformat(request.args["date"]) if request.args.get("date") else latest_snapshot_date()
+    except ValueError:
+        return jsonify({"error": "date must be YYYY-MM-DD"}), 400
+    if day is None:
+        return jsonify({"error": "no risk snapshot yet; run `flask data snapshot-risk`"}), 404
+
+    R = RiskSnapshot
+    query = (
+        db.session.query(R, Student.pin, Student.name)
+        .join(Student, Student.id == R.student_id)
+        .filter(R.snapshot_date == day, R.risk.in_(at_risk),
+                db.or_(R.prev_risk.is_(None), R.prev_risk.notin_(at_risk)))
+    )
+    if branch:
+        query = query.filter(R.branch == branch)
+    if year and year.isdigit():
+        query = query.filter(R.exam_year == int(year))
+
+    items = [{
+        "pin": pin,
+        "name": name,
+        "branch": r.branch,
+        "exam_year": r.exam_year,
+        "semester": r.semester,
+        "overall_score": r.overall_score,
+        "risk": r.risk,
+        "prev_score": r.prev_score,
+        "prev_risk": r.prev_risk,
+        "score_change": r.score_change,
+        "subject_count": r.scored_count
+    } for r, pin, name in query.order_by(R.overall_score, Student.pin)]
+
+    prev_day = latest_snapshot_date(before=day)
+    return jsonify({
+        "date": day.isoformat(),
+        "previous_date": prev_day.isoformat() if prev_day else None,
+        "level": level,
+        "total": len(items),
+        "items": items
+    })
+
+
+# -------------------------
+# CGPA (reads the running aggregates kept by app/summaries.py)
+# -------------------------
+RANKING_MAX_LIMIT = 500
+
+
+def _semester_summary_json(r):
+    return {
+        "semester": r.semester,
+        "overall_score": r.overall_score,
+        "risk": r.risk,
+        "subject_count": r.mark_count,
+        "pass_count": r.pass_count,
+        "attendance": (r.attendance_sum / r.attendance_count) if r.attendance_count else None
+    }
+
+
+@results_bp.route("/cgpa")
+def student_cgpa():
+    """
+    Cumulative score of one student: CGPA (0-100, like overall_score), best and
+    worst semester, trend slope (score points per semester) and per-semester rows.
+    """
+    pin = (request.args.get("pin") or "").strip()
+    if not pin:
+        return jsonify({"error": "pin required"}), 400
+
+    student = Student.query.filter_by(pin=pin).first()
+    if not student:
+        return jsonify({"error": "Student not found"}), 404
+
+    cum = db.session.get(StudentCumulative, student.id)
+    semesters = (
+        StudentSemesterSummary.query
+        .filter_by(student_id=student.id)
+        .order_by(StudentSemesterSummary.semester)
+        .all()
+    )
+    return jsonify({
+        "student": {"pin": student.pin, "name": student.name, "branch": student.branch,
+                    "exam_year": student.exam_year},
+        "cgpa": cum.cgpa if cum else None,
+        "risk": map_risk(cum.cgpa) if cum and cum.cgpa is not None else None,
+        "subject_count": cum.scored_count if cum else 0,
+        "semester_count": cum.semester_count if cum else 0,
+        "best_semester": {"semester": cum.best_semester, "overall_score": cum.best_score}
+        if cum and cum.best_semester is not None else None,
+        "worst_semester": {"semester": cum.worst_semester, "overall_score": cum.worst_score}
+        if cum and cum.worst_semester is not None else None,
+        "trend_slope": cum.trend_slope if cum else None,
+        "semesters": [_semester_summary_json(r) for r in semesters]
+    })
+
+
+@results_bp.route("/cgpa/ranking")
+def cgpa_ranking():
+    """
+    Cohort ranking by CGPA (ties share a rank). Required: branch, year.
+    Optional: limit (default 50, max 500), offset.
+    """
+    branch = (request.args.get("branch") or "").strip()
+    year = request.args.get("year")
+    if not branch or not year or not year.isdigit():
+        return jsonify({"error": "branch and year required"}), 400
+    try:
+        limit = min(max(int(request.args.get("limit") or 50), 1), RANKING_MAX_LIMIT)
+        offset = max(int(request.args.get("offset") or 0), 0)
+    except ValueError:
+        return jsonify({"error": "limit and offset must be integers"}), 400
+
+    C = StudentCumulative
+    cohort = (C.branch == branch, C.exam_year == int(year), C.cgpa.isnot(None))
+    ranked = (
+        db.session.query(
+            C.student_id, C.cgpa, C.semester_count, C.trend_slope,
+            db.func.rank().over(order_by=C.cgpa.desc()).label("rank")
+        )
+        .filter(*cohort)
+        .subquery()
+    )
+    rows = (
+        db.session.query(ranked, Student.pin, Student.name)
+        .join(Student, Student.id == ranked.c.student_id)
+        .order_by(ranked.c.rank, Student.pin)
+        .limit(limit).offset(offset)
+        .all()
+    )
+    total = db.session.query(db.func.count(C.student_id)).filter(*cohort).scalar()
+
+    return jsonify({
+        "branch": branch,
+        "year": int(year),
+        "total": total,
+        "limit": limit,
+        "offset": offset,
+        "items": [{
+            "rank": r.rank,
+            "pin": r.pin,
+            "name": r.name,
+            "cgpa": r.cgpa,
+            "semester_count": r.semester_count,
+            "trend_slope": r.trend_slope
+        } for r in rows]
+    })
+
+
+# -------------------------
+# Leaderboard / watchlist
+# -------------------------
+LEADERBOARD_MAX_K = 200
+STREAM_BATCH = 1000
+
+_Ranked = namedtuple("_Ranked", "score pin name")
+
+
+def _heap_top_k(rows, k: int, top: bool):
+    """k best (top) or worst rows of an unordered stream of rows with .score and .pin: O(n log k)."""
+    if top:
+        return heapq.nsmallest(k, rows, key=lambda r: (-r.score, r.pin))
+    return heapq.nsmallest(k, rows, key=lambda r: (r.score, r.pin))
+
+
+def _counted(rows, counter: dict):
+    for r in rows:
+        counter["n"] += 1
+        yield r
+
+
+@results_bp.route("/leaderboard")
+def leaderboard():
+    """
+    Top k (order=top, default) or bottom k (order=bottom) students of a
+    cohort's semester by overall score; with sub_code, by that subject's score.
+    Required: branch, year, semester. Optional: k (default 10, max 200).
+
+    Semester rankings are read in order from ix_semester_summaries_cohort and
+    stop after k rows. Subject rankings, and semesters whose summaries have
+    not been built yet, keep the k best of the streamed scores in a heap.
+    Students with invalid PINs are left out of both, and of total, as in the
+    other listings.
+    """
+    branch = (request.args.get("branch") or "").strip()
+    year, semester = request.args.get("year") or "", request.args.get("semester") or ""
+    sub_code = (request.args.get("sub_code") or "").strip() or None
+    order = (request.args.get("order") or "top").lower()
+    if not branch or not year.isdigit() or not semester.isdigit():
+        return jsonify({"error": "branch, year and semester required"}), 400
+    if order not in ("top", "bottom"):
+        return jsonify({"error": "order must be top or bottom"}), 400
+    try:
+        k = min(max(int(request.args.get("k") or 10), 1), LEADERBOARD_MAX_K)
+    except ValueError:
+        return jsonify({"error": "k must be an integer"}), 400
+    year_i, sem_i, top = int(year), int(semester), order == "top"
+
+    S = StudentSemesterSummary
+    rows, total, source, summarized = [], 0, "index", 0
+    if sub_code is None:
+        cohort = (S.branch == branch, S.exam_year == year_i, S.semester == sem_i, S.overall_score.isnot(None))
+        summarized = db.session.query(db.func.count()).select_from(S).filter(*cohort).scalar()
+        if summarized:
+            # invalid PINs are rare: find them among the few candidates SQL can spot, and over-fetch by that many
+            invalid = {
+                p for (p,) in db.session.query(Student.pin).join(S, S.student_id == Student.id)
+                .filter(*cohort, _maybe_invalid_pin(Student.pin)) if not _is_pin_valid(p)
+            }
+            total = summarized - len(invalid)
+            ranked = (
+                db.session.query(S.overall_score.label("score"), Student.pin, Student.name)
+                .join(Student, Student.id == S.student_id)
+                .filter(*cohort)
+                .order_by(S.overall_score.desc() if top else S.overall_score.asc(), Student.pin)
+                .limit(k + len(invalid))
+            )
+            rows = [r for r in ranked if r.pin not in invalid][:k]
+    if sub_code is not None or not summarized:
+        # heap over streamed scores: one subject's marks, or per-student means of the semester's marks
+        source, counter = "heap", {"n": 0}
+        filters = (Student.branch == branch, Student.exam_year == year_i, Mark.semester == sem_i,
+                   Mark.subject_score.isnot(None))
+        if sub_code:
+            stream = (db.session.query(Mark.subject_score.label("score"), Student.pin, Student.name)
+                      .join(Student, Student.id == Mark.student_id)
+                      .filter(*filters, Mark.sub_code == sub_code)
+                      .yield_per(STREAM_BATCH))
+        else:
+            sums = (db.session.query(Student.pin, Student.name, db.func.sum(Mark.subject_score),
+                                     db.func.count(Mark.subject_score))
+                    .join(Student, Student.id == Mark.student_id)
+                    .filter(*filters)
+                    .group_by(Student.id, Student.pin, Student.name))
+            # overall_score as app/summaries.py rounds it
+            stream = (_Ranked(round(score_sum / n, 2), pin, name)
+                      for pin, name, score_sum, n in sums.yield_per(STREAM_BATCH))
+        rows = _heap_top_k(_counted((r for r in stream if _is_pin_valid(r.pin)), counter), k, top)
+        total = counter["n"]
+
+    items, rank = [], 0
+    for i, r in enumerate(rows):
+        if i == 0 or r.score != rows[i - 1].score:
+            rank = i + 1  # ties share a rank
+        items.append({"rank": rank, "pin": r.pin, "name": r.name, "score": r.score,
+                      "risk": map_risk(r.score)})
+
+    return jsonify({
+        "branch": branch,
+        "year": year_i,
+        "semester": sem_i,
+        "sub_code": sub_code,
+        "order": order,
+        "k": k,
+        "total": total,
+        "source": source,
+        "items": items
+    })
+
+
+# -------------------------
+# End-semester projection
+# -------------------------
+@results_bp.route("/projection")
+def end_sem_projection():
+    """
+    For each subject without an end_sem mark yet: the end_sem mark needed to
+    pass (40) and to reach each grade band, per student. Required: branch.
+    Optional: year, semester, sub_code.
+    """
+    from app.projection import TARGETS, project_cohort
+
+    branch = (request.args.get("branch") or "").strip()
+    year, semester = request.args.get("year") or "", request.args.get("semester") or ""
+    sub_code = (request.args.get("sub_code") or "").strip() or None
+    if not branch:
+        return jsonify({"error": "branch required"}), 400
+    if (year and not year.isdigit()) or (semester and not semester.isdigit()):
+        return jsonify({"error": "year and semester must be numbers"}), 400
+    year_i = int(year) if year else None
+    sem_i = int(semester) if semester else None
+
+    return jsonify({
+        "branch": branch,
+        "year": year_i,
+        "semester": sem_i,
+        "sub_code": sub_code,
+        "targets": dict(TARGETS),
+        **project_cohort(branch, year_i, sem_i, sub_code)
+    })
@@ -0,0 +1,85 @@
+# app/risk_snapshots.py
+"""
+Dated early-warning risk snapshots.
+
+`flask data snapshot-risk` (run nightly from cron, e.g.
+`30 2 * * *  cd /srv/app && flask data snapshot-risk`) records, for every student
+of an active cohort, the overall score and risk of their latest semester with
+scores. Scores come from the persisted subject scores, which compute_subject_score
+re-weights over whatever components exist, so students are flagged right after
+mid-1. Each row also stores the change against the student's previous snapshot
+(NULL when the student has none, e.g. first snapshot or a new admission); the
+"newly at risk" endpoint reads nothing else and counts a NULL prev_risk as
+not at risk before.
+"""
+from datetime import date
+from typing import Dict, Optional
+
+from sqlalchemy import delete, func, insert, select
+
+from app import db
+from app.models import RiskSnapshot, StudentSemesterSummary
+
+RISK_RANK = {"low": 0, "medium": 1, "high": 2}
+
+
+def latest_snapshot_date(before: Optional[date] = None) -> Optional[date]:
+    q = db.session.query(func.max(RiskSnapshot.snapshot_date))
+    if before is not None:
+        q = q.filter(RiskSnapshot.snapshot_date < before)
+    return q.scalar()
+
+
+def take_snapshot(day: Optional[date] = None, active_years: int = 3) -> Dict:
+    """
+    Write the snapshot of `day` (default today), replacing one taken earlier
+    the same day. Cohorts with exam_year older than `active_years` are skipped.
+    """
+    day = day or date.today()
+    S = StudentSemesterSummary
+    latest = (
+        select(
+            S.student_id, S.branch, S.exam_year, S.semester, S.scored_count, S.overall_score, S.risk,
+            func.row_number().over(partition_by=S.student_id, order_by=S.semester.desc()).label("rn"),
+        )
+        .where(S.overall_score.isnot(None))
+        .where(S.exam_year >= day.year - active_years)
+        .subquery()
+    )
+    current = db.session.execute(select(latest).where(latest.c.rn == 1)).all()
+
+    prev_day = latest_snapshot_date(before=day)
+    previous = {}
+    if prev_day is not None:
+        previous = {
+            r.student_id: r for r in db.session.execute(
+                select(RiskSnapshot.student_id, RiskSnapshot.overall_score, RiskSnapshot.risk)
+                .where(RiskSnapshot.snapshot_date == prev_day)
+            )
+        }
+
+    rows = []
+    for r in current:
+        p = previous.get(r.student_id)
+        rows.append({
+            "snapshot_date": day, "student_id": r.student_id, "branch": r.branch, "exam_year": r.exam_year,
+            "semester": r.semester, "scored_count": r.scored_count,
+            "overall_score": r.overall_score, "risk": r.risk,
+            "prev_score": p.overall_score if p else None,
+            "prev_risk": p.risk if p else None,
+            "score_change": round(r.overall_score - p.overall_score, 2) if p else None,
+            "risk_change": RISK_RANK[r.risk] - RISK_RANK[p.risk] if p else None,
+        })
+
+    try:
+        db.session.execute(delete(RiskSnapshot).where(RiskSnapshot.snapshot_date == day))
+        for i in range(0, len(rows), 5000):
+            db.session.execute(insert(RiskSnapshot), rows[i:i + 5000])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    worse = sum(1 for r in rows if (r["risk_change"] or 0) > 0)
+    return {"date": day.isoformat(), "previous": prev_day.isoformat() if prev_day else None,
+            "students": len(rows), "worse": worse}
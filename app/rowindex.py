@@ -0,0 +1,197 @@
+# app/rowindex.py
+"""
+Random access to the rows of an uploaded file.
+
+CSV files get a sidecar index of record byte offsets, built on first access.
+Excel workbooks (and compressed CSV blobs, which can't be seeked cheaply) are
+converted once into a JSON-lines row store with the same kind of index. A page of rows is then one seek + one read regardless of how
+deep into the file it is.
+"""
+import os
+import io
+import csv
+import glob
+import json
+from array import array
+from typing import List
+
+from flask import current_app
+
+from app.models import UploadedFile
+from app.previews import get_preview
+from app.storage import blob_encoding, open_blob, upload_ext
+
+# one unsigned 64-bit offset per record, plus an end-of-data sentinel
+OFFSET_TYPE = "Q"
+OFFSET_SIZE = array(OFFSET_TYPE).itemsize
+
+
+def get_cache_dir() -> str:
+    cfg = current_app.config.get("FILE_CACHE_FOLDER")
+    if cfg:
+        return os.path.abspath(cfg)
+    project_root = os.path.abspath(os.path.join(current_app.root_path, ".."))
+    return os.path.join(project_root, "cache", "files")
+
+
+def _write_atomic(path: str, writer) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as fh:
+        writer(fh)
+    os.replace(tmp, path)
+
+
+def _drop_stale(cache_dir: str, file_id: int, keep_prefix: str) -> None:
+    """Remove sidecars left behind by earlier versions of the same upload."""
+    for old in glob.glob(os.path.join(cache_dir, f"{file_id}-*")):
+        if not os.path.basename(old).startswith(keep_prefix):
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+
+# ---------------------------
+# Index builders
+# ---------------------------
+def build_csv_index(path: str, quotechar: str = '"') -> array:
+    """
+    Byte offset of every CSV record (header included) followed by the file size.
+    A newline inside a quoted cell does not end a record: a line with an odd
+    number of quote characters toggles the "inside quotes" state.
+    """
+    q = (quotechar or '"').encode()
+    offsets = array(OFFSET_TYPE)
+    pos, record_start, in_quotes = 0, 0, False
+    with open(path, "rb") as fh:
+        for line in fh:
+            if not in_quotes:
+                record_start = pos
+            if line.count(q) % 2:
+                in_quotes = not in_quotes
+            pos += len(line)
+            if not in_quotes:
+                offsets.append(record_start)
+    if in_quotes:  # unterminated quote: treat the tail as one last record
+        offsets.append(record_start)
+    offsets.append(pos)
+    return offsets
+
+
+def _write_jsonl_rows(rows, dest_fh) -> array:
+    offsets = array(OFFSET_TYPE)
+    pos = 0
+    for row in rows:
+        line = (json.dumps(row, ensure_ascii=False) + "\n").encode("utf-8")
+        offsets.append(pos)
+        dest_fh.write(line)
+        pos += len(line)
+    offsets.append(pos)
+    return offsets
+
+
+def convert_csv_rows(src: str, dest_fh, encoding: str, delimiter: str, quotechar: str) -> array:
+    """Stream a (compressed) CSV blob into a JSON-lines row store; return the offsets."""
+    with io.TextIOWrapper(open_blob(src), encoding=encoding or "utf-8", errors="replace", newline="") as fh:
+        return _write_jsonl_rows(csv.reader(fh, delimiter=delimiter or ",", quotechar=quotechar or '"'), dest_fh)
+
+
+def convert_xlsx_rows(src: str, dest_fh) -> array:
+    """Write every row of the active sheet as a JSON line into `dest_fh`; return the offsets."""
+    import openpyxl
+
+    wb = openpyxl.load_workbook(src, read_only=True, data_only=True)
+    try:
+        rows = ([("" if v is None else str(v)) for v in row] for row in wb.active.iter_rows(values_only=True))
+        return _write_jsonl_rows(rows, dest_fh)
+    finally:
+        wb.close()
+
+
+# ---------------------------
+# Row store
+# ---------------------------
+class RowStore:
+    """Rows of one file, addressed by data-row number (the header is row -1)."""
+
+    def __init__(self, data_path: str, index_path: str, kind: str,
+                 encoding: str = "utf-8", delimiter: str = ",", quotechar: str = '"'):
+        self.data_path = data_path
+        self.index_path = index_path
+        self.kind = kind  # 'csv' or 'jsonl'
+        self.encoding = encoding or "utf-8"
+        self.delimiter = delimiter or ","
+        self.quotechar = quotechar or '"'
+
+    def __len__(self) -> int:
+        # entries = header + data rows + sentinel
+        return max(os.path.getsize(self.index_path) // OFFSET_SIZE - 2, 0)
+
+    def _offsets(self, first: int, last: int):
+        """Return the byte offsets of index entries `first` and `last` (two seeks, no full load)."""
+        out = []
+        with open(self.index_path, "rb") as fh:
+            for k in (first, last):
+                fh.seek(k * OFFSET_SIZE)
+                a = array(OFFSET_TYPE)
+                a.fromfile(fh, 1)
+                out.append(a[0])
+        return out
+
+    def page(self, offset: int, limit: int) -> List[List[str]]:
+        total = len(self)
+        if offset >= total or limit <= 0:
+            return []
+        end = min(offset + limit, total)
+        # data row i is index entry i + 1 (entry 0 is the header)
+        start_b, end_b = self._offsets(offset + 1, end + 1)
+        with open(self.data_path, "rb") as fh:
+            fh.seek(start_b)
+            chunk = fh.read(end_b - start_b)
+
+        if self.kind == "jsonl":
+            return [json.loads(line) for line in chunk.decode("utf-8").split("\n") if line]
+
+        encoding = "utf-8" if self.encoding == "utf-8-sig" else self.encoding
+        text = chunk.decode(encoding, errors="replace")
+        return list(csv.reader(io.StringIO(text, newline=""), delimiter=self.delimiter, quotechar=self.quotechar))
+
+
+def open_row_store(uploaded: UploadedFile, path: str) -> RowStore:
+    """
+    Return a RowStore for `path`, building the sidecar index (CSV) or row-store
+    conversion (Excel) on first access. Sidecars are keyed by (file id, size, mtime).
+    """
+    st = os.stat(path)
+    cache_dir = get_cache_dir()
+    os.makedirs(cache_dir, exist_ok=True)
+    prefix = f"{uploaded.id}-{st.st_size}-{st.st_mtime_ns}"
+    index_path = os.path.join(cache_dir, prefix + ".idx")
+    rows_path = os.path.join(cache_dir, prefix + ".jsonl")
+    ext = upload_ext(uploaded, path)
+
+    def jsonl_store(convert):
+        if not (os.path.exists(index_path) and os.path.exists(rows_path)):
+            _drop_stale(cache_dir, uploaded.id, prefix)
+            holder = {}
+            _write_atomic(rows_path, lambda fh: holder.setdefault("offsets", convert(fh)))
+            _write_atomic(index_path, holder["offsets"].tofile)
+        return RowStore(rows_path, index_path, "jsonl")
+
+    if ext in (".xls", ".xlsx"):
+        return jsonl_store(lambda fh: convert_xlsx_rows(path, fh))
+
+    # CSV: the cached preview already knows the dialect
+    preview = get_preview(uploaded, path)
+    if blob_encoding(path) != "identity":
+        return jsonl_store(lambda fh: convert_csv_rows(path, fh, preview.encoding, preview.delimiter, preview.quotechar))
+    if not os.path.exists(index_path):
+        _drop_stale(cache_dir, uploaded.id, prefix)
+        offsets = build_csv_index(path, preview.quotechar)
+        _write_atomic(index_path, offsets.tofile)
+    return RowStore(path, index_path, "csv", preview.encoding, preview.delimiter, preview.quotechar)
+
+
+def discard_row_store(file_id: int) -> None:
+    """Remove every sidecar of an upload (used when the upload is deleted)."""
+    _drop_stale(get_cache_dir(), file_id, keep_prefix="\0")
@@ -0,0 +1,143 @@
+# app/storage.py
+"""
+Content-addressable storage for uploads.
+
+Every upload is stored once under its sha256, in sharded subdirectories of
+BLOB_FOLDER:  <BLOB_FOLDER>/ab/cd/abcd…ef[.gz|.zst]
+Byte-identical uploads share one blob. CSVs can be compressed at rest
+(UPLOAD_COMPRESSION = "gzip" / "zstd"); readers get a decompressing stream.
+"""
+import os
+import gzip
+import shutil
+import hashlib
+import tempfile
+import importlib.util
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+from flask import current_app
+
+# optional zstd support (imported on first use)
+HAVE_ZSTD = importlib.util.find_spec("zstandard") is not None
+
+CHUNK_SIZE = 1024 * 1024
+SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+
+def get_blob_dir() -> str:
+    cfg = current_app.config.get("BLOB_FOLDER")
+    if cfg:
+        return os.path.abspath(cfg)
+    uploads = current_app.config.get("UPLOAD_FOLDER") or os.path.join(current_app.root_path, "..", "uploads")
+    return os.path.join(os.path.abspath(uploads), "blobs")
+
+
+def blob_relpath(digest: str, encoding: str = "identity") -> str:
+    return os.path.join(digest[:2], digest[2:4], digest + SUFFIXES.get(encoding, ""))
+
+
+def blob_encoding(path: str) -> str:
+    """Content coding of a stored file, from its suffix: 'gzip', 'zstd' or 'identity'."""
+    for encoding, suffix in SUFFIXES.items():
+        if path.endswith(suffix):
+            return encoding
+    return "identity"
+
+
+def _find_blob(root: str, digest: str) -> Optional[str]:
+    for encoding in ("identity", "gzip", "zstd"):
+        rel = blob_relpath(digest, encoding)
+        if os.path.exists(os.path.join(root, rel)):
+            return rel
+    return None
+
+
+def _choose_encoding(filename: str) -> str:
+    """Compression to use at rest for a new blob (only CSVs are worth compressing)."""
+    wanted = (current_app.config.get("UPLOAD_COMPRESSION") or "").lower()
+    if not wanted or os.path.splitext(filename or "")[1].lower() != ".csv":
+        return "identity"
+    if wanted == "zstd" and not HAVE_ZSTD:
+        current_app.logger.warning("UPLOAD_COMPRESSION=zstd but 'zstandard' is not installed; using gzip")
+        return "gzip"
+    return wanted if wanted in SUFFIXES else "identity"
+
+
+def _compress(src: str, dest: str, encoding: str) -> None:
+    tmp = f"{dest}.{os.getpid()}.tmp"
+    with open(src, "rb") as fin:
+        if encoding == "zstd":
+            import zstandard
+            with open(tmp, "wb") as raw:
+                zstandard.ZstdCompressor(level=10).copy_stream(fin, raw)
+        else:
+            with gzip.open(tmp, "wb", compresslevel=6) as fout:
+                shutil.copyfileobj(fin, fout, CHUNK_SIZE)
+    os.replace(tmp, dest)
+
+
+def store_upload(stream: BinaryIO, filename: str) -> Tuple[str, str, int]:
+    """
+    Store the bytes of `stream` and return (sha256 hex, blob path relative to
+    the blob folder, size in bytes). An identical blob is reused, not rewritten.
+    """
+    root = get_blob_dir()
+    os.makedirs(root, exist_ok=True)
+
+    h, size = hashlib.sha256(), 0
+    with tempfile.NamedTemporaryFile(dir=root, prefix=".incoming-", delete=False) as tmp:
+        for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+            tmp.write(chunk)
+            size += len(chunk)
+    digest = h.hexdigest()
+
+    try:
+        existing = _find_blob(root, digest)
+        if existing:
+            return digest, existing, size
+
+        encoding = _choose_encoding(filename)
+        rel = blob_relpath(digest, encoding)
+        dest = os.path.join(root, rel)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        if encoding == "identity":
+            os.replace(tmp.name, dest)
+        else:
+            _compress(tmp.name, dest, encoding)
+        return digest, rel, size
+    finally:
+        if os.path.exists(tmp.name):
+            os.remove(tmp.name)
+
+
+def store_path(path: str, filename: Optional[str] = None) -> Tuple[str, str, int]:
+    """store_upload() for a file already on disk (used when migrating legacy uploads)."""
+    with open(path, "rb") as fh:
+        return store_upload(fh, filename or os.path.basename(path))
+
+
+def open_blob(path: str) -> BinaryIO:
+    """Open a stored file for reading, transparently decompressing it."""
+    encoding = blob_encoding(path)
+    if encoding == "gzip":
+        return gzip.open(path, "rb")
+    if encoding == "zstd":
+        if not HAVE_ZSTD:
+            raise RuntimeError("reading .zst blobs requires the 'zstandard' package")
+        import zstandard
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+    return open(path, "rb")
+
+
+def iter_blob(path: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Yield the decompressed content of a stored file in chunks."""
+    with open_blob(path) as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            yield chunk
+
+
+def upload_ext(uploaded, path: str) -> str:
+    """Extension that decides how an upload is parsed (blobs are named by hash, not by file name)."""
+    name = (uploaded.original_file_name or uploaded.file_name) if uploaded.blob_path else path
+    return os.path.splitext(name or "")[1].lower()
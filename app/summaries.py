@@ -0,0 +1,245 @@
+# app/summaries.py
+"""
+Running per-student aggregates behind CGPA, rankings and cohort statistics.
+
+  student_semester_summaries   per (student, semester): counts and sums over
+                               that semester's marks, overall score and risk
+  student_cumulative           per student: totals over every semester, CGPA,
+                               best / worst semester and the score trend
+
+Marks changed through the ORM are scored on flush with their subject's weight
+profile (app/weights.py; subject_score and risk are persisted on the row), and the summary rows of the affected (student, semester)
+pairs are refreshed right before the commit, in the same transaction. Reading a
+CGPA or a semester score is then a primary-key lookup.
+
+Bulk Core inserts / updates of marks bypass the ORM: call refresh_students()
+afterwards, or run `flask data rebuild-summaries`.
+"""
+from collections import defaultdict
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import case, delete, event, func, insert, or_, select, tuple_, update
+from sqlalchemy.orm import attributes
+
+from app import db
+from app.changes import touch
+from app.models import Mark, Student, StudentCumulative, StudentSemesterSummary
+from app.utils import compute_subject_score, map_risk
+from app.events import publish
+from app.weights import Profile, resolve_profiles
+
+SCORE_FIELDS = ("attendance", "mid1", "mid2", "internal", "end_sem")
+PASS_SCORE = 40.0
+CHUNK = 500  # (student, semester) pairs per statement
+
+
+# ---------------------------
+# Scoring
+# ---------------------------
+def score_components(components: Dict[str, Optional[float]], profile: Optional[Profile] = None) -> Optional[float]:
+    """compute_subject_score(), or None when no component has been entered yet."""
+    if all(components.get(k) is None for k in SCORE_FIELDS):
+        return None
+    return compute_subject_score(components, *(profile or ()))
+
+
+def score_mark(mark: Mark, profile: Optional[Profile] = None) -> None:
+    mark.subject_score = score_components({k: getattr(mark, k) for k in SCORE_FIELDS}, profile)
+    mark.risk = map_risk(mark.subject_score) if mark.subject_score is not None else None
+
+
+def backfill_scores() -> int:
+    """Persist subject_score / risk on marks that have components but no score yet."""
+    rows = db.session.execute(
+        select(Mark.id, Mark.sub_code, *[getattr(Mark, k) for k in SCORE_FIELDS])
+        .where(Mark.subject_score.is_(None))
+        .where(or_(*[getattr(Mark, k).isnot(None) for k in SCORE_FIELDS]))
+    ).all()
+    profiles = resolve_profiles(db.session, {row.sub_code for row in rows})
+    updates = []
+    for row in rows:
+        score = score_components(row._mapping, profiles[row.sub_code])
+        updates.append({"id": row.id, "subject_score": score, "risk": map_risk(score)})
+    if updates:
+        db.session.execute(update(Mark), updates)
+        touch(db.session, Mark, [u["id"] for u in updates])
+    return len(updates)
+
+
+# ---------------------------
+# Refresh
+# ---------------------------
+def _trend_slope(points: List[Tuple[int, float]]) -> Optional[float]:
+    """Least-squares slope of overall score against semester number."""
+    n = len(points)
+    if n < 2:
+        return None
+    sx = sum(x for x, _ in points)
+    sy = sum(y for _, y in points)
+    sxy = sum(x * y for x, y in points)
+    sxx = sum(x * x for x, _ in points)
+    den = n * sxx - sx * sx
+    return round((n * sxy - sx * sy) / den, 3) if den else None
+
+
+def _semester_rows(session, where) -> List[dict]:
+    score = Mark.subject_score
+    stmt = (
+        select(
+            Mark.student_id, Mark.semester, Student.branch, Student.exam_year,
+            func.count(Mark.id).label("mark_count"),
+            func.count(score).label("scored_count"),
+            func.coalesce(func.sum(score), 0.0).label("score_sum"),
+            func.coalesce(func.sum(case((score >= PASS_SCORE, 1), else_=0)), 0).label("pass_count"),
+            func.coalesce(func.sum(Mark.attendance), 0.0).label("attendance_sum"),
+            func.count(Mark.attendance).label("attendance_count"),
+        )
+        .join(Student, Student.id == Mark.student_id)
+        .group_by(Mark.student_id, Mark.semester, Student.branch, Student.exam_year)
+    )
+    if where is not None:
+        stmt = stmt.where(where)
+    out = []
+    for row in session.execute(stmt):
+        r = dict(row._mapping)
+        r["overall_score"] = round(r["score_sum"] / r["scored_count"], 2) if r["scored_count"] else None
+        r["risk"] = map_risk(r["overall_score"]) if r["overall_score"] is not None else None
+        out.append(r)
+    return out
+
+
+def _cumulative_rows(session, student_ids: Optional[Iterable[int]]) -> List[dict]:
+    S = StudentSemesterSummary
+    stmt = select(S).order_by(S.student_id, S.semester)
+    if student_ids is not None:
+        stmt = stmt.where(S.student_id.in_(list(student_ids)))
+    per_student = defaultdict(list)
+    for (s,) in session.execute(stmt):
+        per_student[s.student_id].append(s)
+
+    out = []
+    for sid, sems in per_student.items():
+        scored = [s for s in sems if s.overall_score is not None]
+        score_sum = sum(s.score_sum for s in sems)
+        scored_count = sum(s.scored_count for s in sems)
+        best = max(scored, key=lambda s: (s.overall_score, -s.semester), default=None)
+        worst = min(scored, key=lambda s: (s.overall_score, s.semester), default=None)
+        out.append({
+            "student_id": sid, "branch": sems[-1].branch, "exam_year": sems[-1].exam_year,
+            "semester_count": len(sems), "scored_count": scored_count, "score_sum": score_sum,
+            "cgpa": round(score_sum / scored_count, 2) if scored_count else None,
+            "best_semester": best.semester if best else None, "best_score": best.overall_score if best else None,
+            "worst_semester": worst.semester if worst else None, "worst_score": worst.overall_score if worst else None,
+            "trend_slope": _trend_slope([(s.semester, s.overall_score) for s in scored]),
+        })
+    return out
+
+
+def refresh_summaries(session, pairs: Iterable[Tuple[int, int]] = (), student_ids: Iterable[int] = ()) -> None:
+    """
+    Recompute the semester rows of the given (student_id, semester) pairs and of
+    every semester of `student_ids`, then the cumulative rows of all of them.
+    """
+    whole = set(student_ids)
+    pairs = sorted({p for p in pairs if p[0] is not None and p[0] not in whole})
+    S = StudentSemesterSummary
+
+    for i in range(0, len(pairs), CHUNK):
+        chunk = pairs[i:i + CHUNK]
+        session.execute(delete(S).where(tuple_(S.student_id, S.semester).in_(chunk)))
+        rows = _semester_rows(session, tuple_(Mark.student_id, Mark.semester).in_(chunk))
+        if rows:
+            session.execute(insert(S), rows)
+    whole_list = sorted(whole)
+    for i in range(0, len(whole_list), CHUNK):
+        chunk = whole_list[i:i + CHUNK]
+        session.execute(delete(S).where(S.student_id.in_(chunk)))
+        rows = _semester_rows(session, Mark.student_id.in_(chunk))
+        if rows:
+            session.execute(insert(S), rows)
+
+    students = sorted(whole | {sid for sid, _ in pairs})
+    for i in range(0, len(students), CHUNK):
+        chunk = students[i:i + CHUNK]
+        session.execute(delete(StudentCumulative).where(StudentCumulative.student_id.in_(chunk)))
+        rows = _cumulative_rows(session, chunk)
+        if rows:
+            session.execute(insert(StudentCumulative), rows)
+
+
+def refresh_students(student_ids: Iterable[int]) -> None:
+    """Refresh every summary row of `student_ids` (after Core-level mark writes); no commit."""
+    refresh_summaries(db.session, student_ids=student_ids)
+
+
+def rebuild_summaries() -> Dict[str, int]:
+    """Backfill missing scores and recompute every summary row from the marks table; commits."""
+    try:
+        scored = backfill_scores()
+        db.session.execute(delete(StudentCumulative))
+        db.session.execute(delete(StudentSemesterSummary))
+        rows = _semester_rows(db.session, None)
+        for i in range(0, len(rows), 5000):
+            db.session.execute(insert(StudentSemesterSummary), rows[i:i + 5000])
+        cumulative = _cumulative_rows(db.session, None)
+        for i in range(0, len(cumulative), 5000):
+            db.session.execute(insert(StudentCumulative), cumulative[i:i + 5000])
+        publish(db.session, [(None, None, None)], "rebuild")
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return {"scored": scored, "semester_rows": len(rows), "students": len(cumulative)}
+
+
+# ---------------------------
+# ORM hooks
+# ---------------------------
+def _old_value(obj, attr):
+    hist = attributes.get_history(obj, attr)
+    return hist.deleted[0] if hist.deleted else getattr(obj, attr)
+
+
+@event.listens_for(db.session, "before_flush")
+def _score_changed_marks(session, flush_context, instances):
+    marks = [
+        obj for obj in chain(session.new, session.dirty)
+        if isinstance(obj, Mark) and (obj in session.new or any(
+            attributes.get_history(obj, k).has_changes() for k in SCORE_FIELDS + ("sub_code",)))
+    ]
+    if not marks:
+        return
+    with session.no_autoflush:
+        profiles = resolve_profiles(session, {m.sub_code for m in marks})
+    for obj in marks:
+        score_mark(obj, profiles.get(obj.sub_code))
+
+
+@event.listens_for(db.session, "after_flush")
+def _collect_changed_marks(session, flush_context):
+    pairs: Set[Tuple[int, int]] = session.info.setdefault("summary_pairs", set())
+    students: Set[int] = session.info.setdefault("summary_students", set())
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Mark):
+            pairs.add((obj.student_id, obj.semester))
+            pairs.add((_old_value(obj, "student_id"), _old_value(obj, "semester")))
+        elif isinstance(obj, Student) and obj not in session.new:
+            if obj in session.deleted or any(attributes.get_history(obj, k).has_changes()
+                                             for k in ("branch", "exam_year")):
+                students.add(obj.id)
+
+
+@event.listens_for(db.session, "before_commit")
+def _refresh_before_commit(session):
+    session.flush()
+    pairs = session.info.pop("summary_pairs", None)
+    students = session.info.pop("summary_students", None)
+    if pairs or students:
+        refresh_summaries(session, pairs or (), students or ())
+
+
+@event.listens_for(db.session, "after_rollback")
+def _forget_changed_marks(session):
+    session.info.pop("summary_pairs", None)
+    session.info.pop("summary_students", None)
@@ -11,16 +11,27 @@ DEFAULT_WEIGHTS = {
     'end_sem': 0.40
 }
 
+# full marks per component; per-branch / per-subject overrides live in weight
+# profiles (app/weights.py)
+DEFAULT_MAX_VALUES = {
+    'attendance': 100.0,
+    'mid1': 20.0,
+    'mid2': 20.0,
+    'internal': 20.0,
+    'end_sem': 40.0
+}
+
 def normalize_component(value: Optional[float], max_value: float) -> Optional[float]:
     if value is None:
         return None
     return (value / max_value) * 100.0
 
-def compute_subject_score(components: Dict[str, Optional[float]], weights: Dict[str, float] = None) -> float:
+def compute_subject_score(components: Dict[str, Optional[float]], weights: Dict[str, float] = None,
+                          max_values: Dict[str, float] = None) -> float:
     if weights is None:
         weights = DEFAULT_WEIGHTS.copy()
-
-    max_values = {'attendance': 100.0, 'mid1': 20.0, 'mid2': 20.0, 'internal': 20.0, 'end_sem': 40.0}
+    if max_values is None:
+        max_values = DEFAULT_MAX_VALUES
 
     # compute percent per component (or None)
     perc = {}
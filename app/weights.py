@@ -0,0 +1,262 @@
+# app/weights.py
+"""
+Per-branch and per-subject weight profiles, and the re-scoring that follows a
+profile change.
+
+A mark is scored with the profile of its subject, else the profile of the
+subject's branch, else DEFAULT_WEIGHTS / DEFAULT_MAX_VALUES (app/utils.py).
+Marks written through the ORM pick their profile up on flush (app/summaries.py).
+
+Saving or deleting a profile queues a ScoreRecompute for just the subjects it
+governs. The recompute runs in a background thread: it reads those marks in id
+order, CHUNK at a time, scores each chunk with numpy and stages the scores that
+differ in staged_scores. Reads keep seeing the old scores until the swap, one
+transaction that copies the staged scores into marks and refreshes the affected
+students' summaries. Marks edited after they were read are left alone (the
+flush hook already scored them with the new profile), and a recompute whose
+profiles changed again while it ran gives way to the newer one.
+"""
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import bindparam, delete, func, insert, or_, select, update
+
+from app import db
+from app.models import Mark, ScoreRecompute, StagedScore, Subject, WeightProfile
+from app.utils import DEFAULT_MAX_VALUES, DEFAULT_WEIGHTS, map_risk
+
+COMPONENTS = tuple(DEFAULT_WEIGHTS)   # column order of the score matrices
+CHUNK = 5000                          # marks per read / staging round trip
+
+Profile = Tuple[Dict[str, float], Dict[str, float]]   # (weights, max_values)
+DEFAULT_PROFILE: Profile = (dict(DEFAULT_WEIGHTS), dict(DEFAULT_MAX_VALUES))
+
+
+# ---------------------------
+# Profiles
+# ---------------------------
+def validate_profile(weights: Optional[dict], max_values: Optional[dict]) -> Profile:
+    """Complete a (partial) profile from the defaults; raise ValueError if it is unusable."""
+    weights, max_values = weights or {}, max_values or {}
+    unknown = (set(weights) | set(max_values)) - set(COMPONENTS)
+    if unknown:
+        raise ValueError(f"unknown component(s): {', '.join(sorted(unknown))}")
+    try:
+        w = {k: float(weights.get(k, DEFAULT_WEIGHTS[k])) for k in COMPONENTS}
+        m = {k: float(max_values.get(k, DEFAULT_MAX_VALUES[k])) for k in COMPONENTS}
+    except (TypeError, ValueError):
+        raise ValueError("weights and max_values must be numbers")
+    if any(v < 0 for v in w.values()) or sum(w.values()) <= 0:
+        raise ValueError("weights must be non-negative and not all zero")
+    if any(v <= 0 for v in m.values()):
+        raise ValueError("max_values must be positive")
+    return w, m
+
+
+def _ordered(profile: WeightProfile) -> Profile:
+    return ({k: profile.weights[k] for k in COMPONENTS}, {k: profile.max_values[k] for k in COMPONENTS})
+
+
+def resolve_profiles(session, sub_codes: Iterable[str]) -> Dict[str, Profile]:
+    """(weights, max_values) for each of `sub_codes`: subject profile, branch profile or defaults."""
+    codes = sorted(set(sub_codes))
+    if not codes:
+        return {}
+    branches = dict(session.execute(select(Subject.sub_code, Subject.branch).where(Subject.sub_code.in_(codes))).all())
+    by_code, by_branch = {}, {}
+    for (p,) in session.execute(select(WeightProfile).where(or_(
+            WeightProfile.sub_code.in_(codes), WeightProfile.branch.in_(set(branches.values()))))):
+        if p.sub_code:
+            by_code[p.sub_code] = _ordered(p)
+        else:
+            by_branch[p.branch] = _ordered(p)
+    return {c: by_code.get(c) or by_branch.get(branches.get(c)) or DEFAULT_PROFILE for c in codes}
+
+
+def governed_sub_codes(branch: Optional[str], sub_code: Optional[str]) -> List[str]:
+    """Subjects whose scores follow the profile of `sub_code`, or of `branch`."""
+    if sub_code:
+        return [sub_code]
+    own = select(WeightProfile.sub_code).where(WeightProfile.sub_code.isnot(None))
+    return list(db.session.execute(
+        select(Subject.sub_code).where(Subject.branch == branch, Subject.sub_code.not_in(own))
+        .order_by(Subject.sub_code)
+    ).scalars())
+
+
+def profile_json(p: WeightProfile) -> dict:
+    return {"id": p.id, "branch": p.branch, "sub_code": p.sub_code, "weights": p.weights,
+            "max_values": p.max_values, "updated_on": p.updated_on.isoformat() if p.updated_on else None}
+
+
+def recompute_json(job: ScoreRecompute) -> dict:
+    return {"id": job.id, "status": job.status, "sub_codes": job.sub_codes, "total": job.total,
+            "processed": job.processed, "changed": job.changed, "error": job.error,
+            "created_on": job.created_on.isoformat() if job.created_on else None,
+            "finished_on": job.finished_on.isoformat() if job.finished_on else None}
+
+
+# ---------------------------
+# Vectorised scoring
+# ---------------------------
+def score_matrix(values: "np.ndarray", weights: "np.ndarray", max_values: "np.ndarray") -> "np.ndarray":
+    """
+    compute_subject_score() over rows: (n, 5) arrays in COMPONENTS order, NaN
+    for a missing component. Does the same float operations in the same order,
+    so unrounded results are identical; rows without any component are NaN.
+    """
+    import numpy as np
+
+    present = ~np.isnan(values)
+    perc = values / max_values * 100.0
+
+    # attendance missing: its weight is spread over the others pro rata
+    used = weights.copy()
+    other = weights[:, 1:]
+    total_other = other[:, 0] + other[:, 1] + other[:, 2] + other[:, 3]
+    spread = ~present[:, 0] & (total_other > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        used[spread, 1:] = other[spread] + (other[spread] / total_other[spread, None]) * weights[spread, :1]
+
+    score = np.zeros(len(values))
+    considered = np.zeros(len(values))
+    for k in range(len(COMPONENTS)):
+        m = present[:, k]
+        score = np.where(m, score + used[:, k] * perc[:, k], score)
+        considered = np.where(m, considered + used[:, k], considered)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rescale = (considered > 0) & (np.abs(considered - 1.0) > 1e-6)
+        score = np.where(rescale, score / considered, score)
+    score[~present.any(axis=1)] = np.nan
+    return score
+
+
+def _stage_chunk(rows, code_index: Dict[str, int], weights: "np.ndarray", max_values: "np.ndarray") -> List[dict]:
+    """Score one chunk of mark rows; staging rows for the marks whose score or risk changes."""
+    import numpy as np
+
+    idx = np.fromiter((code_index[r.sub_code] for r in rows), dtype=np.intp, count=len(rows))
+    values = np.array([[getattr(r, k) for k in COMPONENTS] for r in rows], dtype=float)
+    scores = score_matrix(values, weights[idx], max_values[idx])
+
+    staged = []
+    for r, s in zip(rows, scores.tolist()):
+        score = None if s != s else round(s, 2)
+        risk = map_risk(score) if score is not None else None
+        if score != r.subject_score or risk != r.risk:
+            staged.append({"mark_id": r.id, "student_id": r.student_id, "seen_updated_on": r.updated_on,
+                           "subject_score": score, "risk": risk})
+    return staged
+
+
+# ---------------------------
+# Recompute jobs
+# ---------------------------
+def queue_recompute(sub_codes: Iterable[str]) -> Optional[ScoreRecompute]:
+    """Add a pending recompute of `sub_codes` to the session (caller commits), or None if empty."""
+    codes = sorted(set(sub_codes))
+    if not codes:
+        return None
+    job = ScoreRecompute(sub_codes=codes, status="pending", processed=0, changed=0)
+    db.session.add(job)
+    return job
+
+
+def start_recompute(job: Optional[ScoreRecompute]) -> None:
+    """Run a committed recompute in a background thread."""
+    if job is None:
+        return
+    app = current_app._get_current_object()
+
+    def _run(job_id):
+        with app.app_context():
+            try:
+                run_recompute(job_id)
+            finally:
+                db.session.remove()
+
+    threading.Thread(target=_run, args=(job.id,), name=f"score-recompute-{job.id}", daemon=True).start()
+
+
+def run_recompute(job_id: int) -> ScoreRecompute:
+    """Score, stage and swap in the marks of one recompute; returns the finished job."""
+    import numpy as np  # heavy; only recomputes need it
+
+    job = db.session.get(ScoreRecompute, job_id)
+    codes = list(job.sub_codes)
+    job.status, job.processed, job.changed, job.error = "running", 0, 0, None
+    job.total = db.session.query(func.count(Mark.id)).filter(Mark.sub_code.in_(codes)).scalar()
+    db.session.execute(delete(StagedScore).where(StagedScore.recompute_id == job_id))
+    db.session.commit()
+
+    try:
+        profiles = resolve_profiles(db.session, codes)
+        code_index = {c: i for i, c in enumerate(codes)}
+        weights = np.array([[profiles[c][0][k] for k in COMPONENTS] for c in codes], dtype=float)
+        max_values = np.array([[profiles[c][1][k] for k in COMPONENTS] for c in codes], dtype=float)
+
+        cols = (Mark.id, Mark.student_id, Mark.sub_code, Mark.updated_on, Mark.subject_score, Mark.risk,
+                *[getattr(Mark, k) for k in COMPONENTS])
+        last_id = 0
+        while True:
+            rows = db.session.execute(
+                select(*cols).where(Mark.sub_code.in_(codes), Mark.id > last_id).order_by(Mark.id).limit(CHUNK)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            staged = _stage_chunk(rows, code_index, weights, max_values)
+            if staged:
+                db.session.execute(insert(StagedScore), [dict(s, recompute_id=job_id) for s in staged])
+            job.processed += len(rows)
+            job.changed += len(staged)
+            db.session.commit()
+
+        if resolve_profiles(db.session, codes) != profiles:
+            job.status = "superseded"   # a newer recompute covers these subjects
+        else:
+            _swap(job_id)
+            job.status = "done"
+        db.session.execute(delete(StagedScore).where(StagedScore.recompute_id == job_id))
+        job.finished_on = datetime.utcnow()
+        db.session.commit()
+    except Exception as exc:
+        db.session.rollback()
+        current_app.logger.exception("score recompute %s failed", job_id)
+        job = db.session.get(ScoreRecompute, job_id)
+        job.status, job.error, job.finished_on = "failed", str(exc)[:2000], datetime.utcnow()
+        db.session.commit()
+    return job
+
+
+def _swap(job_id: int) -> None:
+    """Copy the staged scores into marks and refresh summaries, in the caller's transaction."""
+    from app.changes import touch
+    from app.events import publish_students
+    from app.summaries import refresh_students
+
+    t = Mark.__table__
+    stmt = (
+        update(t)
+        .where(t.c.id == bindparam("b_id"))
+        .where(t.c.updated_on.is_not_distinct_from(bindparam("b_seen", type_=db.DateTime)))
+        .values(subject_score=bindparam("b_score"), risk=bindparam("b_risk"))
+    )
+    students = set()
+    last_id = -1
+    while True:
+        staged = db.session.execute(
+            select(StagedScore).where(StagedScore.recompute_id == job_id, StagedScore.mark_id > last_id)
+            .order_by(StagedScore.mark_id).limit(CHUNK)
+        ).scalars().all()
+        if not staged:
+            break
+        last_id = staged[-1].mark_id
+        db.session.execute(stmt, [{"b_id": s.mark_id, "b_seen": s.seen_updated_on,
+                                   "b_score": s.subject_score, "b_risk": s.risk} for s in staged])
+        touch(db.session, Mark, [s.mark_id for s in staged])
+        students.update(s.student_id for s in staged)
+    refresh_students(students)
+    publish_students(db.session, students, "recompute")
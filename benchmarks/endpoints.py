@@ -0,0 +1,243 @@
+# benchmarks/endpoints.py
+"""
+End-to-end benchmark of the /api/results and /api/files endpoints.
+
+    python benchmarks/endpoints.py                          # all scales, compare with baseline
+    python benchmarks/endpoints.py --scales small --runs 5
+    python benchmarks/endpoints.py --save-baseline          # record benchmarks/baseline.json
+    python benchmarks/endpoints.py --check                  # exit 1 on regressions
+
+Each scale runs in a fresh interpreter against its own scratch database filled
+by benchmarks/synth.py, through the Flask test client (no network, no server).
+Every endpoint is called once to warm caches, then --runs times; we record
+p50 / p95 / p99 latency and the number of SQL statements per request.
+
+A regression is an endpoint that issues more queries than the baseline, or
+whose p95 grew by more than --tolerance *and* more than --min-ms (latency is
+machine dependent: re-record the baseline on the machine that runs --check).
+Only GET endpoints are measured; upload and delete mutate the dataset.
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+# generator arguments per scale (see benchmarks/synth.py)
+SCALES = {
+    "small": dict(branches=2, years=1, students=30, subjects=6, semesters=2, files=3),
+    "medium": dict(branches=3, years=2, students=60, subjects=8, semesters=4, files=10),
+    "large": dict(branches=4, years=3, students=120, subjects=8, semesters=6, files=30),
+}
+
+
+def endpoints(ctx):
+    """(name, url) of every endpoint under test, with arguments taken from the generated data."""
+    b, y, s, pin, fid = ctx["branch"], ctx["year"], ctx["semester"], ctx["pin"], ctx["file_id"]
+    batch = f"branch={b}&year={y}&semester={s}"
+    return [
+        ("results.search[pin]", f"/api/results/search?pin={pin}"),
+        ("results.search[pin,semester]", f"/api/results/search?pin={pin}&semester={s}"),
+        ("results.search[batch]", f"/api/results/search?{batch}"),
+        ("results.search[batch,fields]", f"/api/results/search?{batch}&fields=pin,name"),
+        ("results.overview", f"/api/results/overview?{batch}"),
+        ("results.export", f"/api/results/export?{batch}"),
+        ("results.report_cards", f"/api/results/report-cards?{batch}"),
+        ("results.institution", "/api/results/institution"),
+        ("results.subject_averages", f"/api/results/graphs/subject_averages?{batch}"),
+        ("results.distribution", f"/api/results/graphs/distribution?{batch}"),
+        ("results.risk_distribution", f"/api/results/graphs/risk_distribution?{batch}"),
+        ("results.sgpa_trend", f"/api/results/graphs/sgpa_trend?pin={pin}"),
+        ("results.cgpa", f"/api/results/cgpa?pin={pin}"),
+        ("results.cgpa_ranking", f"/api/results/cgpa/ranking?branch={b}&year={y}"),
+        ("results.leaderboard", f"/api/results/leaderboard?{batch}&k=20"),
+        ("results.leaderboard[bottom]", f"/api/results/leaderboard?{batch}&k=20&order=bottom"),
+        ("results.projection", f"/api/results/projection?{batch}"),
+        ("results.changes", "/api/results/changes?limit=1000"),
+        ("results.compare", f"/api/results/compare?cohort={b}:{y}:{s}&cohort={b}:{y}:1"),
+        ("files.list", "/api/files"),
+        ("files.list[exam_type]", "/api/files?exam_type=mid1"),
+        ("files.preview", f"/api/files/{fid}/preview"),
+        ("files.rows", f"/api/files/{fid}/rows?offset=10&limit=100"),
+        ("files.download", f"/api/files/{fid}/download"),
+        ("files.view", f"/api/files/{fid}/view"),
+    ]
+
+
+# ---------------------------
+# Probe (runs in the child interpreter)
+# ---------------------------
+def _percentile(sorted_vals, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_vals:
+        return None
+    k = max(int(round(pct / 100.0 * len(sorted_vals) + 0.5)) - 1, 0)
+    return sorted_vals[min(k, len(sorted_vals) - 1)]
+
+
+def probe(scale: str, runs: int) -> dict:
+    import time
+    sys.path.insert(0, ROOT)
+    sys.path.insert(0, BENCH_DIR)
+    from sqlalchemy import event
+    from app import create_app, db
+    from app.models import Student, UploadedFile, User
+    from synth import generate
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        t0 = time.perf_counter()
+        counts = generate(**SCALES[scale])
+        gen_s = time.perf_counter() - t0
+
+        first = Student.query.order_by(Student.id).first()
+        ctx = {"branch": first.branch, "year": first.exam_year, "semester": SCALES[scale]["semesters"],
+               "pin": first.pin, "file_id": UploadedFile.query.order_by(UploadedFile.id).first().id,
+               "user_id": User.query.filter_by(username="bench").first().id}
+
+        queries = []
+        event.listen(db.engine, "before_cursor_execute", lambda *a, **k: queries.append(1))
+
+    client = app.test_client()
+    with client.session_transaction() as sess:   # report cards need a login; synth creates "bench"
+        sess["_user_id"] = str(ctx["user_id"])
+        sess["_fresh"] = True
+    results = {}
+    for name, url in endpoints(ctx):
+        client.get(url).close()  # warm-up: previews, row indexes, caches
+        times, qcounts, status = [], [], None
+        for _ in range(runs):
+            queries.clear()
+            t = time.perf_counter()
+            rv = client.get(url)
+            rv.get_data()
+            times.append((time.perf_counter() - t) * 1000)
+            rv.close()
+            qcounts.append(len(queries))
+            status = rv.status_code
+        times.sort()
+        results[name] = {
+            "p50": round(_percentile(times, 50), 3),
+            "p95": round(_percentile(times, 95), 3),
+            "p99": round(_percentile(times, 99), 3),
+            "queries": max(qcounts),
+            "status": status,
+        }
+    return {"dataset": counts, "generate_s": round(gen_s, 2), "endpoints": results}
+
+
+def run_scale(scale: str, runs: int) -> dict:
+    from synth import scratch_env
+
+    with tempfile.TemporaryDirectory(prefix=f"bench-{scale}-") as workdir:
+        env = dict(os.environ, PYTHONPATH=ROOT, **scratch_env(workdir))
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), "--probe", scale, "--runs", str(runs)],
+                             cwd=ROOT, env=env, capture_output=True, text=True)
+    if out.returncode:
+        raise RuntimeError(f"{scale} probe failed:\n{out.stderr}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+# ---------------------------
+# Comparison
+# ---------------------------
+def compare(current: dict, baseline: dict, tolerance: float, min_ms: float):
+    """Return a list of human-readable regressions of `current` against `baseline`."""
+    problems = []
+    for scale, res in current.items():
+        base_eps = baseline.get(scale, {}).get("endpoints", {})
+        for name, cur in res["endpoints"].items():
+            base = base_eps.get(name)
+            if base is None:
+                continue
+            where = f"{scale:<6} {name}"
+            if cur["status"] != base["status"]:
+                problems.append(f"{where}: status {base['status']} -> {cur['status']}")
+            if cur["queries"] > base["queries"]:
+                problems.append(f"{where}: queries {base['queries']} -> {cur['queries']}")
+            grown = cur["p95"] - base["p95"]
+            if grown > min_ms and cur["p95"] > base["p95"] * (1 + tolerance):
+                problems.append(f"{where}: p95 {base['p95']:.1f} -> {cur['p95']:.1f} ms")
+    return problems
+
+
+def print_report(current: dict, baseline: dict):
+    for scale, res in current.items():
+        ds = res["dataset"]
+        print(f"\n[{scale}] {ds['students']} students, {ds['marks']} marks, {ds['files']} files "
+              f"(generated in {res['generate_s']}s)")
+        print(f"  {'endpoint':<30} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'queries':>8} {'base p95':>9} {'base q':>7}")
+        base_eps = baseline.get(scale, {}).get("endpoints", {})
+        for name, r in res["endpoints"].items():
+            b = base_eps.get(name, {})
+            status = "" if r["status"] == 200 else f"  HTTP {r['status']}"
+            print(f"  {name:<30} {r['p50']:9.1f} {r['p95']:9.1f} {r['p99']:9.1f} {r['queries']:8d} "
+                  f"{b.get('p95', float('nan')):9.1f} {b.get('queries', '-'):>7}{status}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--scales", default=",".join(SCALES), help="comma-separated subset of: " + ", ".join(SCALES))
+    ap.add_argument("--runs", type=int, default=15, help="timed requests per endpoint")
+    ap.add_argument("--baseline", default=DEFAULT_BASELINE)
+    ap.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed relative p95 growth")
+    ap.add_argument("--min-ms", type=float, default=5.0, help="ignore p95 growth below this many ms")
+    ap.add_argument("--check", action="store_true", help="exit non-zero on regressions")
+    ap.add_argument("--json", dest="json_out", help="also write the raw results to this file")
+    ap.add_argument("--probe", help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    if args.probe:
+        print(json.dumps(probe(args.probe, args.runs)))
+        return 0
+
+    sys.path.insert(0, BENCH_DIR)
+    scales = [s.strip() for s in args.scales.split(",") if s.strip()]
+    unknown = [s for s in scales if s not in SCALES]
+    if unknown:
+        ap.error(f"unknown scale(s): {', '.join(unknown)}")
+
+    current = {s: run_scale(s, args.runs) for s in scales}
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+    print_report(current, baseline)
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as fh:
+            json.dump(current, fh, indent=2)
+    if args.save_baseline:
+        merged = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as fh:
+                merged = json.load(fh)
+        merged.update(current)
+        with open(args.baseline, "w", encoding="utf-8") as fh:
+            json.dump(merged, fh, indent=2, sort_keys=True)
+            fh.write("\n")
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    problems = compare(current, baseline, args.tolerance, args.min_ms)
+    if baseline:
+        print()
+        for p in problems:
+            print("REGRESSION:", p)
+        if not problems:
+            print("No regressions against baseline.")
+    if args.check and problems:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+# benchmarks/projection.py
+"""
+Cross-check of app/projection.py against the persisted scoring.
+
+    python benchmarks/projection.py              # report
+    python benchmarks/projection.py --check      # exit 1 on any mismatch
+
+Random marks (some components missing, random weight profiles and maximums)
+go through required_end_sem(); every required mark is fed back through
+compute_subject_score() with that end_sem, which must reach the target, while
+0.01 less must not (so nobody is asked for more than needed). Targets marked
+unreachable must stay below the target even with full end_sem marks.
+"""
+import os
+import sys
+import random
+import argparse
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+
+def random_case(rng: random.Random, components):
+    weights = {k: rng.choice((0.0, 0.05, 0.1, 0.15, 0.2, 0.25, 0.3, 0.5, 0.6)) for k in components}
+    weights["end_sem"] = rng.choice((0.3, 0.4, 0.5, 0.6))
+    max_values = {k: float(rng.choice((10, 20, 25, 30, 50, 60, 75, 100))) for k in components}
+    values = {k: (None if rng.random() < 0.25 else round(rng.uniform(0, max_values[k]), rng.choice((0, 1, 2))))
+              for k in components}
+    values["end_sem"] = None
+    return values, weights, max_values
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--cases", type=int, default=3000)
+    ap.add_argument("--seed", type=int, default=50)
+    ap.add_argument("--check", action="store_true", help="exit non-zero on a mismatch")
+    args = ap.parse_args(argv)
+
+    import numpy as np
+    from app.projection import TARGETS, required_end_sem
+    from app.utils import compute_subject_score
+    from app.weights import COMPONENTS
+
+    rng = random.Random(args.seed)
+    cases = [random_case(rng, COMPONENTS) for _ in range(args.cases)]
+    need = required_end_sem(
+        np.array([[np.nan if v[k] is None else v[k] for k in COMPONENTS] for v, _, _ in cases]),
+        np.array([[w[k] for k in COMPONENTS] for _, w, _ in cases]),
+        np.array([[m[k] for k in COMPONENTS] for _, _, m in cases]),
+        np.array([t for _, t in TARGETS]),
+    )
+
+    def score(values, weights, max_values, end_sem):
+        return compute_subject_score(dict(values, end_sem=end_sem), weights, max_values)
+
+    checked, misses, over = 0, [], []
+    for (values, weights, max_values), row in zip(cases, need.tolist()):
+        for (name, target), req in zip(TARGETS, row):
+            checked += 1
+            if req != req:  # NaN: unreachable
+                if score(values, weights, max_values, max_values["end_sem"]) >= target:
+                    misses.append((name, values, "reachable with full marks"))
+                continue
+            if score(values, weights, max_values, req) < target:
+                misses.append((name, values, f"{req} falls short"))
+            elif req > 0 and score(values, weights, max_values, round(req - 0.01, 2)) >= target:
+                over.append((name, values, f"{req} is 0.01 more than needed"))
+
+    print(f"{checked} required marks checked: {len(misses)} wrong, {len(over)} asking for more than needed")
+    for name, values, why in (misses + over)[:10]:
+        print(f"  {name:5} {why}: {values}")
+    if args.check and (misses or over):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+# benchmarks/serialization.py
+"""
+Serialization time and bytes on the wire for the largest JSON responses.
+
+    python benchmarks/serialization.py                      # medium scale
+    python benchmarks/serialization.py --scale large --runs 50
+
+For each payload (batch /search, /search by PIN, file preview, a page of file
+rows, and the import preview in preview.json) we report:
+  * encode ms: app.json.response() with Flask's stdlib provider and with
+    OrjsonProvider (app/json_provider.py), median of --runs,
+  * bytes: uncompressed, gzip at COMPRESS_LEVEL and brotli at
+    COMPRESS_BR_LEVEL (when `brotli` is installed), with compression ms,
+  * what the app actually sends to a client offering "gzip, br".
+
+Payloads come from the Flask test client against a scratch database filled by
+benchmarks/synth.py in a fresh interpreter, like benchmarks/endpoints.py.
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PREVIEW_JSON = os.path.join(ROOT, "preview.json")
+
+
+def payloads(ctx):
+    """(name, url) of the responses under test; preview.json is added from disk."""
+    b, y, s, pin, fid = ctx["branch"], ctx["year"], ctx["semester"], ctx["pin"], ctx["file_id"]
+    return [
+        ("results.search[batch]", f"/api/results/search?branch={b}&year={y}&semester={s}"),
+        ("results.search[pin]", f"/api/results/search?pin={pin}"),
+        ("files.preview", f"/api/files/{fid}/preview"),
+        ("files.rows[1000]", f"/api/files/{fid}/rows?offset=0&limit=1000"),
+    ]
+
+
+def _median_ms(fn, runs: int) -> float:
+    import time
+    import statistics
+    times = []
+    for _ in range(runs):
+        t = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t) * 1000)
+    return round(statistics.median(times), 3)
+
+
+# ---------------------------
+# Probe (runs in the child interpreter)
+# ---------------------------
+def probe(scale: str, runs: int) -> dict:
+    sys.path.insert(0, ROOT)
+    sys.path.insert(0, BENCH_DIR)
+    from flask.json.provider import DefaultJSONProvider
+    from app import create_app, db
+    from app.compression import HAVE_BROTLI, compress
+    from app.json_provider import HAVE_ORJSON, OrjsonProvider
+    from app.models import Student, UploadedFile
+    from endpoints import SCALES
+    from synth import generate
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        generate(**SCALES[scale])
+        first = Student.query.order_by(Student.id).first()
+        ctx = {"branch": first.branch, "year": first.exam_year, "semester": SCALES[scale]["semesters"],
+               "pin": first.pin, "file_id": UploadedFile.query.order_by(UploadedFile.id).first().id}
+
+    client = app.test_client()
+    items = []
+    for name, url in payloads(ctx):
+        rv = client.get(url)   # identity: the payload itself
+        items.append((name, url, json.loads(rv.get_data())))
+    if os.path.exists(PREVIEW_JSON):
+        with open(PREVIEW_JSON, encoding="utf-8") as fh:
+            items.append(("preview.json", None, json.load(fh)))
+
+    providers = {"stdlib": DefaultJSONProvider(app)}
+    if HAVE_ORJSON:
+        providers["orjson"] = OrjsonProvider(app)
+    levels = {"gzip": app.config["COMPRESS_LEVEL"]}
+    if HAVE_BROTLI:
+        levels["br"] = app.config["COMPRESS_BR_LEVEL"]
+
+    results = {}
+    with app.app_context():
+        for name, url, obj in items:
+            r = {"encode_ms": {}, "bytes": {}, "compress_ms": {}}
+            for pname, provider in providers.items():
+                r["encode_ms"][pname] = _median_ms(lambda: provider.response(obj), runs)
+            body = app.json.response(obj).get_data()
+            r["bytes"]["identity"] = len(body)
+            for enc, level in levels.items():
+                r["bytes"][enc] = len(compress(body, enc, level))
+                r["compress_ms"][enc] = _median_ms(lambda: compress(body, enc, level), runs)
+            if url:
+                rv = client.get(url, headers={"Accept-Encoding": "gzip, br"})
+                r["sent"] = {"encoding": rv.headers.get("Content-Encoding") or "identity",
+                             "bytes": len(rv.get_data())}
+            results[name] = r
+    return {"scale": scale, "providers": list(providers), "encodings": list(levels), "payloads": results}
+
+
+def run(scale: str, runs: int) -> dict:
+    sys.path.insert(0, BENCH_DIR)
+    from synth import scratch_env
+
+    with tempfile.TemporaryDirectory(prefix=f"bench-ser-{scale}-") as workdir:
+        env = dict(os.environ, PYTHONPATH=ROOT, **scratch_env(workdir))
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), "--probe", scale, "--runs", str(runs)],
+                             cwd=ROOT, env=env, capture_output=True, text=True)
+    if out.returncode:
+        raise RuntimeError(f"{scale} probe failed:\n{out.stderr}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def print_report(res: dict):
+    providers, encodings = res["providers"], res["encodings"]
+    print(f"\n[{res['scale']}] encode ms by provider, bytes and compress ms by encoding")
+    head = "".join(f"{p + ' ms':>11}" for p in providers) + f"{'bytes':>10}"
+    head += "".join(f"{e:>9}{e + ' ms':>9}" for e in encodings) + f"{'sent':>16}"
+    print(f"  {'payload':<24}{head}")
+    for name, r in res["payloads"].items():
+        line = "".join(f"{r['encode_ms'][p]:11.2f}" for p in providers) + f"{r['bytes']['identity']:10d}"
+        line += "".join(f"{r['bytes'][e]:9d}{r['compress_ms'][e]:9.2f}" for e in encodings)
+        sent = r.get("sent")
+        line += f"{sent['bytes']:>9} {sent['encoding']:<6}" if sent else f"{'-':>16}"
+        print(f"  {name:<24}{line}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--scale", default="medium", help="dataset scale (see benchmarks/endpoints.py)")
+    ap.add_argument("--runs", type=int, default=30, help="timed encodes per payload")
+    ap.add_argument("--json", dest="json_out", help="also write the raw results to this file")
+    ap.add_argument("--probe", help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    if args.probe:
+        print(json.dumps(probe(args.probe, args.runs)))
+        return 0
+
+    res = run(args.scale, args.runs)
+    print_report(res)
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as fh:
+            json.dump(res, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+# benchmarks/startup.py
+"""
+Startup-time benchmark for create_app (what every gunicorn worker and CLI call pays).
+
+    python benchmarks/startup.py                 # report
+    python benchmarks/startup.py --check         # exit 1 if over budget
+
+Each run is a fresh interpreter, so import costs are measured cold-in-process
+(OS file cache warm). Checks:
+  * median wall time of `from app import create_app; create_app()` <= --budget-ms
+  * none of the heavy parsing modules are imported at startup
+  * create_app issues no SQL
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# modules that must only be imported when a file is actually parsed
+HEAVY_MODULES = ("openpyxl", "pandas", "numpy", "zstandard")
+
+PROBE = r"""
+import sys, time, json
+t0 = time.perf_counter()
+from app import create_app
+t1 = time.perf_counter()
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+queries = []
+event.listen(Engine, "before_cursor_execute", lambda *a, **k: queries.append(a[2]))
+create_app()
+t2 = time.perf_counter()
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "create_app_ms": (t2 - t1) * 1000,
+    "total_ms": (t2 - t0) * 1000,
+    "heavy": [m for m in %r if m in sys.modules],
+    "queries": len(queries),
+}))
+""" % (HEAVY_MODULES,)
+
+
+def run_once():
+    env = dict(os.environ, PYTHONPATH=ROOT, PYTHONDONTWRITEBYTECODE="0")
+    out = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def top_imports(limit=12):
+    """Slowest cumulative imports under -X importtime (for the report only)."""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", "from app import create_app; create_app()"],
+                         cwd=ROOT, env=env, capture_output=True, text=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self_us, cum_us, name = line[len("import time:"):].split("|")
+        # -X importtime indents each nesting level by two more spaces; keep two levels
+        if name.startswith("     "):
+            continue
+        rows.append((int(cum_us), name.strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--runs", type=int, default=7)
+    ap.add_argument("--budget-ms", type=float, default=float(os.getenv("STARTUP_BUDGET_MS", 1000)))
+    ap.add_argument("--check", action="store_true", help="exit non-zero when a budget is exceeded")
+    args = ap.parse_args(argv)
+
+    runs = [run_once() for _ in range(args.runs)]
+    total = statistics.median(r["total_ms"] for r in runs)
+    print(f"import app        median {statistics.median(r['import_ms'] for r in runs):8.1f} ms")
+    print(f"create_app()      median {statistics.median(r['create_app_ms'] for r in runs):8.1f} ms")
+    print(f"total             median {total:8.1f} ms   (budget {args.budget_ms:.0f} ms)")
+    print("slowest imports (cumulative):")
+    for cum_us, name in top_imports():
+        print(f"  {cum_us / 1000:8.1f} ms  {name}")
+
+    failures = []
+    if total > args.budget_ms:
+        failures.append(f"startup {total:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+    heavy = sorted({m for r in runs for m in r["heavy"]})
+    if heavy:
+        failures.append(f"heavy modules imported at startup: {', '.join(heavy)}")
+    if any(r["queries"] for r in runs):
+        failures.append(f"create_app ran {max(r['queries'] for r in runs)} SQL statements")
+
+    for f in failures:
+        print("FAIL:", f)
+    if args.check and failures:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
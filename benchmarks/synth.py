@@ -0,0 +1,197 @@
+# benchmarks/synth.py
+"""
+Synthetic dataset generator for benchmarks (never point it at a real database).
+
+    python benchmarks/synth.py --db /tmp/bench.db --branches 3 --years 2 --students 60 \
+        --subjects 8 --semesters 6 --files 10
+
+Fills a scratch SQLite database with branches × exam years × students, each
+branch having `subjects` subjects per semester and every student one Mark row
+per subject per semester. Marks follow a per-student ability so class averages,
+risk bands and trends look like real results; a few components are left empty
+the way partial imports leave them. Uploads are mark-sheet CSVs of whole
+batches, stored through the blob store like POST /api/files does.
+
+`generate()` is also used in-process by benchmarks/endpoints.py.
+"""
+import io
+import os
+import sys
+import csv
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+BRANCHES = ("CS", "EC", "EE", "ME", "CE", "CH", "MT", "AE")
+FIRST_NAMES = ("Aarav", "Ananya", "Arjun", "Bhavya", "Chaitanya", "Deepika", "Harsha", "Ishita", "Karthik",
+               "Lakshmi", "Manoj", "Meghana", "Nikhil", "Pooja", "Rahul", "Sai", "Sneha", "Tarun", "Vamsi", "Yamini")
+LAST_NAMES = ("Reddy", "Rao", "Sharma", "Goud", "Naidu", "Kumar", "Varma", "Chary", "Patel", "Yadav")
+EXAM_TYPES = ("mid1", "mid2", "semester")
+
+
+def _clamp(v, hi):
+    return round(min(max(v, 0.0), hi), 1)
+
+
+def _components(rng: random.Random, ability: float, difficulty: float):
+    """One subject's marks for a student of `ability` (0..1) in a subject of `difficulty`."""
+    p = min(max(rng.gauss(ability - difficulty, 0.12), 0.02), 1.0)
+    comps = {
+        "mid1": _clamp(rng.gauss(p * 20, 2.5), 20),
+        "mid2": _clamp(rng.gauss(p * 20, 2.5), 20),
+        "internal": _clamp(rng.gauss(p * 20 + 1, 2.0), 20),
+        "end_sem": _clamp(rng.gauss(p * 40, 5.0), 40),
+        "attendance": _clamp(rng.gauss(60 + 35 * ability, 8.0), 100),
+    }
+    # partial imports: attendance not uploaded yet, end exam not held yet, ...
+    r = rng.random()
+    if r < 0.05:
+        comps["attendance"] = None
+    elif r < 0.08:
+        comps["end_sem"] = None
+    elif r < 0.09:
+        comps["mid2"] = comps["internal"] = comps["end_sem"] = None
+    return comps
+
+
+def generate(branches=3, years=2, students=60, subjects=8, semesters=6, files=10, seed=42,
+             first_year=2021) -> dict:
+    """Insert the dataset into the current app's database; return row counts."""
+    from sqlalchemy import insert
+    from app import db
+    from app.models import Institution, Mark, Student, Subject, UploadedFile, User
+    from app.storage import store_upload
+    from app.summaries import rebuild_summaries
+    from app.utils import compute_subject_score, map_risk
+
+    rng = random.Random(seed)
+    branch_codes = BRANCHES[:branches] if branches <= len(BRANCHES) else \
+        BRANCHES + tuple(f"B{i}" for i in range(len(BRANCHES), branches))
+
+    if Institution.query.first() is None:
+        db.session.add(Institution(name="Synthetic Polytechnic"))
+    user = User.query.filter_by(username="bench").first()
+    if user is None:
+        user = User(username="bench", role="admin")
+        user.set_password("bench")
+        db.session.add(user)
+    db.session.commit()
+
+    subject_rows, difficulty = [], {}
+    for b in branch_codes:
+        for sem in range(1, semesters + 1):
+            for k in range(1, subjects + 1):
+                code = f"{b}-{sem}{k:02d}"
+                subject_rows.append({"sub_code": code, "sub_name": f"{b} Subject {sem}.{k}",
+                                     "branch": b, "year": (sem + 1) // 2, "semester": sem})
+                difficulty[code] = rng.uniform(-0.05, 0.15)
+    db.session.execute(insert(Subject), subject_rows)
+
+    student_rows = []
+    for b in branch_codes:
+        for y in range(first_year, first_year + years):
+            for n in range(1, students + 1):
+                student_rows.append({"pin": f"{y % 100}189-{b}-{n:03d}",
+                                     "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                                     "branch": b, "exam_year": y})
+    db.session.execute(insert(Student), student_rows)
+    db.session.commit()
+
+    ids = dict(db.session.query(Student.pin, Student.id))
+    mark_rows = []
+    for st in student_rows:
+        ability = min(max(rng.gauss(0.62, 0.17), 0.05), 0.98)
+        for sem in range(1, semesters + 1):
+            for k in range(1, subjects + 1):
+                code = f"{st['branch']}-{sem}{k:02d}"
+                c = _components(rng, ability, difficulty[code])
+                score = compute_subject_score(c)
+                mark_rows.append(dict(
+                    c, student_id=ids[st["pin"]], sub_code=code, semester=sem,
+                    year=st["exam_year"] + (sem - 1) // 2,
+                    total=sum(v for key, v in c.items() if key != "attendance" and v is not None),
+                    subject_score=score, risk=map_risk(score),
+                ))
+        if len(mark_rows) >= 20000:
+            db.session.execute(insert(Mark), mark_rows)
+            mark_rows = []
+    if mark_rows:
+        db.session.execute(insert(Mark), mark_rows)
+    db.session.commit()
+
+    # uploads: one mark sheet per (batch, semester, exam type), round-robin
+    batches = [(b, y) for b in branch_codes for y in range(first_year, first_year + years)]
+    uploaded_on = datetime(first_year, 6, 1)
+    upload_rows = []
+    for i in range(files):
+        b, y = batches[i % len(batches)]
+        sem = 1 + (i // len(batches)) % semesters
+        exam_type = EXAM_TYPES[i % len(EXAM_TYPES)]
+        codes = [f"{b}-{sem}{k:02d}" for k in range(1, subjects + 1)]
+        buf = io.StringIO()
+        w = csv.writer(buf)
+        w.writerow(["PIN", "NAME"] + codes)
+        for st in student_rows:
+            if st["branch"] == b and st["exam_year"] == y:
+                w.writerow([st["pin"], st["name"]] + [rng.randint(0, 20) for _ in codes])
+        name = f"{b}_{y}_sem{sem}_{exam_type}_{i}.csv"
+        digest, rel, size = store_upload(io.BytesIO(buf.getvalue().encode("utf-8")), name)
+        uploaded_on += timedelta(hours=rng.randint(1, 72))
+        upload_rows.append({"file_name": name, "original_file_name": name, "exam_type": exam_type,
+                            "uploaded_by": user.id, "uploaded_on": uploaded_on,
+                            "content_hash": digest, "blob_path": rel, "size": size})
+    if upload_rows:
+        db.session.execute(insert(UploadedFile), upload_rows)
+    db.session.commit()
+    # marks went in through Core inserts, which bypass the summary hooks
+    rebuild_summaries()
+
+    return {"subjects": len(subject_rows), "students": len(student_rows),
+            "marks": db.session.query(db.func.count(Mark.id)).scalar(), "files": len(upload_rows)}
+
+
+def scratch_env(workdir: str) -> dict:
+    """Environment that points the app's database and file folders into `workdir`."""
+    return {
+        "DATABASE_URL": "sqlite:///" + os.path.join(workdir, "bench.db"),
+        "BLOB_FOLDER": os.path.join(workdir, "blobs"),
+        "FILE_CACHE_FOLDER": os.path.join(workdir, "cache"),
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--db", required=True, help="scratch SQLite file to create (must not exist)")
+    ap.add_argument("--branches", type=int, default=3)
+    ap.add_argument("--years", type=int, default=2, help="exam-year batches per branch")
+    ap.add_argument("--students", type=int, default=60, help="students per batch")
+    ap.add_argument("--subjects", type=int, default=8, help="subjects per branch per semester")
+    ap.add_argument("--semesters", type=int, default=6)
+    ap.add_argument("--files", type=int, default=10, help="uploaded mark sheets")
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args(argv)
+
+    db_path = os.path.abspath(args.db)
+    if os.path.exists(db_path):
+        ap.error(f"{db_path} exists; the generator only writes to a fresh scratch database")
+    workdir = os.path.dirname(db_path)
+    os.environ.update(scratch_env(workdir), DATABASE_URL="sqlite:///" + db_path)
+    sys.path.insert(0, ROOT)
+
+    from app import create_app, db
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        t0 = time.perf_counter()
+        counts = generate(args.branches, args.years, args.students, args.subjects, args.semesters,
+                          args.files, args.seed)
+        elapsed = time.perf_counter() - t0
+    print(", ".join(f"{v} {k}" for k, v in counts.items()) + f" in {elapsed:.1f}s -> {db_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
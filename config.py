@@ -10,5 +10,80 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL") or "sqlite:///" + os.path.join(BASE_DIR, "app.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Created by `flask data seed-institution`
+    INSTITUTION_NAME = os.getenv("INSTITUTION_NAME", "🏫 GOVT. POLYTECHNIC, SIDDIPET")
+
+    # Flask-Login user loader cache (app/auth/user_cache.py)
+    USER_CACHE_SIZE = 2048
+    USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", 5))  # seconds; other workers see role changes this late
+
+    # Password hashing processes per /admin/users/import request (`flask users import` uses every core)
+    USER_IMPORT_WORKERS = int(os.getenv("USER_IMPORT_WORKERS", min(2, os.cpu_count() or 1)))
+
     # Directory for uploaded files
     UPLOAD_FOLDER = os.path.join(BASE_DIR, "uploads")
+    # Content-addressable blob store (sharded by sha256) and optional at-rest CSV compression
+    BLOB_FOLDER = os.getenv("BLOB_FOLDER")  # default: <UPLOAD_FOLDER>/blobs
+    UPLOAD_COMPRESSION = os.getenv("UPLOAD_COMPRESSION", "")  # "", "gzip" or "zstd"
+
+    # Number of data rows kept in the file preview cache (file_previews table)
+    PREVIEW_CACHE_ROWS = int(os.getenv("PREVIEW_CACHE_ROWS", 50))
+
+    # Sidecar row indexes / Excel row-store conversions for /api/files/<id>/rows
+    FILE_CACHE_FOLDER = os.getenv("FILE_CACHE_FOLDER") or os.path.join(BASE_DIR, "cache", "files")
+    ROWS_PAGE_MAX = 1000
+
+    # Download offload to the front proxy: "" (stream from Flask), "x-accel" (nginx) or "x-sendfile"
+    SENDFILE_MODE = os.getenv("SENDFILE_MODE", "").lower()
+    USE_X_SENDFILE = SENDFILE_MODE == "x-sendfile"
+    # internal nginx location mapped onto UPLOAD_FOLDER (used by "x-accel")
+    SENDFILE_ACCEL_PREFIX = os.getenv("SENDFILE_ACCEL_PREFIX", "/protected-uploads")
+    # internal nginx location mapped onto BLOB_FOLDER; needed when it is outside UPLOAD_FOLDER
+    SENDFILE_BLOB_ACCEL_PREFIX = os.getenv("SENDFILE_BLOB_ACCEL_PREFIX", "")
+
+    # Per-request SQL instrumentation (app/instrumentation.py)
+    SQL_INSTRUMENTATION = os.getenv("SQL_INSTRUMENTATION", "1") not in ("0", "false", "False")
+    SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", 500))
+    SLOW_QUERY_TOP = 5  # slowest statements included in a slow_request log line
+    NPLUSONE_DETECT = os.getenv("NPLUSONE_DETECT", "0") in ("1", "true", "True")
+    NPLUSONE_THRESHOLD = int(os.getenv("NPLUSONE_THRESHOLD", 10))  # same statement shape, per request
+
+    # Prometheus metrics at /metrics (app/metrics.py). With several workers, point
+    # METRICS_DIR at a directory shared by them (emptied on deploy).
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") not in ("0", "false", "False")
+    METRICS_DIR = os.getenv("METRICS_DIR")
+    METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", 1.0))  # seconds
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")  # if set, scrapes need "Authorization: Bearer <token>"
+
+    # On-demand request profiles (app/profiling.py), listed at /admin/profiles
+    PROFILE_DIR = os.getenv("PROFILE_DIR") or os.path.join(BASE_DIR, "cache", "profiles")
+    PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0.0))  # fraction of requests, 0 = off
+    PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", 200))
+
+    # Early-warning snapshots (`flask data snapshot-risk`): cohorts whose exam_year
+    # is within this many years of the snapshot date are scored
+    RISK_ACTIVE_YEARS = int(os.getenv("RISK_ACTIVE_YEARS", 3))
+
+    # Cohort report cards (app/report_cards.py): render processes and students loaded per query batch
+    REPORT_CARD_WORKERS = int(os.getenv("REPORT_CARD_WORKERS", min(4, os.cpu_count() or 1)))
+    REPORT_CARD_BATCH = int(os.getenv("REPORT_CARD_BATCH", 200))
+    REPORT_CARD_MAX_JOBS = int(os.getenv("REPORT_CARD_MAX_JOBS", 1))   # concurrent exports per web process
+
+    # Cohort-changed Server-Sent Events at /api/results/events (app/events.py)
+    EVENTS_POLL_INTERVAL = float(os.getenv("EVENTS_POLL_INTERVAL", 1.0))    # seconds, per process
+    EVENTS_KEEPALIVE = float(os.getenv("EVENTS_KEEPALIVE", 15))             # seconds between comments
+    EVENTS_STREAM_MAX_AGE = float(os.getenv("EVENTS_STREAM_MAX_AGE", 600))  # then the client reconnects
+    EVENTS_RETENTION_HOURS = float(os.getenv("EVENTS_RETENTION_HOURS", 24))
+
+    # JSON encoding of API responses (app/json_provider.py): "auto", "orjson" or "default"
+    JSON_PROVIDER = os.getenv("JSON_PROVIDER", "auto")
+
+    # Response compression (app/compression.py): br when `brotli` is installed, else gzip
+    COMPRESS_ENABLED = os.getenv("COMPRESS_ENABLED", "1") not in ("0", "false", "False")
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", 1024))  # bytes
+    COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", 6))           # gzip 1-9
+    COMPRESS_BR_LEVEL = int(os.getenv("COMPRESS_BR_LEVEL", 4))     # brotli quality 0-11
+
+    # Delta sync at /api/results/changes (app/changes.py)
+    CHANGES_SAFETY_LAG = float(os.getenv("CHANGES_SAFETY_LAG", 5))           # seconds; covers re-stamp to COMMIT
+    CHANGES_TOMBSTONE_DAYS = float(os.getenv("CHANGES_TOMBSTONE_DAYS", 90))  # `flask data prune-tombstones`
@@ -34,6 +34,8 @@ export default function GraphAnalysis({ branch, year, semester, facultyName }) {
   const [riskData, setRiskData] = useState({ labels: [], values: [], counts: {} });
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
+  // bumped by server-sent cohort-changed events for this batch; refetches the graphs
+  const [refreshKey, setRefreshKey] = useState(0);
 
   const containerRef = useRef(null);
 
@@ -44,7 +46,7 @@ export default function GraphAnalysis({ branch, year, semester, facultyName }) {
       return;
     }
 
-    setLoading(true);
+    if (refreshKey === 0) setLoading(true); // live refreshes keep the current graphs until new data arrives
     setError(null);
 
     const subjUrl = `/api/results/graphs/subject_averages?branch=${encodeURIComponent(batch.branch)}&year=${batch.year}&semester=${batch.semester}`;
@@ -112,6 +114,26 @@ export default function GraphAnalysis({ branch, year, semester, facultyName }) {
         setLoading(false);
       }
     })();
+  }, [branch, year, semester, refreshKey]);
+
+  // Live refresh over Server-Sent Events: refetch once (bursts coalesced) when this batch changes.
+  useEffect(() => {
+    if (!batch || typeof window === "undefined" || !window.EventSource) return undefined;
+
+    const source = new EventSource(
+      `/api/results/events?branch=${encodeURIComponent(batch.branch)}&year=${batch.year}`
+    );
+    let timer = null;
+    source.addEventListener("cohort-changed", (e) => {
+      const ev = JSON.parse(e.data);
+      if (ev.semester !== null && String(ev.semester) !== String(batch.semester)) return;
+      clearTimeout(timer);
+      timer = setTimeout(() => setRefreshKey(k => k + 1), 500);
+    });
+    return () => {
+      clearTimeout(timer);
+      source.close();
+    };
   }, [branch, year, semester]);
 
   // multi-page PDF function: splits a long canvas to multiple pages.